@@ -0,0 +1,283 @@
+"""Generate synthetic files and measure how fast they are scanned."""
+
+import gzip
+import os
+import random
+import time
+
+from ._sanity import luhn
+from .core import get_column_map, sanity_test
+
+DEFAULT_BENCH_SIZE = 16  # Megabytes
+DEFAULT_HIT_DENSITY = 0.01
+DEFAULT_VALID_RATIO = 0.5
+DEFAULT_LINE_LENGTH = 120
+DEFAULT_BENCH_SEED = 0
+DEFAULT_BENCH_REPEAT = 3
+DEFAULT_BENCH_FILES = 8
+
+# Card number prefixes and lengths matched by the default filters.
+CARD_PREFIXES = (
+    ("4", 16),
+    ("51", 16),
+    ("55", 16),
+    ("34", 15),
+    ("37", 15),
+    ("6011", 16),
+)
+
+# Separators written between the digit groups of some card numbers.
+CARD_SEPARATORS = ("", "", "-", " ")
+
+# Filler words. Numbers are kept short so they never match a filter.
+WORDS = (
+    "GET",
+    "POST",
+    "/api/v1/orders",
+    "user",
+    "session",
+    "status=200",
+    "status=404",
+    "latency_ms=37",
+    "id=8812734",
+    "ip=10.0.12.7",
+    "2019-09-05T12:00:01Z",
+    "INFO",
+    "WARN",
+    "request",
+    "completed",
+    "payment",
+    "token",
+    "amount=129.99",
+    "customer",
+    "retry",
+)
+
+
+def luhn_digit(digits):
+    """Return the check digit making digits pass the Luhn test.
+
+    :param digits: str of digits without the check digit.
+    """
+    total = 0
+    for i, digit in enumerate(reversed(digits)):
+        value = int(digit)
+        if not i % 2:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return str(-total % 10)
+
+
+def card_number(rng, valid=True):
+    """Return a card number matched by one of the default filters.
+
+    :param rng: random.Random used to pick the number.
+    :param valid: Return a number passing the Luhn test, else one
+        failing it.
+    """
+    prefix, length = rng.choice(CARD_PREFIXES)
+    body = prefix + "".join(
+        rng.choice("0123456789") for _ in range(length - len(prefix) - 1)
+    )
+    check = luhn_digit(body)
+    if not valid:
+        check = str((int(check) + rng.randint(1, 9)) % 10)
+    number = body + check
+
+    separator = rng.choice(CARD_SEPARATORS)
+    if not separator:
+        return number
+    if length == 15:
+        groups = [number[:4], number[4:10], number[10:]]
+    else:
+        groups = [number[i : i + 4] for i in range(0, 16, 4)]
+    return separator.join(groups)
+
+
+def generate_lines(
+    size,
+    hit_density=DEFAULT_HIT_DENSITY,
+    valid_ratio=DEFAULT_VALID_RATIO,
+    line_length=DEFAULT_LINE_LENGTH,
+    delimiter=None,
+    seed=DEFAULT_BENCH_SEED,
+):
+    """Yield lines of synthetic log (or delimited) data.
+
+    The same arguments always yield the same lines, so results can be
+    compared across versions.
+
+    :param size: Bytes of lines to yield (the last line may go over).
+    :param hit_density: Share of the lines holding a card number.
+    :param valid_ratio: Share of the card numbers passing the Luhn test.
+    :param line_length: Approximate length of a line.
+    :param delimiter: Separate the words with this str (ex: ',') to
+        make delimited lines. Words are separated with spaces if None.
+    :param seed: Seed of the random generator.
+    """
+    rng = random.Random(seed)
+    separator = delimiter or " "
+    written = 0
+    while written < size:
+        words = []
+        length = 0
+        while length < line_length:
+            word = rng.choice(WORDS)
+            words.append(word)
+            length += len(word) + 1
+        if rng.random() < hit_density:
+            words[rng.randrange(len(words))] = card_number(
+                rng, valid=rng.random() < valid_ratio
+            )
+        line = (separator.join(words) + "\n").encode()
+        written += len(line)
+        yield line
+
+
+def write_corpus(file_name, size, compress=False, **line_kwargs):
+    """Write a synthetic file (see 'generate_lines').
+
+    :param file_name: Name of the file to write.
+    :param size: Bytes of (uncompressed) data to write.
+    :param compress: Write a gzipped file.
+    :param line_kwargs: Passed on to 'generate_lines'.
+
+    :return: dict with the bytes and lines written (uncompressed).
+    """
+    opener = gzip.open if compress else open
+    written = lines = 0
+    with opener(file_name, "wb") as wf:
+        batch = []
+        for line in generate_lines(size, **line_kwargs):
+            batch.append(line)
+            written += len(line)
+            lines += 1
+            if len(batch) >= 10000:
+                wf.write(b"".join(batch))
+                batch = []
+        wf.write(b"".join(batch))
+    return {"bytes": written, "lines": lines}
+
+
+def best_time(func, repeat=DEFAULT_BENCH_REPEAT):
+    """Return the shortest of 'repeat' runs of func, in seconds."""
+    best = None
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        func()
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best:
+            best = seconds
+    return best
+
+
+def bench_result(name, seconds, bytes_, count, unit="lines", **extra):
+    """Return the JSON record of a benchmark.
+
+    :param name: Name of the benchmark.
+    :param seconds: Time it took.
+    :param bytes_: Bytes it processed.
+    :param count: Lines (or items, see unit) it processed.
+    :param unit: What count counts, used to name the keys.
+    :param extra: Added to the record as they are.
+    """
+    seconds = max(seconds, 1e-9)
+    return {
+        "name": name,
+        "seconds": round(seconds, 6),
+        "bytes": bytes_,
+        "mb_per_second": round(bytes_ / 1024 / 1024 / seconds, 3),
+        unit: count,
+        f"{unit}_per_second": round(count / seconds, 1),
+        **extra,
+    }
+
+
+def candidates(filters, lines):
+    """Return (filter, match) tuples for every regex match in lines."""
+    found = []
+    for line in lines:
+        for filter_ in filters:
+            found.extend((filter_, match) for match in filter_.regex.findall(line))
+    return found
+
+
+def bench_get_column_map(filters, lines, delimiter, repeat=DEFAULT_BENCH_REPEAT):
+    """Benchmark 'get_column_map' over delimited lines, every filter."""
+    rows = [line.split(delimiter) for line in lines]
+
+    def run():
+        for columns in rows:
+            for filter_ in filters:
+                get_column_map(columns=columns, filter_=filter_, ignore_columns=set())
+
+    seconds = best_time(run, repeat)
+    return bench_result(
+        "get_column_map", seconds, sum(len(line) for line in lines), len(lines)
+    )
+
+
+def bench_sanity_test(found, encoding, repeat=DEFAULT_BENCH_REPEAT):
+    """Benchmark 'sanity_test' over (filter, match) tuples."""
+
+    def run():
+        for filter_, match in found:
+            sanity_test(filter_, match, encoding=encoding)
+
+    seconds = best_time(run, repeat)
+    return bench_result(
+        "sanity_test",
+        seconds,
+        sum(len(match) for _, match in found),
+        len(found),
+        unit="items",
+    )
+
+
+def bench_luhn(found, encoding, repeat=DEFAULT_BENCH_REPEAT):
+    """Benchmark 'luhn' over (filter, match) tuples, separators removed."""
+    digits = [filter_.substitute_regex.sub(b"", match) for filter_, match in found]
+
+    def run():
+        for value in digits:
+            luhn(value, encoding)
+
+    seconds = best_time(run, repeat)
+    return bench_result(
+        "luhn", seconds, sum(len(value) for value in digits), len(digits), unit="items"
+    )
+
+
+def worker_counts(workers):
+    """Return the worker counts to run bulk scans with: 1, 2, 4... workers."""
+    counts = []
+    count = 1
+    while count < workers:
+        counts.append(count)
+        count *= 2
+    counts.append(max(workers, 1))
+    return counts
+
+
+def corpus_files(directory, count, size, **line_kwargs):
+    """Write count synthetic files sharing size bytes to a directory.
+
+    Each file gets its own seed so the files differ.
+
+    :return: dict with the bytes and lines written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    seed = line_kwargs.pop("seed", DEFAULT_BENCH_SEED)
+    totals = {"bytes": 0, "lines": 0}
+    for i in range(count):
+        written = write_corpus(
+            os.path.join(directory, f"bulk_{i}.txt"),
+            size // count,
+            seed=seed + i + 1,
+            **line_kwargs,
+        )
+        totals["bytes"] += written["bytes"]
+        totals["lines"] += written["lines"]
+    return totals
@@ -0,0 +1,232 @@
+"""Cache of bulk scan results used to skip unchanged files."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+# Settings and CLI arguments which change how files are found or how
+# fast they are scanned, but not what is found in them.
+IGNORED_SETTINGS = {
+    "file_name",
+    "output_file",
+    "config_file",
+    "bulk",
+    "workers",
+    "schedule",
+    "include",
+    "exclude",
+    "max_depth",
+    "follow_symlinks",
+    "max_size",
+    "gzip_index",
+    "block_size",
+    "scan_engine",
+    "scan_mode",
+    "cache_file",
+    "force",
+    "prune",
+    "results_file",
+    "stats_file",
+}
+
+# Values of ignored settings which do change the results. Window mode
+# ignores lines and reports byte offsets with the line numbers.
+RESULT_SETTING_VALUES = {"scan_mode": {"window"}}
+
+# Number of files stored between commits.
+COMMIT_EVERY = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    config_hash TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    findings TEXT NOT NULL
+)
+"""
+
+
+def _file_digest(file_name):
+    """Return the sha256 of a file's contents, or None if it can't be read."""
+    try:
+        with open(file_name, "rb") as rf:
+            return hashlib.sha256(rf.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def config_hash(config):
+    """Return a hash of everything in a config that affects results.
+
+    :param config: Config returned by 'prep_config'.
+    """
+
+    def _relevant(settings):
+        return {
+            key: value
+            for key, value in (settings or {}).items()
+            if key not in IGNORED_SETTINGS
+            or value in RESULT_SETTING_VALUES.get(key, ())
+        }
+
+    allowlists = {
+        filter_dict["allowlist_file"]: _file_digest(filter_dict["allowlist_file"])
+        for filter_dict in config.get("filters") or []
+        if filter_dict.get("allowlist_file")
+    }
+
+    effective = {
+        "filters": config.get("filters"),
+        "allowlists": allowlists,
+        "settings": _relevant(config.get("settings")),
+        "cli_kwargs": _relevant(config.get("cli_kwargs")),
+    }
+    encoded = json.dumps(effective, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _identity(stat_result):
+    """Return the (size, mtime_ns, inode) of a stat result."""
+    return stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino
+
+
+class ScanCache:
+    """SQLite store of the summary and findings of scanned files.
+
+    A file is fresh (its cached results can be reported instead of
+    scanning it again) while its size, modification time and inode are
+    unchanged and it was scanned with the same filters and settings.
+
+    The connection can be shared between threads, every access holds
+    a lock.
+
+    :param db_file: Name of the SQLite database file.
+    :param config_hash: Hash of the config, see 'config_hash'.
+    :param force: Never treat files as fresh (results are still
+        stored for the next scan).
+    """
+
+    def __init__(self, db_file, config_hash, force=False):
+        self.config_hash = config_hash
+        self.force = force
+        self._lock = threading.Lock()
+        self._uncommitted = 0
+        # Identity of stale files when they were checked, so results
+        # are stored against the file as it was when it was scanned.
+        self._checked = {}
+
+        self._db = sqlite3.connect(db_file, check_same_thread=False)
+        self._db.execute(_SCHEMA)
+        self._db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Commit pending results and close the database."""
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+    def fresh(self, file_name):
+        """Return True if the cached results of file_name are current.
+
+        :param file_name: Absolute name of the file.
+        """
+        try:
+            identity = _identity(os.stat(file_name))
+        except OSError:
+            return False
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT size, mtime_ns, inode, config_hash FROM files WHERE path = ?",
+                (file_name,),
+            ).fetchone()
+
+        if (
+            not self.force
+            and row is not None
+            and tuple(row[:3]) == identity
+            and row[3] == self.config_hash
+        ):
+            return True
+
+        self._checked[file_name] = identity
+        return False
+
+    def get(self, file_name):
+        """Return the cached (summary, findings) of file_name.
+
+        findings is a list of (index, column, filter position, string)
+        tuples (followed by the offset in window mode), like the ones
+        returned by 'TxtFerret.scan_range'. The dedup keys of the
+        findings, if stored, are in summary["dedup_keys"].
+        """
+        with self._lock:
+            summary, findings = self._db.execute(
+                "SELECT summary, findings FROM files WHERE path = ?", (file_name,)
+            ).fetchone()
+        summary = json.loads(summary)
+        if summary.get("dedup_keys") is not None:
+            summary["dedup_keys"] = [
+                bytes.fromhex(key) for key in summary["dedup_keys"]
+            ]
+        return summary, [tuple(row) for row in json.loads(findings)]
+
+    def put(self, file_name, summary, findings, keys=None):
+        """Store the results of a file found stale by 'fresh'.
+
+        :param file_name: Absolute name of the file.
+        :param summary: dict returned by 'TxtFerret.summary'.
+        :param findings: List of (index, column, filter position,
+            string) tuples.
+        :param keys: Dedup key of each finding (see 'dedup_key'), so
+            the findings can be deduplicated across files when they are
+            reported again.
+        """
+        if keys is not None:
+            summary = {**summary, "dedup_keys": [key.hex() for key in keys]}
+
+        identity = self._checked.pop(file_name, None)
+        if identity is None:
+            try:
+                identity = _identity(os.stat(file_name))
+            except OSError:
+                return
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    file_name,
+                    *identity,
+                    self.config_hash,
+                    json.dumps(summary),
+                    json.dumps(findings),
+                ),
+            )
+            self._uncommitted += 1
+            if self._uncommitted >= COMMIT_EVERY:
+                self._db.commit()
+                self._uncommitted = 0
+
+    def prune(self):
+        """Remove the entries of files which no longer exist.
+
+        :return: Number of entries removed.
+        """
+        with self._lock:
+            paths = [row[0] for row in self._db.execute("SELECT path FROM files")]
+            removed = [(path,) for path in paths if not os.path.exists(path)]
+            self._db.executemany("DELETE FROM files WHERE path = ?", removed)
+            self._db.commit()
+        return len(removed)
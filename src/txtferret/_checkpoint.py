@@ -0,0 +1,106 @@
+"""Checkpoints recording how far the scan of a file got."""
+
+import hashlib
+import json
+import os
+import time
+
+from loguru import logger
+
+CHECKPOINT_SUFFIX = ".txfck"
+CHECKPOINT_VERSION = 1
+
+
+def checkpoint_file_name(file_name, checkpoint_dir=None):
+    """Return the name of the checkpoint file for a scanned file.
+
+    Checkpoints are written next to the scanned file unless a
+    checkpoint directory is given (ex: when the scanned files are in a
+    read-only directory like /var/log).
+
+    :param file_name: Name of the scanned file.
+    :param checkpoint_dir: Directory holding the checkpoints.
+    """
+    if not checkpoint_dir:
+        return f"{file_name}{CHECKPOINT_SUFFIX}"
+
+    # Files with the same name in different directories must not
+    # share a checkpoint.
+    path_hash = hashlib.sha1(os.path.abspath(file_name).encode()).hexdigest()[:12]
+    base_name = os.path.basename(file_name)
+    return os.path.join(checkpoint_dir, f"{base_name}-{path_hash}{CHECKPOINT_SUFFIX}")
+
+
+class Checkpointer:
+    """Tell when a scan is due for a checkpoint.
+
+    :param every_bytes: Bytes scanned between checkpoints.
+    :param every_seconds: Seconds between checkpoints.
+    :param offset: Offset the scan starts at.
+    """
+
+    def __init__(self, every_bytes=None, every_seconds=None, offset=0):
+        self.every_bytes = every_bytes
+        self.every_seconds = every_seconds
+        self.reset(offset)
+
+    def reset(self, offset):
+        """Record that a checkpoint was saved at offset."""
+        self.last_offset = offset
+        self.last_time = time.monotonic()
+
+    def due(self, offset):
+        """Return True if a checkpoint should be saved at offset."""
+        if self.every_bytes and offset - self.last_offset >= self.every_bytes:
+            return True
+        if self.every_seconds:
+            return time.monotonic() - self.last_time >= self.every_seconds
+        return False
+
+
+def file_identity(stat_result):
+    """Return the dict telling a file apart from a rotated one."""
+    return {"device": stat_result.st_dev, "inode": stat_result.st_ino}
+
+
+def save_checkpoint(checkpoint_name, state):
+    """Atomically write a checkpoint.
+
+    The checkpoint is written to a temporary file which then replaces
+    the previous checkpoint, so a crash never leaves a partial one.
+
+    :param checkpoint_name: Name of the checkpoint file.
+    :param state: dict of JSON serializable values.
+
+    :return: True if the checkpoint was written.
+    """
+    temp_name = f"{checkpoint_name}.tmp"
+    try:
+        with open(temp_name, "w") as wf:
+            json.dump({"version": CHECKPOINT_VERSION, **state}, wf)
+        os.replace(temp_name, checkpoint_name)
+    except OSError as e:
+        logger.info(f"Unable to write checkpoint '{checkpoint_name}' ({e}).")
+        return False
+    return True
+
+
+def load_checkpoint(checkpoint_name):
+    """Return the state saved in a checkpoint or None if missing."""
+    try:
+        with open(checkpoint_name, "r") as rf:
+            state = json.load(rf)
+    except (OSError, ValueError):
+        return None
+
+    if state.get("version") != CHECKPOINT_VERSION:
+        return None
+    return state
+
+
+def remove_checkpoint(checkpoint_name):
+    """Remove a checkpoint (ex: once the scan it belongs to is done)."""
+    try:
+        os.remove(checkpoint_name)
+    except FileNotFoundError:
+        pass
@@ -16,6 +16,7 @@ ALLOWED_FILTER_KEYS = {
     "substitute",
     "encoding",
     "exclude_patterns",
+    "allowlist_file",
 }
 
 # Keys allowed for the filter.tokenize values.
@@ -33,7 +34,34 @@ ALLOWED_SETTINGS_KEYS = {
     "show_matches",
     "delimiter",
     "ignore_columns",
+    "include_columns",
+    "file_format",
+    "csv_header",
+    "fixed_columns",
+    "record_length",
     "file_encoding",
+    "scan_engine",
+    "scan_mode",
+    "block_size",
+    "window_size",
+    "window_overlap",
+    "workers",
+    "gzip_index",
+    "include",
+    "exclude",
+    "max_depth",
+    "follow_symlinks",
+    "max_size",
+    "schedule",
+    "cache_file",
+    "checkpoint_dir",
+    "follow_interval",
+    "checkpoint_bytes",
+    "checkpoint_seconds",
+    "results_file",
+    "dedup",
+    "dedup_memory",
+    "stats_file",
 }
 
 
@@ -0,0 +1,93 @@
+"""Assemble CSV records, following quoted fields across lines."""
+
+import csv
+
+QUOTE = b'"'
+
+# Lines a quoted record may span before its quotes are assumed to be
+# unbalanced (ex: a stray quote) and its lines are split one by one.
+MAX_RECORD_LINES = 1000
+
+
+class CsvRecords:
+    """Turn the lines of a CSV file into records split into columns.
+
+    Most lines of a CSV file hold no quote character and are split on
+    the delimiter as they are. Only lines holding a quote are parsed
+    with the 'csv' module, joined with the lines after them until every
+    quote is closed (as in RFC 4180), so delimiters and newlines inside
+    quoted fields do not start a new column or record.
+
+    Bytes are decoded as latin-1 for the 'csv' module, which maps every
+    byte to one character, so the fields encode back to the exact bytes
+    of the file whatever its (ASCII compatible) encoding.
+
+    :param delimiter: The delimiter (one byte).
+    :param max_lines: Lines a record may span, see MAX_RECORD_LINES.
+    """
+
+    def __init__(self, delimiter=b",", max_lines=MAX_RECORD_LINES):
+        if len(delimiter) != 1:
+            raise ValueError("CSV files need a single character delimiter.")
+        self.delimiter = delimiter
+        self.max_lines = max_lines
+        self.clear()
+
+    def clear(self):
+        """Drop the record being assembled (ex: before the next file)."""
+        self.pending = []
+        self.start = None
+        self._quotes = 0
+
+    def split(self, line):
+        """Split a line without quotes into columns."""
+        return line.split(self.delimiter)
+
+    def feed(self, line, index):
+        """Add a line to the records.
+
+        :param line: One line of the file (bytes).
+        :param index: The line number.
+
+        :return: None if the line is a record without quotes (split it
+            with 'split'), else a list of (line number, columns) tuples
+            for the records completed by the line (if any).
+        """
+        if not self.pending:
+            if QUOTE not in line:
+                return None
+            self.start = index
+
+        self.pending.append(line)
+        self._quotes += line.count(QUOTE)
+
+        if self._quotes % 2:
+            if len(self.pending) < self.max_lines:
+                return []
+            return self.finish()
+
+        lines, start = self.pending, self.start
+        self.clear()
+        try:
+            return [(start, self.parse(b"".join(lines)))]
+        except csv.Error:
+            # Quotes inside unquoted fields, split the lines as they are.
+            return [(start + i, self.split(line)) for i, line in enumerate(lines)]
+
+    def finish(self):
+        """Return the lines of an unfinished record, split one by one.
+
+        :return: List of (line number, columns) tuples.
+        """
+        records = [
+            (self.start + i, self.split(line)) for i, line in enumerate(self.pending)
+        ]
+        self.clear()
+        return records
+
+    def parse(self, data):
+        """Return the columns of a complete record."""
+        text = data.decode("latin-1")
+        for row in csv.reader([text], delimiter=self.delimiter.decode("latin-1")):
+            return [field.encode("latin-1") for field in row]
+        return []
@@ -0,0 +1,132 @@
+"""Tell the first occurrence of a matched value apart from its repeats."""
+
+import hashlib
+import math
+
+from loguru import logger
+
+# Memory held per value by the exact set (a 16 byte digest as a bytes
+# object plus its slot in the set).
+ENTRY_BYTES = 100
+
+# False positive rate of the Bloom filter taking over from the exact
+# set, until it holds more values than it was sized for.
+DEFAULT_ERROR_RATE = 0.001
+
+
+def dedup_key(label, value):
+    """Return the digest identifying a value matched by a filter.
+
+    Digests are kept instead of the values, so matches are not held in
+    memory in clear text (or handed between processes).
+
+    :param label: Label of the filter which matched.
+    :param value: The matched bytes, normalized (ex: separators removed).
+    """
+    digest = hashlib.blake2b(label.encode(), digest_size=16)
+    digest.update(b"\0")
+    digest.update(value)
+    return digest.digest()
+
+
+class BloomFilter:
+    """Fixed size set of digests which may report false positives.
+
+    :param size: Number of bytes of the bit array.
+    :param error_rate: False positive rate once 'capacity' digests
+        are added. The number of hash functions is picked for it.
+
+    :attribute capacity: Number of digests the filter holds at
+        'error_rate'. The rate grows past it.
+    """
+
+    def __init__(self, size, error_rate=DEFAULT_ERROR_RATE):
+        self.bits = bytearray(max(size, 1))
+        self.size = len(self.bits) * 8
+        self.hashes = max(round(-math.log2(error_rate)), 1)
+        self.capacity = int(self.size * math.log(2) / self.hashes)
+
+    def _positions(self, key):
+        # Double hashing, the two halves of the digest are independent.
+        first = int.from_bytes(key[:8], "little")
+        second = int.from_bytes(key[8:16], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, key):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+    def add(self, key):
+        """Add a digest.
+
+        :return: True if the digest was not in the filter.
+        """
+        added = False
+        for position in self._positions(key):
+            byte, bit = position >> 3, 1 << (position & 7)
+            if not self.bits[byte] & bit:
+                self.bits[byte] |= bit
+                added = True
+        return added
+
+
+class Deduper:
+    """Remember the values seen so far in bounded memory.
+
+    Values are kept in an exact set until it holds 'max_bytes' of
+    digests, then in a Bloom filter of the same size. From then on a
+    value seen for the first time is taken for a repeat at
+    'error_rate', so it may go unreported.
+
+    :param max_bytes: Memory the seen values may take.
+    :param error_rate: False positive rate of the Bloom filter.
+    """
+
+    def __init__(self, max_bytes, error_rate=DEFAULT_ERROR_RATE):
+        self.max_bytes = max_bytes
+        self.error_rate = error_rate
+        self.keys = set()
+        self.bloom = None
+
+    def __contains__(self, key):
+        if self.bloom is not None:
+            return key in self.bloom
+        return key in self.keys
+
+    def known(self, key):
+        """Return True if a value was surely seen before.
+
+        Always False once the values are in the Bloom filter, which
+        may take a new value for a repeat.
+        """
+        return self.bloom is None and key in self.keys
+
+    def add(self, key):
+        """Record a value (see 'dedup_key').
+
+        :return: True if the value was not seen before.
+        """
+        if self.bloom is not None:
+            return self.bloom.add(key)
+
+        if key in self.keys:
+            return False
+        self.keys.add(key)
+
+        if len(self.keys) * ENTRY_BYTES >= self.max_bytes:
+            self._switch()
+        return True
+
+    def _switch(self):
+        """Move the seen values from the exact set to a Bloom filter."""
+        self.bloom = BloomFilter(self.max_bytes, self.error_rate)
+        for key in self.keys:
+            self.bloom.add(key)
+        logger.info(
+            f"Deduplicating more than {len(self.keys)} values, switching to a "
+            f"Bloom filter. About 1 in {round(1 / self.error_rate)} new values "
+            f"may be taken for repeats past {self.bloom.capacity} values."
+        )
+        self.keys = set()
@@ -9,6 +9,21 @@ DEFAULT_SUBSTITUTE = "[\W_]"
 DEFAULT_ENCODING = "utf-8"
 DEFAULT_MASK_VALUE = "XXXXXXXXXXXXXXX"
 DEFAULT_MASK_INDEX = 0
+DEFAULT_SCAN_ENGINE = "combined"
+DEFAULT_SCAN_MODE = "block"
+DEFAULT_FILE_FORMAT = "text"
+DEFAULT_BLOCK_SIZE = 8  # Megabytes
+DEFAULT_WINDOW_SIZE = 8  # Megabytes
+DEFAULT_WINDOW_OVERLAP = 4096  # Bytes
+DEFAULT_SCHEDULE = "size"
+DEFAULT_CHECKPOINT_SECONDS = 60
+DEFAULT_DEDUP_MEMORY = 64  # Megabytes
+
+SCAN_ENGINES = ("combined", "per_filter")
+SCAN_MODES = ("block", "line", "window")
+FILE_FORMATS = ("text", "csv")
+SCHEDULES = ("size", "stream")
+DEDUP_MODES = ("file", "run")
 
 LOG_HEADERS = "\t".join(
     [
@@ -21,6 +36,9 @@ LOG_HEADERS = "\t".join(
     ]
 )
 
+# Window mode findings add the offset of the match in the file.
+WINDOW_LOG_HEADERS = f"{LOG_HEADERS}\tbyte_offset"
+
 
 DEFAULT_YAML = """
 settings:
@@ -31,7 +49,34 @@ settings:
   show_matches: Yes
   delimiter:
   ignore_columns:
+  include_columns:
+  file_format: text
+  csv_header: No
+  fixed_columns:
+  record_length:
   file_encoding: 'utf-8'
+  scan_engine: combined
+  scan_mode: block
+  block_size: 8
+  window_size: 8
+  window_overlap:
+  workers: 1
+  gzip_index: No
+  include:
+  exclude:
+  max_depth:
+  follow_symlinks: No
+  max_size:
+  schedule: size
+  cache_file:
+  checkpoint_dir:
+  follow_interval: 1
+  checkpoint_bytes:
+  checkpoint_seconds:
+  results_file:
+  dedup: No
+  dedup_memory: 64
+  stats_file:
 
 filters:
   - label: american_express_15_ccn
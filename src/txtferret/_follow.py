@@ -0,0 +1,173 @@
+"""Scan the lines appended to growing files (ex: live logs)."""
+
+import os
+import time
+
+from loguru import logger
+
+from ._checkpoint import file_identity
+from ._default import LOG_HEADERS
+from ._reader import iter_blocks
+
+# Seconds between two checks of the followed files.
+DEFAULT_FOLLOW_INTERVAL = 1.0
+
+
+class FollowedFile:
+    """Scan the complete lines appended to a file since the last poll.
+
+    Only lines ending with a newline are scanned. A line still being
+    written is scanned once it is complete. The offset and line number
+    scanned up to are saved in the checkpoint of the file after each
+    poll holding new lines, so a restart carries on from there.
+
+    A file replaced by another (log rotation, the inode changes) is read
+    to its end, then the new file is followed from its start. A file
+    which shrinks (truncated in place) is followed from its start.
+
+    :param ferret: TxtFerret set up to scan the file, with resume set
+        so the checkpoint (if any) was loaded.
+    """
+
+    def __init__(self, ferret):
+        self.ferret = ferret
+        self.file_name = ferret.file_name
+        self.handle = None
+        self.stat_result = None
+        self.offset = 0
+        self.lines = 0
+
+        self._open()
+
+        checkpoint = ferret.checkpoint
+        if checkpoint is None or self.handle is None:
+            return
+
+        identity = file_identity(self.stat_result)
+        if (
+            all(checkpoint.get(key) == value for key, value in identity.items())
+            and checkpoint["offset"] <= self.stat_result.st_size
+        ):
+            self.offset = checkpoint["offset"]
+            self.lines = checkpoint["lines"]
+        else:
+            logger.info(
+                f"'{self.file_name}' was replaced since its checkpoint, "
+                f"following it from the start."
+            )
+
+    def _open(self):
+        """Open the file if it exists."""
+        try:
+            self.handle = open(self.file_name, "rb")
+        except FileNotFoundError:
+            self.handle = None
+            return
+        self.stat_result = os.fstat(self.handle.fileno())
+
+    def close(self):
+        """Close the file, saving the checkpoint."""
+        if self.handle is not None:
+            self.save()
+            self.handle.close()
+            self.handle = None
+
+    def save(self):
+        """Save the offset and line number scanned up to."""
+        self.ferret.save_checkpoint(self.offset, self.lines, self.stat_result)
+
+    def poll(self):
+        """Scan the lines appended since the last poll.
+
+        :return: Number of bytes scanned.
+        """
+        if self.handle is None:
+            self._open()
+            if self.handle is None:
+                return 0
+
+        scanned = self._read()
+
+        try:
+            stat_result = os.stat(self.file_name)
+        except FileNotFoundError:
+            # Rotated away and not created again yet.
+            stat_result = None
+
+        if stat_result is not None:
+            if file_identity(stat_result) != file_identity(self.stat_result):
+                # Whatever is left of the old file is complete by now.
+                scanned += self._read(final=True)
+                logger.info(f"'{self.file_name}' was rotated, following the new file.")
+                self.handle.close()
+                self._open()
+                self.offset = self.lines = 0
+                scanned += self._read()
+            elif stat_result.st_size < self.offset:
+                logger.info(
+                    f"'{self.file_name}' was truncated, following it from the start."
+                )
+                self.stat_result = stat_result
+                self.offset = self.lines = 0
+                scanned += self._read()
+
+        if scanned:
+            self.save()
+        return scanned
+
+    def _read(self, final=False):
+        """Scan the complete lines after the offset.
+
+        :param final: Also scan a last line missing its newline.
+
+        :return: Number of bytes scanned.
+        """
+        if self.handle is None:
+            return 0
+
+        scanned = 0
+        self.handle.seek(self.offset)
+        for block in iter_blocks(self.handle, self.ferret.block_size):
+            if not block.endswith(b"\n") and not final:
+                # The last line is still being written.
+                break
+            lines = self.ferret.scan_lines(block, self.lines)
+            if self.ferret.stats is not None:
+                self.ferret.stats.add_scanned(len(block), lines - self.lines)
+            self.lines = lines
+            self.offset += len(block)
+            scanned += len(block)
+        return scanned
+
+
+def follow(ferrets, interval=DEFAULT_FOLLOW_INTERVAL, stop=None):
+    """Follow files until interrupted (Ctrl-C) or stop returns True.
+
+    The files are checked every 'interval' seconds. Whatever was
+    appended in between is scanned in one go, so a busy log is scanned
+    in a few large blocks instead of line by line.
+
+    :param ferrets: List of TxtFerret objects, one per followed file.
+    :param interval: Seconds between two checks of the files.
+    :param stop: Function called before each check. Following stops
+        when it returns True.
+    """
+    followed = [FollowedFile(ferret) for ferret in ferrets]
+
+    for ferret in ferrets:
+        if ferret.fh is not None and not ferret.fh.tell():
+            ferret.fh.write(f"Following {ferret.file_name}\n")
+            ferret.fh.write(f"{LOG_HEADERS}\n")
+
+    try:
+        while stop is None or not stop():
+            for followed_file in followed:
+                followed_file.poll()
+                followed_file.ferret.flush_results()
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        logger.info("Stopped following.")
+    finally:
+        for followed_file in followed:
+            followed_file.close()
+            followed_file.ferret.close_output()
@@ -0,0 +1,137 @@
+"""Checkpoint index for splitting gzip files between processes.
+
+A gzip stream can only be inflated from the start of a gzip member
+('zlib' in the standard library cannot resume inflating at a bit
+offset inside a member), so the checkpoints in the index are member
+boundaries which also fall on a line boundary. Files written
+as many members (concatenated rotated logs, 'bgzip', 'pigz -i' or any
+tool compressing in independent blocks) get a checkpoint every 'span'
+bytes of inflated data. A file made of a single member only gets one
+checkpoint and is always scanned by one process.
+
+The index is stored as JSON next to the gzip file and is only reused
+while the size and modification time of the gzip file still match.
+"""
+
+import json
+import os
+
+from loguru import logger
+
+from ._reader import GzipBlockReader
+
+INDEX_SUFFIX = ".txfidx"
+INDEX_VERSION = 1
+
+# Inflated bytes between two checkpoints.
+DEFAULT_INDEX_SPAN = 64 * 1024 * 1024
+
+
+def index_file_name(file_name):
+    """Return the name of the index file for a gzip file."""
+    return f"{file_name}{INDEX_SUFFIX}"
+
+
+def _file_identity(file_name):
+    """Return the size and mtime used to tell if an index is stale."""
+    stat_result = os.stat(file_name)
+    return {"size": stat_result.st_size, "mtime_ns": stat_result.st_mtime_ns}
+
+
+def make_index(file_name, reader, span=DEFAULT_INDEX_SPAN):
+    """Return an index built from a GzipBlockReader.
+
+    :param file_name: Name of the gzip file.
+    :param reader: GzipBlockReader which read the whole file.
+    :param span: Minimum number of inflated bytes between checkpoints.
+    """
+    checkpoints = []
+    for compressed, inflated, lines in reader.members:
+        if checkpoints and inflated - checkpoints[-1][1] < span:
+            continue
+        checkpoints.append((compressed, inflated, lines))
+
+    return {
+        "version": INDEX_VERSION,
+        "span": span,
+        **_file_identity(file_name),
+        "inflated_size": reader.inflated,
+        "lines": reader.lines,
+        "checkpoints": checkpoints,
+    }
+
+
+def build_index(file_name, span=DEFAULT_INDEX_SPAN, chunk_size=None):
+    """Inflate a whole gzip file and return its checkpoint index.
+
+    :param file_name: Name of the gzip file.
+    :param span: Minimum number of inflated bytes between checkpoints.
+    :param chunk_size: Size of the inflated chunks.
+    """
+    kwargs = {} if chunk_size is None else {"chunk_size": chunk_size}
+    with GzipBlockReader(file_name, **kwargs) as reader:
+        while reader.read():
+            pass
+    return make_index(file_name, reader, span)
+
+
+def save_index(file_name, index):
+    """Write the index next to the gzip file.
+
+    :return: Name of the index file or None if it could not be written
+        (ex: read-only directory).
+    """
+    index_name = index_file_name(file_name)
+    try:
+        with open(index_name, "w") as wf:
+            json.dump(index, wf)
+    except OSError as e:
+        logger.info(f"Unable to write gzip index '{index_name}' ({e}).")
+        return None
+    return index_name
+
+
+def load_index(file_name):
+    """Return the index of a gzip file or None if missing or stale."""
+    try:
+        with open(index_file_name(file_name), "r") as rf:
+            index = json.load(rf)
+    except (OSError, ValueError):
+        return None
+
+    if index.get("version") != INDEX_VERSION:
+        return None
+
+    identity = _file_identity(file_name)
+    if any(index.get(key) != value for key, value in identity.items()):
+        logger.info(f"Ignoring stale gzip index for '{file_name}'.")
+        return None
+
+    return index
+
+
+def index_ranges(index, parts):
+    """Return compressed (start, end) ranges to scan in parallel.
+
+    The checkpoints are grouped into at most 'parts' ranges holding
+    roughly the same amount of inflated data.
+
+    :param index: Index returned by 'load_index' or 'build_index'.
+    :param parts: Number of ranges wanted.
+    """
+    checkpoints = index["checkpoints"]
+    size = index["size"]
+
+    if not checkpoints:
+        return []
+
+    cuts = [checkpoints[0][0]]
+    for part in range(1, parts):
+        target = index["inflated_size"] * part // parts
+        for compressed, inflated, _ in checkpoints:
+            if inflated >= target and compressed > cuts[-1]:
+                cuts.append(compressed)
+                break
+
+    cuts.append(size)
+    return [(start, end) for start, end in zip(cuts, cuts[1:]) if start < end]
@@ -0,0 +1,740 @@
+"""Compiled scan plans used to run every filter in a single pass."""
+
+import re
+
+from loguru import logger
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+# Patterns containing numbered/named back references cannot be merged
+# into one alternation as the group numbers shift once combined.
+_BACK_REFERENCE = re.compile(rb"\\[1-9]|\(\?P=")
+
+# Global inline flags (ex: '(?i)') are only allowed at the very start
+# of a pattern, so they cannot be merged into an alternation either.
+_GLOBAL_FLAGS = re.compile(rb"^\(\?[aiLmsux]+\)")
+
+_NAMED_GROUP = re.compile(rb"\(\?P<[^>]+>")
+
+
+def strip_groups(pattern):
+    """Return pattern with every capture group made non-capturing.
+
+    The 're' module only applies its literal prefix and alternative
+    skipping optimizations to alternatives which do not start with a
+    capture group, so the combined regex is built without them.
+
+    :param pattern: Regular expression as bytes.
+    """
+    stripped = bytearray()
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        char = pattern[i : i + 1]
+
+        if char == b"\\":
+            stripped += pattern[i : i + 2]
+            i += 2
+            continue
+
+        if in_class:
+            if char == b"]":
+                in_class = False
+        elif char == b"[":
+            in_class = True
+            # A ']' right after '[' or '[^' is a literal.
+            for prefix in (b"[^]", b"[]"):
+                if pattern.startswith(prefix, i):
+                    stripped += prefix
+                    i += len(prefix)
+                    break
+            else:
+                stripped += char
+                i += 1
+            continue
+        elif char == b"(":
+            named = _NAMED_GROUP.match(pattern, i)
+            if named:
+                stripped += b"(?:"
+                i = named.end()
+                continue
+            if pattern[i + 1 : i + 2] != b"?":
+                stripped += b"(?:"
+                i += 1
+                continue
+
+        stripped += char
+        i += 1
+
+    return bytes(stripped)
+
+
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT}
+if hasattr(sre_constants, "POSSESSIVE_REPEAT"):  # Python >= 3.11
+    _REPEATS.add(sre_constants.POSSESSIVE_REPEAT)
+
+_ATOMIC_GROUP = getattr(sre_constants, "ATOMIC_GROUP", None)
+
+# Word boundaries behave the same at the start of a line and after the
+# newline ending the previous line, so they are safe in block mode.
+_BOUNDARY_CODES = {sre_constants.AT_BOUNDARY, sre_constants.AT_NON_BOUNDARY}
+
+
+def _context_free(items, allow_boundaries=True):
+    """Return True if a parsed pattern never looks outside its match.
+
+    Anchors and look-arounds can see past the end of a line when a
+    pattern is searched over a whole block of lines instead of a
+    single line.
+    """
+    for op, av in items:
+        if op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            return False
+        if op is sre_constants.AT:
+            if not allow_boundaries or av not in _BOUNDARY_CODES:
+                return False
+        elif op is sre_constants.SUBPATTERN:
+            if not _context_free(av[-1], allow_boundaries):
+                return False
+        elif op is sre_constants.BRANCH:
+            for branch in av[1]:
+                if not _context_free(branch, allow_boundaries):
+                    return False
+        elif op in _REPEATS:
+            if not _context_free(av[2], allow_boundaries):
+                return False
+        elif op is _ATOMIC_GROUP:
+            if not _context_free(av, allow_boundaries):
+                return False
+        elif op is sre_constants.GROUPREF_EXISTS:
+            for branch in av[1:]:
+                if branch is not None and not _context_free(branch, allow_boundaries):
+                    return False
+    return True
+
+
+def block_safe(pattern, allow_boundaries=True):
+    """Return True if pattern can be searched across many lines.
+
+    A block safe pattern finds every match it would find in a single
+    line when it is searched over a block of lines instead, so block
+    hits can be used to locate the lines worth scanning.
+
+    :param pattern: Regular expression as bytes.
+    :param allow_boundaries: Set to False when the text is split into
+        columns by a delimiter which could be a word character.
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return False
+    return _context_free(parsed, allow_boundaries)
+
+
+# Largest number of prefixes kept for a filter and largest character
+# class expanded into prefixes (ex: '[1-5]').
+MAX_PREFIXES = 16
+MAX_CLASS_SIZE = 5
+
+DIGITS = b"0123456789"
+
+# Lines checked by the prefilter before deciding whether it pays off
+# and least share of them it must reject to stay on.
+PREFILTER_SAMPLE = 10000
+PREFILTER_MIN_REJECTED = 0.5
+
+
+def _class_bytes(items):
+    """Return the bytes matched by a character class or None.
+
+    None is returned for negated classes and classes holding anything
+    other than literals and ranges (ex: categories like '\\d').
+    """
+    matched = set()
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            matched.add(av)
+        elif op is sre_constants.RANGE:
+            matched.update(range(av[0], av[1] + 1))
+        else:
+            return None
+    return matched
+
+
+def _digit_class(items):
+    """Return True if a character class only matches ASCII digits."""
+    for op, av in items:
+        if op is sre_constants.CATEGORY:
+            if av is not sre_constants.CATEGORY_DIGIT:
+                return False
+        elif op is sre_constants.LITERAL:
+            if not 48 <= av <= 57:
+                return False
+        elif op is sre_constants.RANGE:
+            if not (48 <= av[0] and av[1] <= 57):
+                return False
+        else:
+            return False
+    return True
+
+
+def min_digits(items):
+    """Return the least number of digits any match of a pattern holds.
+
+    :param items: Parsed pattern (or part of one) from sre_parse.
+    """
+    count = 0
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            count += 48 <= av <= 57
+        elif op is sre_constants.IN:
+            count += _digit_class(av)
+        elif op is sre_constants.SUBPATTERN:
+            count += min_digits(av[-1])
+        elif op is sre_constants.BRANCH:
+            count += min(min_digits(branch) for branch in av[1])
+        elif op in _REPEATS:
+            count += av[0] * min_digits(av[2])
+        elif op is _ATOMIC_GROUP:
+            count += min_digits(av)
+    return count
+
+
+def _prefixes(items, ignore_case=False):
+    """Return the literal prefixes a match of a pattern starts with.
+
+    :param items: Parsed pattern (or part of one) from sre_parse.
+
+    :return: Tuple of (set of prefixes, complete). complete is True
+        if the prefixes are the whole match, so what follows the
+        pattern can be appended to them.
+    """
+    prefixes = {b""}
+
+    for op, av in items:
+        if op is sre_constants.AT:
+            # Zero width, the prefix carries on after it.
+            continue
+
+        if op is sre_constants.LITERAL and not ignore_case:
+            choices, complete = {bytes((av,))}, True
+        elif op is sre_constants.IN and not ignore_case:
+            matched = _class_bytes(av)
+            if not matched or len(matched) > MAX_CLASS_SIZE:
+                return prefixes, False
+            choices, complete = {bytes((byte,)) for byte in matched}, True
+        elif op is sre_constants.SUBPATTERN:
+            if av[1] or av[2]:
+                # Local flags (ex: '(?i:...)') change how literals match.
+                return prefixes, False
+            choices, complete = _prefixes(av[-1], ignore_case)
+        elif op is sre_constants.BRANCH:
+            choices, complete = set(), True
+            for branch in av[1]:
+                branch_prefixes, branch_complete = _prefixes(branch, ignore_case)
+                choices |= branch_prefixes
+                complete = complete and branch_complete
+        elif op in _REPEATS and av[0] >= 1:
+            choices, _ = _prefixes(av[2], ignore_case)
+            complete = False
+        else:
+            return prefixes, False
+
+        combined = {prefix + choice for prefix in prefixes for choice in choices}
+        if len(combined) > MAX_PREFIXES:
+            return prefixes, False
+        prefixes = combined
+
+        if not complete:
+            return prefixes, False
+
+    return prefixes, True
+
+
+def max_match_length(pattern):
+    """Return the length of the longest string a pattern can match.
+
+    Look-arounds are not counted, they only look at the text around a
+    match.
+
+    :param pattern: Regular expression as bytes.
+
+    :return: Number of bytes or None if matches can be of any length
+        (ex: '\\d+') or the pattern cannot be parsed.
+    """
+    try:
+        _, longest = sre_parse.parse(pattern).getwidth()
+    except re.error:
+        return None
+    if longest >= sre_constants.MAXREPEAT - 1:
+        return None
+    return longest
+
+
+def prefilter_requirements(pattern):
+    """Return cheap conditions every match of a pattern meets.
+
+    :param pattern: Regular expression as bytes.
+
+    :return: Tuple of (min_digits, prefixes). min_digits is the least
+        number of ASCII digits in a match. prefixes is a tuple of byte
+        strings, one of which starts every match, or None if they
+        cannot be worked out.
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return 0, None
+
+    ignore_case = bool(parsed.state.flags & re.IGNORECASE)
+
+    prefixes, _ = _prefixes(parsed, ignore_case)
+    if b"" in prefixes:
+        return min_digits(parsed), None
+
+    # Drop prefixes which start with another prefix, finding the
+    # shorter one is enough.
+    kept = tuple(
+        sorted(
+            prefix
+            for prefix in prefixes
+            if not any(
+                prefix != other and prefix.startswith(other) for other in prefixes
+            )
+        )
+    )
+    return min_digits(parsed), kept
+
+
+class Prefilter:
+    """Cheap checks skipping text no filter can match.
+
+    Counting digits with 'bytes.translate' and looking for literal
+    prefixes with 'in' is much cheaper than running a regex, so text
+    lacking the digits or the prefixes every match of a filter needs
+    is skipped before the filter regex runs. Filters without any
+    derived requirement always run.
+
+    Checking text costs about half as much as a regex search which
+    finds nothing, so it only pays off when most text is rejected (ex:
+    prose) and not on digit heavy text (ex: logs full of timestamps).
+    'check' keeps track of the lines it rejects and turns itself off
+    if too few of the first PREFILTER_SAMPLE lines were rejected.
+
+    :attribute min_digits: Least number of digits text needs for any
+        filter to match.
+    :attribute enabled: False if no filter has a requirement.
+    :attribute active: False once 'check' turned itself off.
+    """
+
+    def __init__(self, filters):
+        self.requirements = [
+            (
+                filter_,
+                getattr(filter_, "min_digits", 0),
+                getattr(filter_, "prefixes", None),
+            )
+            for filter_ in filters
+        ]
+        self.min_digits = min((digits for _, digits, _ in self.requirements), default=0)
+        self.enabled = any(
+            digits or prefixes for _, digits, prefixes in self.requirements
+        )
+        self.active = self.min_digits > 0
+        self.sampled = 0
+        self.rejected = 0
+
+    @staticmethod
+    def digits(data):
+        """Return the number of ASCII digits in data."""
+        return len(data) - len(data.translate(None, DIGITS))
+
+    def may_match(self, data):
+        """Return False if no filter can match anywhere in data."""
+        return self.digits(data) >= self.min_digits
+
+    def check(self, data):
+        """Return False if no filter can match data.
+
+        Used per line, the first PREFILTER_SAMPLE calls decide whether
+        the prefilter stays active.
+        """
+        possible = self.digits(data) >= self.min_digits
+
+        if self.sampled < PREFILTER_SAMPLE:
+            self.sampled += 1
+            self.rejected += not possible
+            if self.sampled == PREFILTER_SAMPLE:
+                self.active = self.rejected >= PREFILTER_MIN_REJECTED * self.sampled
+                if not self.active:
+                    logger.debug(
+                        f"Prefilter only rejected {self.rejected} of "
+                        f"{self.sampled} lines, turning it off."
+                    )
+        return possible
+
+    def filters_for(self, data):
+        """Return the filters which may match data, in order."""
+        digits = self.digits(data)
+        filters = []
+        for filter_, min_digits_, prefixes in self.requirements:
+            if digits < min_digits_:
+                continue
+            if prefixes is not None:
+                for prefix in prefixes:
+                    if prefix in data:
+                        break
+                else:
+                    continue
+            filters.append(filter_)
+        return filters
+
+
+def _group_name(position):
+    """Return the named group used for the filter at position."""
+    return f"filter_{position}"
+
+
+def combine_patterns(filters, named=False):
+    """Return one compiled alternation of all filter patterns.
+
+    :param filters: List of Filter objects.
+    :param named: Wrap each pattern in a named group so the owning
+        filter of a hit can be found with 'match.lastgroup'.
+
+    :return: Compiled regular expression or None if the patterns
+        cannot be safely combined.
+    """
+    if not filters:
+        return None
+
+    alternatives = []
+    for position, filter_ in enumerate(filters):
+        pattern = filter_.pattern
+        if _BACK_REFERENCE.search(pattern) or _GLOBAL_FLAGS.match(pattern):
+            return None
+        pattern = strip_groups(pattern)
+        if named:
+            name = _group_name(position).encode()
+            alternatives.append(b"(?P<" + name + b">" + pattern + b")")
+        else:
+            alternatives.append(b"(?:" + pattern + b")")
+
+    try:
+        return re.compile(b"|".join(alternatives))
+    except re.error as e:
+        logger.info(f"Unable to combine filter patterns ({e}).")
+        return None
+
+
+def combine_exclusions(patterns):
+    """Return exclude patterns compiled into as few regexes as possible.
+
+    Every pattern which can be combined goes into one alternation, so
+    a match is searched once whatever the number of patterns.
+
+    :param patterns: List of regular expressions as bytes.
+
+    :return: Tuple of (compiled alternation or None, list of compiled
+        patterns which cannot be combined, ex: using back references).
+    """
+    alternatives = []
+    separate = []
+    for pattern in patterns:
+        if _BACK_REFERENCE.search(pattern) or _GLOBAL_FLAGS.match(pattern):
+            separate.append(re.compile(pattern))
+        else:
+            alternatives.append(b"(?:" + strip_groups(pattern) + b")")
+
+    if not alternatives:
+        return None, separate
+
+    try:
+        return re.compile(b"|".join(alternatives)), separate
+    except re.error as e:
+        logger.info(f"Unable to combine exclude patterns ({e}).")
+        return None, [re.compile(pattern) for pattern in patterns]
+
+
+class ScanPlan:
+    """Run all filters over text with one pass of a combined regex.
+
+    The combined alternation locates the first candidate in the text.
+    Text without a candidate (the vast majority of lines in a file) is
+    rejected after that single pass. When a candidate is found, the
+    hit is dispatched to the filters starting at the candidate offset
+    so exclusions, sanity checks and masking see exactly the matches
+    the per-filter path would have produced, in the same order.
+
+    :attribute filters: List of Filter objects in config order.
+    :attribute regex: The combined regex or None when the filters
+        could not be combined (falls back to per-filter scanning).
+    :attribute combined: True if the combined engine is in use.
+    :attribute prefilter: Prefilter run before the regexes or None.
+    """
+
+    def __init__(self, filters, combined=True, prefilter=True):
+        self.filters = filters
+        self.regex = combine_patterns(filters) if combined else None
+        self.combined = self.regex is not None
+        self._owners = None
+
+        self.prefilter = Prefilter(filters) if prefilter else None
+        if self.prefilter is not None and not self.prefilter.enabled:
+            self.prefilter = None
+
+        if combined and not self.combined and filters:
+            logger.info(
+                "Filters could not be combined into a single regex. "
+                "Reverting to per-filter scanning."
+            )
+
+    def owner(self, data, pos):
+        """Return the Filter owning the combined match at data[pos]."""
+        if self._owners is None:
+            self._owners = combine_patterns(self.filters, named=True)
+        match = self._owners.match(data, pos)
+        if match is None:
+            return None
+        position = int(match.lastgroup.rsplit("_", 1)[1])
+        return self.filters[position]
+
+    def filters_for(self, data):
+        """Return the filters which may match data, in order."""
+        if self.prefilter is None:
+            return self.filters
+        return self.prefilter.filters_for(data)
+
+    def search(self, data, pos=0):
+        """Return the first combined match in data or None."""
+        return self.regex.search(data, pos)
+
+    def block_safe(self, allow_boundaries=True):
+        """Return True if every filter pattern is block safe."""
+        return all(
+            block_safe(filter_.pattern, allow_boundaries) for filter_ in self.filters
+        )
+
+    def candidate_lines(self, data, start=0, end=None):
+        """Yield (line_start, line_end) for lines which may match.
+
+        The filters are searched over the whole of data[start:end] and
+        only the lines holding a hit are yielded, each line including
+        its trailing newline. Scanning resumes after each yielded line.
+        Only use this when 'block_safe' is True.
+
+        :param data: bytes-like object holding complete lines.
+        :param start: Offset where the first line begins.
+        :param end: Offset just after the last line.
+        """
+        if end is None:
+            end = len(data)
+
+        if self.combined:
+            searches = [self.regex.search]
+        else:
+            searches = [filter_.regex.search for filter_ in self.filters]
+
+        # Next hit offset per search, kept until scanning passes it.
+        next_hits = [-1] * len(searches)
+
+        pos = start
+        while pos < end:
+            hit_start = end
+            for i, search in enumerate(searches):
+                if next_hits[i] is not None and next_hits[i] < pos:
+                    hit = search(data, pos, end)
+                    next_hits[i] = hit.start() if hit else None
+                if next_hits[i] is not None and next_hits[i] < hit_start:
+                    hit_start = next_hits[i]
+
+            if hit_start == end:
+                return
+
+            line_start = data.rfind(b"\n", pos, hit_start) + 1 or pos
+            line_end = data.find(b"\n", hit_start, end) + 1 or end
+
+            yield line_start, line_end
+
+            pos = line_end
+
+    def findall(self, data):
+        """Return a list of (filter, matches) tuples for data.
+
+        The result is identical to calling 'regex.findall' for each
+        filter in order and dropping filters without matches.
+
+        :param data: The bytes to scan.
+        """
+        if self.prefilter is not None and self.prefilter.active:
+            if not self.prefilter.check(data):
+                return []
+
+        start = 0
+
+        if self.combined:
+            hit = self.regex.search(data)
+            if hit is None:
+                return []
+            start = hit.start()
+
+        # Narrowing down the filters costs more than running a regex
+        # which finds nothing, so only do it once the text holds a hit.
+        filters = self.filters_for(data) if self.combined else self.filters
+
+        results = []
+        for filter_ in filters:
+            matches = filter_.regex.findall(data, start)
+            if matches:
+                results.append((filter_, matches))
+        return results
+
+
+class ColumnPlan:
+    """Split delimited lines once into the columns worth scanning.
+
+    The delimiter is resolved once. When only some columns are
+    included, lines are split up to the highest included column and
+    the rest of the line is never split (ex: 5 columns of a 300 column
+    feed).
+
+    :param delimiter: The delimiter (bytes).
+    :param include_columns: Set of column numbers (starting at 1) to
+        scan. Every column is scanned if empty.
+    :param ignore_columns: Set of column numbers (starting at 1) to
+        skip.
+
+    :attribute columns: Sorted indexes (starting at 0) of the included
+        columns or None if every column is scanned.
+    :attribute maxsplit: 'maxsplit' used to split lines.
+    """
+
+    def __init__(self, delimiter, include_columns=None, ignore_columns=None):
+        self.delimiter = delimiter
+        self.ignore = {column - 1 for column in ignore_columns or ()}
+        self.columns = None
+        self.maxsplit = -1
+
+        if include_columns:
+            self.columns = sorted(
+                column - 1
+                for column in include_columns
+                if column - 1 not in self.ignore
+            )
+            # The part after the last split is the rest of the line.
+            self.maxsplit = self.columns[-1] + 1 if self.columns else 0
+
+    def split(self, line):
+        """Return a list of (column index, column) tuples to scan."""
+        if self.columns is not None and not self.columns:
+            return []
+        return self.select(line.split(self.delimiter, self.maxsplit))
+
+    def select(self, columns):
+        """Return (column index, column) tuples to scan out of columns.
+
+        :param columns: List of all the columns of a line (or at least
+            up to the highest included column).
+        """
+        if self.columns is None:
+            ignore = self.ignore
+            return [(i, column) for i, column in enumerate(columns) if i not in ignore]
+        return [(i, columns[i]) for i in self.columns if i < len(columns)]
+
+    def hit_columns(self, line, search):
+        """Yield (column index, column) for the columns holding a hit.
+
+        Only the columns 'search' finds a hit in are cut out of the
+        line, and the line is not searched past the highest included
+        column. Only use this when the patterns searched for do not
+        depend on the text around a match (see 'block_safe'), so a
+        column holds a match only if searching the line finds a hit
+        in it.
+
+        :param line: The line (bytes).
+        :param search: Function taking (line, pos) and returning the
+            first match at or after pos or None.
+        """
+        if self.columns is not None and not self.columns:
+            return
+
+        delimiter = self.delimiter
+        wanted = set(self.columns) if self.columns is not None else None
+        last = self.columns[-1] if self.columns is not None else None
+
+        # Index and offset of the column where searching resumes.
+        index = 0
+        start = 0
+
+        while True:
+            hit = search(line, start)
+            if hit is None:
+                return
+
+            pos = hit.start()
+            skipped = line.count(delimiter, start, pos)
+            if skipped:
+                index += skipped
+                start = line.rfind(delimiter, start, pos) + len(delimiter)
+
+            if last is not None and index > last:
+                return
+
+            end = line.find(delimiter, start)
+            if end == -1:
+                end = len(line)
+
+            if wanted is None:
+                scan = index not in self.ignore
+            else:
+                scan = index in wanted
+            if scan:
+                yield index, line[start:end]
+
+            if end == len(line):
+                return
+            index += 1
+            start = end + len(delimiter)
+
+
+class FixedColumns:
+    """Cut the columns of fixed width records.
+
+    Columns are sliced out of a memoryview of the record, so they are
+    handed to the regexes without being copied. Bytes outside of every
+    column (ex: filler) are never scanned.
+
+    :param columns: List of (offset, width) pairs in column order.
+        Offsets start at 0 from the start of the record.
+    :param include_columns: Set of column numbers (starting at 1) to
+        scan. Every column is scanned if empty.
+    :param ignore_columns: Set of column numbers (starting at 1) to
+        skip.
+
+    :attribute spans: List of (column index, start, end) tuples of the
+        columns to scan.
+    """
+
+    def __init__(self, columns, include_columns=None, ignore_columns=None):
+        include = {column - 1 for column in include_columns or ()}
+        ignore = {column - 1 for column in ignore_columns or ()}
+        self.spans = [
+            (i, offset, offset + width)
+            for i, (offset, width) in enumerate(columns)
+            if i not in ignore and (not include or i in include)
+        ]
+
+    def slices(self, record):
+        """Return a list of (column index, column) tuples to scan.
+
+        :param record: The record (bytes-like). Columns past the end of
+            a short record are left out.
+        """
+        view = memoryview(record)
+        return [
+            (i, view[start:end]) for i, start, end in self.spans if start < len(view)
+        ]
@@ -0,0 +1,386 @@
+"""Readers which hand large blocks of a file to the scanner."""
+
+from contextlib import contextmanager
+import mmap
+import os
+import queue
+import stat
+import threading
+import zlib
+
+# Bytes copied at a time when counting newlines in a memory map.
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Tells zlib to expect (and check) a gzip header and trailer.
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def iter_blocks(file_handler, block_size, size=None):
+    """Yield blocks of bytes which always end on a newline.
+
+    Each block holds roughly block_size bytes. Whatever follows the
+    last newline in a read is carried over to the next block, so lines
+    are never split between blocks. The last block may not end with a
+    newline if the file does not.
+
+    :param file_handler: File object opened in binary mode.
+    :param block_size: Number of bytes to read at a time.
+    :param size: Stop after reading this many bytes. Reads until the
+        end of the file if None.
+    """
+    remainder = b""
+
+    while True:
+        if size is None:
+            data = file_handler.read(block_size)
+        else:
+            data = file_handler.read(min(block_size, size))
+            size -= len(data)
+
+        if not data:
+            if remainder:
+                yield remainder
+            return
+
+        cut = data.rfind(b"\n") + 1
+
+        if not cut:
+            # No newline in this read, keep reading until one shows up.
+            remainder += data
+            continue
+
+        yield remainder + data[:cut]
+        remainder = data[cut:]
+
+
+def iter_records(file_handler, record_length, block_size):
+    """Yield blocks of bytes holding whole fixed length records.
+
+    Each block holds roughly block_size bytes, rounded down to whole
+    records. Whatever follows the last whole record in a read is
+    carried over to the next block. The last block may end with a
+    partial record if the file does.
+
+    :param file_handler: File object opened in binary mode.
+    :param record_length: Number of bytes per record.
+    :param block_size: Number of bytes to read at a time.
+    """
+    block_size = max(block_size // record_length, 1) * record_length
+    remainder = b""
+
+    while True:
+        data = file_handler.read(block_size)
+
+        if not data:
+            if remainder:
+                yield remainder
+            return
+
+        data = remainder + data
+        cut = len(data) - len(data) % record_length
+        if cut:
+            yield data[:cut]
+        remainder = data[cut:]
+
+
+def iter_windows(file_handler, window_size, overlap, offset=0):
+    """Yield overlapping windows of bounded size over a file.
+
+    Lines are ignored, so memory stays bounded however long they are.
+    Each window owns a range of bytes, and the owned ranges follow each
+    other without gaps. A window holds up to 'overlap' bytes before
+    the bytes it owns (so look-behinds see them) and 'overlap' bytes
+    after them (owned by the next window). A match no longer than
+    'overlap' which starts in the owned bytes is whole in the window.
+
+    :param file_handler: File object opened in binary mode.
+    :param window_size: Number of bytes to read at a time.
+    :param overlap: Number of bytes shared with the next window.
+    :param offset: Offset in the file of the first byte read.
+
+    :return: Generator of (window, window_offset, start, end) tuples.
+        window_offset is the offset in the file of window[0], the
+        window owns window[start:end].
+    """
+    window = b""
+    start = 0
+
+    while True:
+        data = file_handler.read(window_size)
+
+        if not data:
+            if len(window) > start:
+                yield window, offset, start, len(window)
+            return
+
+        window += data
+        end = len(window) - overlap
+        if end <= start:
+            continue
+
+        yield window, offset, start, end
+
+        # Keep the end of the owned bytes before the next window.
+        keep = max(end - overlap, 0)
+        window = window[keep:]
+        offset += keep
+        start = end - keep
+
+
+def split_ranges(file_name, parts):
+    """Return newline aligned (start, end) byte ranges of a file.
+
+    The file is cut into roughly equal parts. Each cut is moved just
+    past the next newline so every range holds complete lines.
+
+    :param file_name: Name of the (uncompressed) file to split.
+    :param parts: Number of ranges wanted.
+    """
+    size = os.path.getsize(file_name)
+
+    cuts = [0]
+    with open(file_name, "rb") as rf:
+        for part in range(1, parts):
+            target = size * part // parts
+            if target <= cuts[-1]:
+                continue
+            rf.seek(target - 1)
+            # Reading a line from just before the target lands right
+            # after the first newline at or after the target.
+            rf.readline()
+            cut = rf.tell()
+            if cuts[-1] < cut < size:
+                cuts.append(cut)
+
+    cuts.append(size)
+    return [(start, end) for start, end in zip(cuts, cuts[1:]) if start < end]
+
+
+@contextmanager
+def open_mmap(file_name):
+    """Yield a read-only memory map of a file or None.
+
+    None is yielded for anything that cannot be mapped (empty files,
+    pipes, devices...) so the caller can fall back to buffered reads.
+    On platforms supporting it, the kernel is told the file will be
+    read sequentially so it can read ahead aggressively.
+
+    :param file_name: Name of the file to map.
+    """
+    with open(file_name, "rb") as rf:
+        try:
+            if not stat.S_ISREG(os.fstat(rf.fileno()).st_mode):
+                raise ValueError("Not a regular file.")
+            mapped = mmap.mmap(rf.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            yield None
+            return
+
+        with mapped:
+            if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            yield mapped
+
+
+class LineCounter:
+    """Work out line numbers for offsets in a buffer on demand.
+
+    Newlines are only counted up to the offsets asked for, so a file
+    without hits is never counted at all. Buffers without a 'count'
+    method (ex: mmap) are counted in chunks of chunk_size bytes.
+
+    :attribute index: The line number at 'offset'.
+    :attribute offset: The offset newlines have been counted up to.
+    """
+
+    def __init__(self, buffer, index=0, offset=0, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.buffer = buffer
+        self.index = index
+        self.offset = offset
+        self.chunk_size = chunk_size
+        self._count = getattr(buffer, "count", None)
+
+    def line_at(self, offset):
+        """Return the line number of the line holding offset.
+
+        Offsets must be asked for in increasing order.
+        """
+        if self._count is not None:
+            self.index += self._count(b"\n", self.offset, offset)
+        else:
+            for start in range(self.offset, offset, self.chunk_size):
+                end = min(start + self.chunk_size, offset)
+                self.index += self.buffer[start:end].count(b"\n")
+        self.offset = offset
+        return self.index
+
+
+class SkippingReader:
+    """Drop the first bytes read from a file object.
+
+    Used to resume a scan inside a gzip member, which can only be
+    inflated from its start.
+
+    :param file_handler: Object with a 'read' method.
+    :param size: Number of bytes to drop.
+    """
+
+    def __init__(self, file_handler, size):
+        self.file_handler = file_handler
+        self.remaining = size
+
+    def read(self, size=-1):
+        """Return the next bytes after the dropped ones."""
+        while self.remaining:
+            data = self.file_handler.read(size)
+            if len(data) <= self.remaining:
+                if not data:
+                    return data
+                self.remaining -= len(data)
+                continue
+            data = data[self.remaining :]
+            self.remaining = 0
+            return data
+        return self.file_handler.read(size)
+
+
+class GzipBlockReader:
+    """Inflate a gzip file on a background thread.
+
+    The producer thread reads the compressed file and inflates it
+    into chunks of at most chunk_size bytes with 'zlib', which releases
+    the GIL while inflating. Chunks are handed over through a bounded
+    queue so inflating and scanning overlap without unbounded memory.
+    Concatenated gzip members (ex: rotated logs joined together) are
+    read one after the other, like 'gzip.open' does.
+
+    Use as a context manager. 'read' returns the next inflated chunk
+    and b"" at the end of the file.
+
+    :param file_name: Name of the gzip file.
+    :param chunk_size: Maximum size of the inflated chunks.
+    :param queue_size: Number of chunks allowed to wait in the queue.
+    :param start: Compressed offset to start at. Must be the start of
+        a gzip member.
+    :param end: Compressed offset to stop at. Must be the end of a
+        gzip member or None for the end of the file.
+
+    :attribute members: List of (compressed_offset, inflated_offset,
+        lines) tuples, one for the start of each gzip member which also
+        starts a new line. Offsets and line counts are relative to
+        'start' (compressed offsets are absolute).
+    :attribute inflated: Number of bytes inflated so far.
+    :attribute lines: Number of newlines inflated so far.
+    """
+
+    def __init__(
+        self,
+        file_name,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        queue_size=4,
+        start=0,
+        end=None,
+    ):
+        self.file_name = file_name
+        self.chunk_size = chunk_size
+        self.start = start
+        self.end = end
+        self.members = []
+        self.inflated = 0
+        self.lines = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._done = False
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def read(self, size=-1):
+        """Return the next inflated chunk (size is ignored)."""
+        if self._done:
+            return b""
+
+        item = self._queue.get()
+
+        if item is None:
+            self._done = True
+            return b""
+        if isinstance(item, Exception):
+            self._done = True
+            raise item
+        return item
+
+    def _put(self, item):
+        """Queue an item unless the reader is being closed."""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _produce(self):
+        """Read, inflate and queue chunks until the end of the file."""
+        try:
+            with open(self.file_name, "rb") as rf:
+                rf.seek(self.start)
+                remaining = None if self.end is None else self.end - self.start
+
+                read_offset = self.start
+                line_start = True
+
+                decompressor = None
+                data = b""
+
+                while not self._stop.is_set():
+                    if not data:
+                        size = self.chunk_size
+                        if remaining is not None:
+                            size = min(size, remaining)
+                            remaining -= size
+                        data = rf.read(size)
+                        read_offset += len(data)
+                        if not data:
+                            break
+
+                    if decompressor is None:
+                        # Skip the zero padding allowed after a member
+                        # (as gzip.open does) before the next one.
+                        data = data.lstrip(b"\0")
+                        if not data:
+                            continue
+                        # Another gzip member starts here.
+                        decompressor = zlib.decompressobj(GZIP_WBITS)
+                        if line_start:
+                            self.members.append(
+                                (read_offset - len(data), self.inflated, self.lines)
+                            )
+
+                    chunk = decompressor.decompress(data, self.chunk_size)
+                    data = decompressor.unconsumed_tail
+
+                    if chunk:
+                        self.inflated += len(chunk)
+                        self.lines += chunk.count(b"\n")
+                        line_start = chunk.endswith(b"\n")
+                        self._put(chunk)
+
+                    if decompressor.eof:
+                        data = decompressor.unused_data + data
+                        decompressor = None
+
+                if decompressor is not None and not self._stop.is_set():
+                    raise EOFError(
+                        "Compressed file ended before the end-of-stream "
+                        "marker was reached"
+                    )
+        except Exception as e:
+            self._put(e)
+        else:
+            self._put(None)
@@ -1,4 +1,73 @@
-"""Module to hold sanity check functions."""
+"""Module to hold sanity check functions.
+
+Sanity checks are found by name in 'sanity_mapping' (one candidate at a
+time) and 'batch_sanity_mapping' (a list of candidates at a time).
+Other packages can add sanity checks by calling 'register' or with an
+entry point in the 'txtferret.sanity' group, ex in their setup.py:
+
+    entry_points={
+        "txtferret.sanity": ["my_check = my_package.checks:my_check_batch"],
+    }
+
+The entry point must load a batch check: a function taking
+(candidates, encoding), where candidates is a list of bytes left over
+after the filter's substitute was removed, and returning a list of
+bools. Entry points are only loaded when a filter uses a sanity check
+which is not built in.
+"""
+
+from functools import lru_cache
+
+from loguru import logger
+
+ENTRY_POINT_GROUP = "txtferret.sanity"
+
+DIGITS = b"0123456789"
+
+# Translation tables turning ASCII digits into their values, and into
+# the luhn value of the doubled digit (the digit doubled, less 9 if
+# that is over 9).
+_VALUES = bytes.maketrans(DIGITS, bytes(range(10)))
+_DOUBLED = bytes.maketrans(DIGITS, bytes((0, 2, 4, 6, 8, 1, 3, 5, 7, 9)))
+
+
+@lru_cache(maxsize=None)
+def _ascii_digits(encoding):
+    """Return True if digits are encoded as ASCII bytes in encoding."""
+    try:
+        return "0123456789".encode(encoding) == DIGITS
+    except LookupError:
+        return False
+
+
+def _to_ascii(data, encoding=None):
+    """Return data as ASCII bytes.
+
+    :raises UnicodeError: data holds non ASCII characters.
+    """
+    if isinstance(data, str):
+        return data.encode("ascii")
+    if encoding and not _ascii_digits(encoding):
+        return data.decode(encoding).encode("ascii")
+    return data
+
+
+def _to_digits(data, encoding=None):
+    """Return data as ASCII digit bytes.
+
+    :raises ValueError: data holds something other than digits.
+    """
+    data = _to_ascii(data, encoding)
+    if data.translate(None, DIGITS):
+        raise ValueError("Luhn algorithm input must convert to int.")
+    return data
+
+
+def _luhn_sum_ok(digits):
+    """Return True if ASCII digit bytes pass the Luhn test."""
+    evens = sum(digits[-1::-2].translate(_VALUES))
+    odds = sum(digits[-2::-2].translate(_DOUBLED))
+    return (evens + odds) % 10 == 0
 
 
 def luhn(account_string, _encoding):
@@ -9,6 +78,9 @@ def luhn(account_string, _encoding):
 
     https[:]//en[dot]wikipedia[dot]org/wiki/Luhn_algorithm
 
+    The digits are turned into their values (and doubled values) with
+    'bytes.translate' tables, so no int is created per digit.
+
     :param account_string: The string of digits to be tested by the
         luhn algorithm.
     :param encoding: Encoding of the string to be tested.
@@ -18,33 +90,261 @@ def luhn(account_string, _encoding):
     :return: True or False depending on if account_string passes Luhn
         test.
     """
+    try:
+        digits = _to_digits(account_string, _encoding)
+    except UnicodeError:
+        raise ValueError("Luhn algorithm input must convert to int.")
+    return _luhn_sum_ok(digits)
+
+
+def luhn_batch(candidates, _encoding=None):
+    """Return a list of bools, True for each candidate passing Luhn.
+
+    Candidates holding something other than digits fail instead of
+    raising ValueError like 'luhn' does.
+
+    :param candidates: List of bytes (or str) to be tested.
+    :param _encoding: Encoding of the candidates.
+    """
+    ascii_digits = not _encoding or _ascii_digits(_encoding)
+
+    results = []
+    append = results.append
+    for candidate in candidates:
+        if ascii_digits and isinstance(candidate, bytes):
+            # Fast path for the usual case, the checks of '_to_digits'
+            # and '_luhn_sum_ok' inlined.
+            if candidate.translate(None, DIGITS):
+                append(False)
+                continue
+            evens = sum(candidate[-1::-2].translate(_VALUES))
+            odds = sum(candidate[-2::-2].translate(_DOUBLED))
+            append((evens + odds) % 10 == 0)
+            continue
+
+        try:
+            digits = _to_digits(candidate, _encoding)
+        except ValueError:
+            append(False)
+            continue
+        append(_luhn_sum_ok(digits))
+    return results
+
+
+def _is_digits(data, length):
+    """Return True if data is 'length' ASCII digits."""
+    return len(data) == length and not data.translate(None, DIGITS)
+
+
+def _batch(check):
+    """Return a batch sanity check running 'check' on ASCII bytes.
+
+    Candidates which are not ASCII fail.
+    """
+
+    def batch_check(candidates, _encoding=None):
+        results = []
+        for candidate in candidates:
+            try:
+                data = _to_ascii(candidate, _encoding)
+            except UnicodeError:
+                results.append(False)
+                continue
+            results.append(check(data))
+        return results
+
+    return batch_check
+
+
+def _single(batch_check):
+    """Return a single candidate sanity check built on a batch one."""
+
+    def check(data, _encoding=None):
+        return bool(batch_check([data], _encoding)[0])
+
+    return check
+
+
+# Length of the IBANs of each country. IBANs of countries missing here
+# only need 15 to 34 characters.
+# fmt: off
+IBAN_LENGTHS = {
+    b"AD": 24, b"AE": 23, b"AL": 28, b"AT": 20, b"AZ": 28, b"BA": 20,
+    b"BE": 16, b"BG": 22, b"BH": 22, b"BR": 29, b"BY": 28, b"CH": 21,
+    b"CR": 22, b"CY": 28, b"CZ": 24, b"DE": 22, b"DK": 18, b"DO": 28,
+    b"EE": 20, b"EG": 29, b"ES": 24, b"FI": 18, b"FO": 18, b"FR": 27,
+    b"GB": 22, b"GE": 22, b"GI": 23, b"GL": 18, b"GR": 27, b"GT": 28,
+    b"HR": 21, b"HU": 28, b"IE": 22, b"IL": 23, b"IQ": 23, b"IS": 26,
+    b"IT": 27, b"JO": 30, b"KW": 30, b"KZ": 20, b"LB": 28, b"LC": 32,
+    b"LI": 21, b"LT": 20, b"LU": 20, b"LV": 21, b"MC": 27, b"MD": 24,
+    b"ME": 22, b"MK": 19, b"MR": 27, b"MT": 31, b"MU": 30, b"NL": 18,
+    b"NO": 15, b"PK": 24, b"PL": 28, b"PS": 29, b"PT": 25, b"QA": 29,
+    b"RO": 24, b"RS": 22, b"SA": 24, b"SC": 31, b"SE": 24, b"SI": 19,
+    b"SK": 24, b"SM": 27, b"ST": 25, b"SV": 28, b"TL": 23, b"TN": 24,
+    b"TR": 26, b"UA": 29, b"VA": 22, b"VG": 24, b"XK": 20,
+}
+# fmt: on
+
+_UPPER = b"ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+_ALPHANUMERIC = DIGITS + _UPPER
+
+# Digits each IBAN character stands for in the mod 97 check, by byte.
+_IBAN_DIGITS = ["" for _ in range(256)]
+for _value, _byte in enumerate(_ALPHANUMERIC):
+    _IBAN_DIGITS[_byte] = str(_value)
+
+
+def _iban_ok(data):
+    """Return True if ASCII bytes are a valid IBAN (ISO 13616)."""
+    data = data.upper()
+    country = data[:2]
+    length = IBAN_LENGTHS.get(country)
+    if length is None:
+        if not 15 <= len(data) <= 34:
+            return False
+    elif len(data) != length:
+        return False
+
+    if (
+        country.translate(None, _UPPER)
+        or data[2:4].translate(None, DIGITS)
+        or data.translate(None, _ALPHANUMERIC)
+    ):
+        return False
+
+    # Move the country and check digits to the end, turn letters into
+    # numbers (A = 10, ..., Z = 35) and check the remainder of 97.
+    rearranged = data[4:] + data[:4]
+    return int("".join([_IBAN_DIGITS[byte] for byte in rearranged])) % 97 == 1
+
+
+# Routing numbers start with 00-12 (banks), 21-32 (thrift
+# institutions), 61-72 (electronic transactions) or 80 (travelers
+# checks).
+_ABA_PREFIXES = frozenset(
+    f"{prefix:02}".encode()
+    for prefix in (*range(0, 13), *range(21, 33), *range(61, 73), 80)
+)
+
+
+def _aba_ok(data):
+    """Return True if ASCII bytes are a valid ABA routing number."""
+    if not _is_digits(data, 9) or data[:2] not in _ABA_PREFIXES:
+        return False
+    values = data.translate(_VALUES)
+    checksum = 3 * sum(values[0::3]) + 7 * sum(values[1::3]) + sum(values[2::3])
+    return checksum % 10 == 0
+
+
+def _ssn_ok(data):
+    """Return True if ASCII bytes could be a US social security number.
+
+    SSNs are never issued with area 000, 666 or 900-999, group 00 or
+    serial 0000.
+    """
+    return (
+        _is_digits(data, 9)
+        and data[:3] not in (b"000", b"666")
+        and data[:1] != b"9"
+        and data[3:5] != b"00"
+        and data[5:] != b"0000"
+    )
+
+
+def _npi_ok(data):
+    """Return True if ASCII bytes are a valid US National Provider ID.
+
+    NPIs are 10 digits starting with 1 or 2, checked with Luhn after
+    prefixing the '80840' health industry prefix.
+    """
+    return (
+        _is_digits(data, 10)
+        and data[:1] in (b"1", b"2")
+        and _luhn_sum_ok(b"80840" + data)
+    )
+
+
+iban_batch = _batch(_iban_ok)
+aba_batch = _batch(_aba_ok)
+ssn_batch = _batch(_ssn_ok)
+npi_batch = _batch(_npi_ok)
+
+iban = _single(iban_batch)
+aba = _single(aba_batch)
+ssn = _single(ssn_batch)
+npi = _single(npi_batch)
+
+
+# Mapping used in 'sanity_check' function. Use 'register' to add
+# sanity checks.
+sanity_mapping = {"luhn": luhn, "iban": iban, "aba": aba, "ssn": ssn, "npi": npi}
 
-    # TODO - Is there a more effecient way to do this?
-    if not isinstance(account_string, str):
-        account_string = account_string.decode(_encoding)
+# Sanity checks which validate a list of candidates in one call. Checks
+# missing here are run on each candidate by 'sanity_check_batch'.
+batch_sanity_mapping = {
+    "luhn": luhn_batch,
+    "iban": iban_batch,
+    "aba": aba_batch,
+    "ssn": ssn_batch,
+    "npi": npi_batch,
+}
 
-    # no_special_chars = re.sub("[\W_]", "", account_string)
+_plugins_loaded = False
 
+
+def register(name, batch_check, check=None):
+    """Register a sanity check so filters can use it by name.
+
+    :param name: Name used in the 'sanity' of filters.
+    :param batch_check: Function taking (candidates, encoding) and
+        returning a list of bools, one per candidate.
+    :param check: Function taking (data, encoding) and returning a
+        bool. Built on batch_check if missing.
+    """
+    batch_sanity_mapping[name] = batch_check
+    sanity_mapping[name] = check or _single(batch_check)
+
+
+def _iter_entry_points(group):
+    """Return the entry points of installed packages in group."""
     try:
-        # doubled_tuple:
-        # Note that each number is the index doubled, OR it is the
-        # difference of the index doubled and 9. This is required
-        # as part of the luhn calculations.
-        doubled_tuple = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
-        evens = sum(int(even_num) for even_num in account_string[-1::-2])
-        odds = sum(doubled_tuple[int(odd_num)] for odd_num in account_string[-2::-2])
-    except ValueError:
-        raise ValueError("Luhn algorithm input must convert to int.")
-    except Exception:
-        print(account_string)
-        raise
-    else:
-        return (evens + odds) % 10 == 0
+        from importlib import metadata
+    except ImportError:  # Python < 3.8
+        try:
+            import pkg_resources
+        except ImportError:
+            return []
+        return list(pkg_resources.iter_entry_points(group))
+
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, "select"):  # Python >= 3.10
+        return list(entry_points.select(group=group))
+    return list(entry_points.get(group, []))
+
 
+def load_plugins():
+    """Register the sanity checks of installed packages, once.
 
-# Mapping used in 'sanity_check' function. Future sanity checks need
-# to be added to this map.
-sanity_mapping = {"luhn": luhn}
+    Built in sanity checks are not replaced.
+    """
+    global _plugins_loaded
+    if _plugins_loaded:
+        return
+    _plugins_loaded = True
+
+    for entry_point in _iter_entry_points(ENTRY_POINT_GROUP):
+        if entry_point.name in sanity_mapping:
+            logger.info(
+                f"Sanity check '{entry_point.name}' already exists, "
+                f"ignoring the one from {entry_point.value}."
+            )
+            continue
+        try:
+            batch_check = entry_point.load()
+        except Exception as e:
+            logger.info(f"Unable to load sanity check '{entry_point.name}' ({e}).")
+            continue
+        register(entry_point.name, batch_check)
 
 
 def sanity_check(sanity_check_name, data, encoding=None, sanity_map=None):
@@ -61,9 +361,43 @@ def sanity_check(sanity_check_name, data, encoding=None, sanity_map=None):
     :return: True or False depending on if the data passes sanity check.
     """
     _sanity_mapping = sanity_map or sanity_mapping
+    if _sanity_mapping is sanity_mapping and sanity_check_name not in sanity_mapping:
+        load_plugins()
     try:
         _sanity_algorithm = _sanity_mapping[sanity_check_name]
     except KeyError:
         raise ValueError(f"Sanity algorithm {sanity_check_name} does not exist.")
     else:
         return _sanity_algorithm(data, encoding)
+
+
+def sanity_check_batch(
+    sanity_check_name, candidates, encoding=None, sanity_map=None, batch_map=None
+):
+    """Return a list of bools, whether each candidate passed the check.
+
+    :param sanity_check_name: Name of the sanity check to be
+        performed. (Ex: 'luhn')
+    :param candidates: List of data to be validated by the check.
+    :param encoding: Encoding of the data to be tested.
+    :param sanity_map: Map of sanity checks. Mostly here for tests.
+    :param batch_map: Map of batch sanity checks. Mostly here for tests.
+
+    :raises ValueError: Sanity check does not exist.
+    """
+    # Custom sanity checks (ex: in tests) have no batch version unless
+    # one is given.
+    _batch_mapping = batch_map or ({} if sanity_map else batch_sanity_mapping)
+    if _batch_mapping is batch_sanity_mapping:
+        if sanity_check_name not in batch_sanity_mapping:
+            load_plugins()
+    try:
+        _batch_algorithm = _batch_mapping[sanity_check_name]
+    except KeyError:
+        return [
+            sanity_check(
+                sanity_check_name, candidate, encoding=encoding, sanity_map=sanity_map
+            )
+            for candidate in candidates
+        ]
+    return _batch_algorithm(candidates, encoding)
@@ -0,0 +1,115 @@
+"""Size-aware scheduling of bulk scans across worker processes."""
+
+import heapq
+
+# Files smaller than this are batched together into a single task.
+SMALL_FILE_SIZE = 1024 * 1024
+
+# Bytes of small files batched into one task.
+BATCH_SIZE = 8 * 1024 * 1024
+
+# Files are never split into ranges smaller than this.
+MIN_SPLIT_SIZE = 64 * 1024 * 1024
+
+# Cost (in bytes scanned) of opening and setting up a file, so batches
+# of many empty files are not treated as free.
+FILE_COST = 64 * 1024
+
+
+class Task:
+    """Files and ranges of files scanned by one worker in one go.
+
+    :attribute items: List of (file_name, start, end) tuples. start and
+        end are None when the whole file is scanned.
+    :attribute cost: Predicted cost of the task in bytes.
+    """
+
+    def __init__(self, items=None, cost=0):
+        self.items = items or []
+        self.cost = cost
+
+    def add(self, file_name, size, start=None, end=None):
+        """Add a file or range of a file to the task."""
+        self.items.append((file_name, start, end))
+        self.cost += size + FILE_COST
+
+    def __repr__(self):
+        return f"Task(items={self.items!r}, cost={self.cost})"
+
+
+def plan_tasks(
+    files,
+    workers,
+    splitter=None,
+    small_file_size=SMALL_FILE_SIZE,
+    batch_size=BATCH_SIZE,
+    min_split_size=MIN_SPLIT_SIZE,
+):
+    """Return the tasks of a bulk scan, most expensive first.
+
+    Handing the largest tasks out first (longest processing time
+    first) keeps a large file found late from running on its own
+    after every other worker is done. Files larger than an even share
+    of the work are split into ranges when 'splitter' can split them,
+    and small files are batched so each task is worth sending to a
+    worker.
+
+    :param files: Iterable of (file_name, size) tuples.
+    :param workers: Number of worker processes.
+    :param splitter: Function taking a file name and a number of parts
+        and returning a list of (start, end) ranges, or an empty list
+        if the file cannot be split.
+    :param small_file_size: Files smaller than this are batched.
+    :param batch_size: Bytes of small files batched into one task.
+    :param min_split_size: Smallest range a file is split into.
+    """
+    files = list(files)
+    total = sum(size for _, size in files)
+
+    share = max(total // max(workers, 1), min_split_size)
+
+    tasks = []
+    batch = Task()
+
+    for file_name, size in files:
+        if splitter is not None and workers > 1 and size > share:
+            ranges = splitter(file_name, min(-(-size // share), workers))
+            if len(ranges) > 1:
+                for start, end in ranges:
+                    task = Task()
+                    task.add(file_name, end - start, start, end)
+                    tasks.append(task)
+                continue
+
+        if size >= small_file_size:
+            task = Task()
+            task.add(file_name, size)
+            tasks.append(task)
+            continue
+
+        batch.add(file_name, size)
+        if batch.cost >= batch_size:
+            tasks.append(batch)
+            batch = Task()
+
+    if batch.items:
+        tasks.append(batch)
+
+    tasks.sort(key=lambda task: task.cost, reverse=True)
+    return tasks
+
+
+def worker_loads(costs, workers):
+    """Return the total cost given to each worker.
+
+    Tasks are handed out in order to whichever worker is free first,
+    like a process pool does.
+
+    :param costs: Iterable of task costs, in the order handed out.
+    :param workers: Number of worker processes.
+    """
+    loads = [0] * max(workers, 1)
+    heapq.heapify(loads)
+    for cost in costs:
+        heapq.heappush(loads, heapq.heappop(loads) + cost)
+    return sorted(loads, reverse=True)
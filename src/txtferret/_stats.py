@@ -0,0 +1,231 @@
+"""Record where a scan spends its time, filter by filter."""
+
+import json
+from time import perf_counter
+
+# Steps of the scan timed per filter, as '<step>_seconds'.
+TIMED_STEPS = ("regex", "exclude", "sanity", "output")
+
+# Counted per filter:
+# - calls: lines (or columns, blocks...) the filter's regex ran over.
+# - bytes: bytes the filter's regex ran over.
+# - candidates: matches of the filter's regex.
+# - excluded: candidates dropped by the allowlist or exclude patterns.
+# - checked: candidates run through the sanity checks.
+# - reported: findings masked and written (or collected).
+FILTER_COUNTERS = ("calls", "bytes", "candidates", "excluded", "checked", "reported")
+
+
+def new_filter_stats():
+    """Return the stats of a filter before scanning."""
+    stats = {f"{step}_seconds": 0.0 for step in TIMED_STEPS}
+    stats.update(dict.fromkeys(FILTER_COUNTERS, 0))
+    return stats
+
+
+def new_scan_stats():
+    """Return the stats of a scan before scanning (see 'ScanStats')."""
+    return {"bytes": 0, "lines": 0, "search_seconds": 0.0, "filters": {}}
+
+
+def add_stats(totals, stats):
+    """Add the stats of a scan to totals (ex: the stats of many files).
+
+    :param totals: dict returned by 'new_scan_stats', updated in place.
+    :param stats: dict returned by 'ScanStats.as_dict' or None.
+    """
+    if not stats:
+        return
+    for key in ("bytes", "lines", "search_seconds"):
+        totals[key] += stats.get(key, 0)
+    for label, filter_stats in stats.get("filters", {}).items():
+        entry = totals["filters"].get(label)
+        if entry is None:
+            entry = totals["filters"][label] = new_filter_stats()
+        for key, value in filter_stats.items():
+            entry[key] = entry.get(key, 0) + value
+
+
+def round_stats(stats):
+    """Return stats with the seconds rounded to microseconds."""
+    return {
+        **stats,
+        "search_seconds": round(stats["search_seconds"], 6),
+        "filters": {
+            label: {
+                key: round(value, 6) if key.endswith("_seconds") else value
+                for key, value in filter_stats.items()
+            }
+            for label, filter_stats in stats["filters"].items()
+        },
+    }
+
+
+def write_stats(file_name, total, files=None):
+    """Write the stats of a run to a JSON file.
+
+    :param file_name: Name of the JSON file.
+    :param total: Stats of every file added together.
+    :param files: dict of file name to the stats of the file.
+    """
+    report = {"total": round_stats(total)}
+    if files is not None:
+        report["files"] = {
+            name: round_stats(stats) for name, stats in sorted(files.items())
+        }
+    with open(file_name, "w") as wf:
+        json.dump(report, wf, indent=2)
+        wf.write("\n")
+
+
+class ScanStats:
+    """Time spent per filter in each step of a scan, and counts.
+
+    Only turned on when asked for: the filters and steps of the scan
+    are wrapped by 'TxtFerret' to record them, scans without stats run
+    unwrapped.
+
+    :attribute stats: dict of the bytes and lines scanned,
+        'search_seconds' (the time the combined regex, shared by every
+        filter, spent finding the lines or columns holding a hit) and
+        'filters', a dict of filter label to dict of '<step>_seconds'
+        (see TIMED_STEPS) and FILTER_COUNTERS.
+    """
+
+    def __init__(self):
+        self.stats = new_scan_stats()
+
+    def reset(self):
+        """Zero the stats (ex: before the next file).
+
+        The dicts are kept, the wrappers recording to them hold them.
+        """
+        for entry in [self.stats, *self.stats["filters"].values()]:
+            for key, value in entry.items():
+                if key != "filters":
+                    entry[key] = type(value)()
+
+    def filter(self, label):
+        """Return the dict recording the stats of a filter."""
+        entry = self.stats["filters"].get(label)
+        if entry is None:
+            entry = self.stats["filters"][label] = new_filter_stats()
+        return entry
+
+    def add_scanned(self, bytes_, lines):
+        """Add to the bytes and lines scanned."""
+        self.stats["bytes"] += bytes_
+        self.stats["lines"] += lines
+
+    def add(self, stats):
+        """Add stats returned by 'as_dict' (ex: by another process)."""
+        add_stats(self.stats, stats)
+
+    def as_dict(self):
+        """Return the stats as a JSON serializable dict."""
+        return {
+            **self.stats,
+            "filters": {
+                label: dict(entry) for label, entry in self.stats["filters"].items()
+            },
+        }
+
+
+class TimedRegex:
+    """Compiled regex recording the time spent in it.
+
+    :param regex: The compiled regex.
+    :param entry: dict the time is added to.
+    :param key: Key of entry the time is added to.
+    :param count: Also count the calls, bytes and matches (see
+        FILTER_COUNTERS) in entry.
+    """
+
+    def __init__(self, regex, entry, key="regex_seconds", count=True):
+        self.regex = regex
+        self.entry = entry
+        self.key = key
+        self.count = count
+
+    def __getattr__(self, name):
+        return getattr(self.regex, name)
+
+    def _ran(self, string, pos, endpos=None):
+        if self.count:
+            self.entry["calls"] += 1
+            self.entry["bytes"] += (len(string) if endpos is None else endpos) - pos
+
+    def search(self, string, pos=0, *args):
+        start = perf_counter()
+        match = self.regex.search(string, pos, *args)
+        self.entry[self.key] += perf_counter() - start
+        self._ran(string, pos, *args)
+        return match
+
+    def match(self, string, pos=0, *args):
+        start = perf_counter()
+        match = self.regex.match(string, pos, *args)
+        self.entry[self.key] += perf_counter() - start
+        return match
+
+    def findall(self, string, pos=0, *args):
+        start = perf_counter()
+        matches = self.regex.findall(string, pos, *args)
+        self.entry[self.key] += perf_counter() - start
+        self._ran(string, pos, *args)
+        if self.count:
+            self.entry["candidates"] += len(matches)
+        return matches
+
+    def finditer(self, string, pos=0, *args):
+        self._ran(string, pos, *args)
+        matches = self.regex.finditer(string, pos, *args)
+        while True:
+            start = perf_counter()
+            match = next(matches, None)
+            self.entry[self.key] += perf_counter() - start
+            if match is None:
+                return
+            if self.count:
+                self.entry["candidates"] += 1
+            yield match
+
+
+def timed_excluded(excluded, entry):
+    """Wrap 'Filter.excluded' to record its time and exclusions."""
+
+    def wrapper(match):
+        start = perf_counter()
+        result = excluded(match)
+        entry["exclude_seconds"] += perf_counter() - start
+        entry["excluded"] += result
+        return result
+
+    return wrapper
+
+
+def timed_sanity(sanity_test_batch, stats):
+    """Wrap 'sanity_test_batch' to record its time per filter."""
+
+    def wrapper(filter_, texts, **kwargs):
+        start = perf_counter()
+        passed = sanity_test_batch(filter_, texts, **kwargs)
+        entry = stats.filter(filter_.label)
+        entry["sanity_seconds"] += perf_counter() - start
+        entry["checked"] += len(texts)
+        return passed
+
+    return wrapper
+
+
+def timed_output(handle_match, stats):
+    """Wrap 'TxtFerret._handle_match' to record masking and output."""
+
+    def wrapper(filter_, *args, **kwargs):
+        start = perf_counter()
+        handle_match(filter_, *args, **kwargs)
+        entry = stats.filter(filter_.label)
+        entry["output_seconds"] += perf_counter() - start
+        entry["reported"] += 1
+
+    return wrapper
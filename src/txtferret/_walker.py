@@ -0,0 +1,127 @@
+"""Lazily walk directory trees for bulk scans."""
+
+from fnmatch import fnmatch
+import os
+
+from loguru import logger
+
+from ._checkpoint import CHECKPOINT_SUFFIX
+from ._gzindex import INDEX_SUFFIX
+
+
+def _matches(patterns, name, relative_path):
+    """Return True if a glob in patterns matches the entry.
+
+    Globs holding a '/' are matched against the path relative to the
+    top directory, others against the file or directory name only.
+    """
+    for pattern in patterns:
+        if fnmatch(relative_path if "/" in pattern else name, pattern):
+            return True
+    return False
+
+
+def walk_files(
+    directory,
+    include=None,
+    exclude=None,
+    max_depth=None,
+    follow_symlinks=False,
+    max_size=None,
+    with_size=False,
+):
+    """Yield the absolute names of the files under a directory.
+
+    Directories are read with 'os.scandir' one at a time as the names
+    are consumed, so scanning can start right away and memory does not
+    grow with the number of files in the tree. Gzip index and
+    checkpoint files are always skipped.
+
+    :param directory: Top directory to walk.
+    :param include: List of globs. Only files matching one are yielded.
+    :param exclude: List of globs. Matching files are skipped and
+        matching directories are not walked.
+    :param max_depth: Number of directory levels to walk below the top
+        directory. 0 only yields files in the top directory. None walks
+        the whole tree.
+    :param follow_symlinks: Follow symlinks to files and directories.
+        Symlinks are skipped otherwise.
+    :param max_size: Skip files larger than this many bytes.
+    :param with_size: Yield (file_name, size) tuples instead of names.
+    """
+    include = include or []
+    exclude = exclude or []
+
+    # Directories left to walk as (path, relative path, depth). Used as
+    # a stack so only the directories along the current branch (and
+    # their siblings) are held in memory.
+    pending = [(directory, "", 0)]
+
+    # Directories already walked, to avoid symlink loops.
+    visited = set()
+
+    while pending:
+        path, relative_dir, depth = pending.pop()
+
+        if follow_symlinks:
+            try:
+                stat_result = os.stat(path)
+            except OSError as e:
+                logger.info(f"Unable to read directory '{path}' ({e}).")
+                continue
+            identity = (stat_result.st_dev, stat_result.st_ino)
+            if identity in visited:
+                continue
+            visited.add(identity)
+
+        try:
+            entries = os.scandir(path)
+        except OSError as e:
+            logger.info(f"Unable to read directory '{path}' ({e}).")
+            continue
+
+        sub_directories = []
+
+        with entries:
+            for entry in entries:
+                relative_path = f"{relative_dir}{entry.name}"
+
+                if exclude and _matches(exclude, entry.name, relative_path):
+                    continue
+
+                try:
+                    if entry.is_symlink() and not follow_symlinks:
+                        continue
+
+                    if entry.is_dir(follow_symlinks=follow_symlinks):
+                        if max_depth is None or depth < max_depth:
+                            sub_directories.append(
+                                (entry.path, f"{relative_path}/", depth + 1)
+                            )
+                        continue
+
+                    if not entry.is_file(follow_symlinks=follow_symlinks):
+                        continue
+
+                    if entry.name.endswith((INDEX_SUFFIX, CHECKPOINT_SUFFIX)):
+                        continue
+
+                    if include and not _matches(include, entry.name, relative_path):
+                        continue
+
+                    size = None
+                    if max_size is not None or with_size:
+                        size = entry.stat(follow_symlinks=follow_symlinks).st_size
+                    if max_size is not None and size > max_size:
+                        continue
+                except OSError as e:
+                    logger.info(f"Unable to read '{entry.path}' ({e}).")
+                    continue
+
+                if with_size:
+                    yield os.path.abspath(entry.path), size
+                else:
+                    yield os.path.abspath(entry.path)
+
+        # Walk sub directories in the order they were listed.
+        pending.extend(reversed(sub_directories))
@@ -0,0 +1,137 @@
+"""Write findings to the results from a background thread."""
+
+from datetime import datetime
+import queue
+import threading
+
+from loguru import logger
+
+# Findings collected before they are handed to the writer thread.
+WRITE_BATCH = 1000
+
+# Batches waiting to be written before scanning waits for the writer.
+MAX_PENDING_BATCHES = 64
+
+_STOP = object()
+
+
+def format_finding(
+    date_time, file_name, label, index, column, string_, column_names=None, offset=None
+):
+    """Return the results line of a finding (see LOG_HEADERS).
+
+    :param date_time: Time the finding was written, as a string.
+    :param file_name: Name of the scanned file.
+    :param label: Label of the filter which matched.
+    :param index: The line number (starting at 0).
+    :param column: Column number (starting at 0) or None.
+    :param string_: The (masked) string that matched the filter.
+    :param column_names: Column names read from a header. The name of
+        the column is added after its number.
+    :param offset: Offset of the match in the file, added as a last
+        column (see WINDOW_LOG_HEADERS).
+    """
+    _column = "N/A" if column is None else str(column + 1)
+    if column_names and column is not None and column < len(column_names):
+        _column = f"{_column} ({column_names[column]})"
+    fields = [date_time, file_name, label, str(index + 1), _column, string_]
+    if offset is not None:
+        fields.append(str(offset))
+    return "\t".join(fields)
+
+
+class ResultWriter:
+    """Format and write findings from a background thread.
+
+    Findings are handed over in batches of (file_name, label, index,
+    column, string) records, optionally followed by the column names
+    of the file and the offset of the match, so scanning only pays for
+    appending a tuple to a list per finding. Every finding written in
+    one go gets the same timestamp.
+
+    The thread is started with the first batch, a file without
+    findings never starts one. Errors raised while writing (ex: disk
+    full) are raised again by the next call to 'write', 'flush' or
+    'close'.
+
+    :param file_handler: File to write the findings to. Findings are
+        logged (ex: to stdout) if None.
+    :param max_pending: Batches waiting to be written before 'write'
+        blocks.
+    """
+
+    def __init__(self, file_handler=None, max_pending=MAX_PENDING_BATCHES):
+        self.file_handler = file_handler
+        self._queue = queue.Queue(max_pending)
+        self._thread = None
+        self._error = None
+
+    def write(self, records):
+        """Hand a list of records over to the writer thread."""
+        self._raise_error()
+        if not records:
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._queue.put(records)
+
+    def flush(self):
+        """Wait until every record handed over is written."""
+        if self._thread is not None:
+            self._queue.join()
+        self._raise_error()
+        if self.file_handler is not None:
+            self.file_handler.flush()
+
+    def close(self):
+        """Write the records handed over and stop the writer thread."""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+        self._raise_error()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _run(self):
+        """Write batches until stopped, taking whatever is waiting."""
+        while True:
+            batches = [self._queue.get()]
+            while True:
+                try:
+                    batches.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = batches[-1] is _STOP
+            if stop:
+                batches.pop()
+
+            try:
+                if batches and self._error is None:
+                    self._write(batches)
+            except Exception as e:
+                # Keep taking batches so nothing waits on the queue.
+                self._error = e
+            finally:
+                for _ in range(len(batches) + stop):
+                    self._queue.task_done()
+
+            if stop:
+                return
+
+    def _write(self, batches):
+        date_time = datetime.now().ctime()
+        lines = [
+            format_finding(date_time, *record) for batch in batches for record in batch
+        ]
+        if self.file_handler is None:
+            for line in lines:
+                logger.info(line)
+            return
+        self.file_handler.write("\n".join(lines))
+        self.file_handler.write("\n")
@@ -1,17 +1,66 @@
 """Handle CLI tool configuration and commands."""
 
-import copy
 from datetime import datetime
+import json
 import multiprocessing as mp
+import os
 import pathlib
+import platform
 import sys
+import tempfile
 
 import click
 from loguru import logger
 
+from ._bench import (
+    DEFAULT_BENCH_FILES,
+    DEFAULT_BENCH_REPEAT,
+    DEFAULT_BENCH_SEED,
+    DEFAULT_BENCH_SIZE,
+    DEFAULT_HIT_DENSITY,
+    DEFAULT_LINE_LENGTH,
+    DEFAULT_VALID_RATIO,
+    bench_get_column_map,
+    bench_luhn,
+    bench_result,
+    bench_sanity_test,
+    best_time,
+    candidates,
+    corpus_files,
+    generate_lines,
+    worker_counts,
+    write_corpus,
+)
+from ._cache import ScanCache, config_hash
 from ._config import load_config, save_config
-from .core import TxtFerret
-from ._default import LOG_HEADERS
+from ._dedup import Deduper
+from ._follow import DEFAULT_FOLLOW_INTERVAL, follow
+from ._gzindex import DEFAULT_INDEX_SPAN, build_index, save_index
+from ._schedule import plan_tasks, worker_loads
+from ._stats import add_stats, new_scan_stats, write_stats
+from ._walker import walk_files
+from ._writer import ResultWriter
+from .core import (
+    Filter,
+    TxtFerret,
+    add_counts,
+    count_rows,
+    file_ranges,
+    gzipped_file_check,
+    merge_findings,
+)
+from ._default import (
+    DEDUP_MODES,
+    DEFAULT_DEDUP_MEMORY,
+    DEFAULT_ENCODING,
+    DEFAULT_SCHEDULE,
+    FILE_FORMATS,
+    LOG_HEADERS,
+    SCAN_ENGINES,
+    SCAN_MODES,
+    SCHEDULES,
+    WINDOW_LOG_HEADERS,
+)
 
 
 def set_logger(**cli_kwargs):
@@ -71,11 +120,570 @@ def bootstrap(config, test_class=None):
     return ferret.summary()
 
 
-def get_files_from_dir(directory=None):
-    """Return list of absolute file names."""
-    path = pathlib.Path(directory)
-    file_names = [str(item.resolve()) for item in path.iterdir() if item.is_file()]
-    return file_names
+# Settings controlling which files a bulk scan picks up.
+WALK_SETTINGS = ("include", "exclude", "max_depth", "follow_symlinks", "max_size")
+
+
+def walk_options(config):
+    """Return keyword arguments for 'walk_files'.
+
+    CLI arguments override the settings from the config file when
+    they are given.
+
+    :param config: Config returned by 'prep_config'.
+    """
+    settings = config.get("settings") or {}
+    cli_kwargs = config["cli_kwargs"]
+
+    options = {}
+    for setting in WALK_SETTINGS:
+        value = cli_kwargs.get(setting)
+        if value is None or value == () or value is False:
+            value = settings.get(setting)
+        options[setting] = value
+
+    for setting in ("include", "exclude"):
+        globs = options[setting] or []
+        if isinstance(globs, str):
+            globs = [globs]
+        options[setting] = list(globs)
+
+    if options["max_depth"] is not None:
+        options["max_depth"] = int(options["max_depth"])
+
+    options["follow_symlinks"] = bool(options["follow_symlinks"])
+
+    if options["max_size"] is not None:
+        options["max_size"] = int(options["max_size"]) * 1024 * 1024
+
+    return options
+
+
+def get_files_from_dir(directory=None, **walk_kwargs):
+    """Return a generator of absolute file names under directory.
+
+    :param walk_kwargs: Options passed on to 'walk_files'.
+    """
+    return walk_files(str(pathlib.Path(directory)), **walk_kwargs)
+
+
+# State of a bulk scan worker process, set by 'init_worker'.
+_worker_config = None
+_worker_class = None
+_worker_ferret = None
+_worker_record = False
+_worker_collect = False
+
+
+def init_worker(config, test_class=None, record=False, collect=False):
+    """Initialize a bulk scan worker process.
+
+    The config is sent once per process instead of once per file.
+
+    :param config: Config returned by 'prep_config'.
+    :param test_class: Used to pass a TxtFerret stub for testing.
+    :param record: Return the findings of each file with its summary
+        (to store them in the scan cache).
+    :param collect: Return the findings of each file with its summary
+        instead of writing them (for the combined results file or to
+        deduplicate them across files).
+    """
+    global _worker_config, _worker_class, _worker_ferret, _worker_record
+    global _worker_collect
+
+    cli_kwargs = {**config["cli_kwargs"]}
+    # Files are already spread across processes.
+    cli_kwargs["workers"] = 1
+
+    if collect:
+        # The main process writes the findings to the results file.
+        cli_kwargs["output_file"] = None
+        cli_kwargs["resume"] = False
+        # The main process deduplicates the findings across files.
+        if dedup_settings(config)[0] == "run":
+            cli_kwargs["dedup"] = "file"
+
+    _worker_config = {**config, "cli_kwargs": cli_kwargs}
+    _worker_class = test_class or TxtFerret
+    _worker_ferret = None
+    _worker_record = record
+    _worker_collect = collect
+
+
+def _get_worker_ferret(file_name, open_output=True):
+    """Return the worker's TxtFerret set up for file_name.
+
+    The TxtFerret object (and its compiled filters) is built for the
+    first file the process scans and reused for every file after it.
+    """
+    global _worker_ferret
+
+    if _worker_ferret is None:
+        config = {
+            **_worker_config,
+            "cli_kwargs": {**_worker_config["cli_kwargs"], "file_name": file_name},
+        }
+        _worker_ferret = _worker_class(config)
+        if open_output:
+            return _worker_ferret
+
+    _worker_ferret.set_file(file_name, open_output=open_output)
+    return _worker_ferret
+
+
+def scan_worker_file(file_name):
+    """Scan a file in a bulk scan worker process and return summary.
+
+    :param file_name: The name of the file to scan.
+    """
+    ferret = _get_worker_ferret(file_name)
+
+    if _worker_collect:
+        ferret.findings = []
+    elif _worker_record:
+        ferret.found = []
+
+    ferret.scan_file()
+    result = ferret.summary()
+
+    if _worker_collect:
+        result["findings"] = ferret.findings
+        if ferret.deduper is not None:
+            result["dedup_keys"] = ferret.finding_keys
+    elif _worker_record:
+        result["findings"] = ferret.found
+    return result
+
+
+def scan_worker_task(items):
+    """Scan the files and ranges of a task in a worker process.
+
+    :param items: List of (file_name, start, end) tuples. start and end
+        are None to scan the whole file.
+
+    :return: List of (item, result, seconds) tuples. result is the
+        file summary for whole files and the 'scan_range' result for
+        ranges.
+    """
+    results = []
+    for file_name, start, end in items:
+        started = datetime.now()
+        if start is None:
+            result = scan_worker_file(file_name)
+        else:
+            ferret = _get_worker_ferret(file_name, open_output=False)
+            result = ferret.scan_range(start, end)
+        seconds = (datetime.now() - started).total_seconds()
+        results.append(((file_name, start, end), result, seconds))
+    return results
+
+
+def collect_results(
+    config,
+    task_results,
+    split_files=None,
+    cache=None,
+    test_class=None,
+    writer=None,
+    run_deduper=None,
+):
+    """Return file summaries and the time spent scanning.
+
+    The ranges of split files are held until every range of the file
+    is back, then written in order.
+
+    :param config: Config returned by 'prep_config'.
+    :param task_results: Iterable of 'scan_worker_task' results.
+    :param split_files: dict of file name to the number of ranges the
+        file was split into.
+    :param cache: ScanCache to store the results in, if any. Workers
+        must have been initialized with record=True.
+    :param test_class: Used to pass a TxtFerret stub for testing.
+    :param writer: ResultWriter of the combined results file, if any.
+        Workers must have been initialized with collect=True.
+    :param run_deduper: Deduper holding the values seen in the run,
+        when deduplicating across files. Made here if None.
+
+    When deduplicating across files ('run' dedup), workers must have
+    been initialized with collect=True and only the first occurrence
+    of each value in the run is written.
+
+    :return: Tuple of (list of file summaries, seconds spent scanning
+        by all workers).
+    """
+    ferret_class = test_class or TxtFerret
+    split_files = split_files or {}
+    labels = filter_labels(config)
+
+    dedup, dedup_memory = dedup_settings(config)
+    # Values seen in every file of the run. Workers only deduplicate
+    # the files they scan.
+    if run_deduper is None and dedup == "run":
+        run_deduper = Deduper(dedup_memory)
+    ferret = None
+
+    results = []
+    ranges = {}
+    busy_seconds = 0
+
+    for task_result in task_results:
+        for (file_name, start, _), result, seconds in task_result:
+            busy_seconds += seconds
+
+            if start is None:
+                findings = result.pop("findings", None)
+                keys = result.pop("dedup_keys", None)
+                if cache is not None:
+                    cache.put(file_name, result, findings, keys)
+                if writer is not None:
+                    if run_deduper is not None:
+                        findings, result["unique"] = dedup_findings(
+                            run_deduper, findings, keys, labels
+                        )
+                    write_findings(
+                        writer, file_name, findings, labels, result.get("column_names")
+                    )
+                elif run_deduper is not None:
+                    # Workers collected the findings, write the results
+                    # file of the file here.
+                    if ferret is None:
+                        ferret = ferret_class(file_config(config, file_name))
+                        ferret.deduper = run_deduper
+                    else:
+                        ferret.set_file(file_name)
+                    ferret.column_names = result.get("column_names")
+                    ferret.scan_file(
+                        range_results=[
+                            {
+                                **result,
+                                "findings": findings,
+                                "dedup_keys": keys,
+                                "lines": 0,
+                            }
+                        ]
+                    )
+                    result = ferret.summary()
+                results.append(result)
+                continue
+
+            received = ranges.setdefault(file_name, [])
+            received.append((start, result))
+            if len(received) < split_files[file_name]:
+                continue
+
+            range_results = [result for _, result in sorted(ranges.pop(file_name))]
+
+            if writer is not None:
+                summary = {
+                    "file_name": file_name,
+                    "failures": 0,
+                    "passes": 0,
+                    "time": int(sum(result["time"] for result in range_results)),
+                }
+                findings = []
+                keys = []
+                counts = {}
+                for result in merge_findings(range_results):
+                    summary["failures"] += result["failures"]
+                    summary["passes"] += result["passes"]
+                    add_counts(counts, result.get("counts"))
+                    findings.extend(result["findings"])
+                    keys.extend(result.get("dedup_keys") or [])
+                summary["counts"] = count_rows(counts)
+                stats = get_stats(range_results)
+                if stats is not None:
+                    summary["stats"] = stats
+                if cache is not None:
+                    # Deduplicated again when they are reported again.
+                    cache.put(file_name, summary, findings, keys if dedup else None)
+                if dedup is not None:
+                    # The same value may show up in several ranges.
+                    findings, summary["unique"] = dedup_findings(
+                        run_deduper or Deduper(dedup_memory), findings, keys, labels
+                    )
+                write_findings(writer, file_name, findings, labels)
+                results.append(summary)
+                continue
+
+            range_ferret = ferret_class(file_config(config, file_name))
+            if run_deduper is not None:
+                range_ferret.deduper = run_deduper
+            range_ferret.scan_file(range_results=range_results)
+            results.append(range_ferret.summary())
+            if cache is not None:
+                # The findings of every range, deduplicated again when
+                # they are reported again.
+                findings, keys = [], []
+                for result in merge_findings(range_results):
+                    findings.extend(result["findings"])
+                    keys.extend(result.get("dedup_keys") or [])
+                cache.put(file_name, results[-1], findings, keys if dedup else None)
+
+    return results, busy_seconds
+
+
+def file_config(config, file_name):
+    """Return the config to write the results of one file."""
+    return {
+        **config,
+        "cli_kwargs": {**config["cli_kwargs"], "file_name": file_name, "workers": 1},
+    }
+
+
+def filter_labels(config):
+    """Return the label of each filter in the config, in order."""
+    return [filter_.get("label", "NOT_DEFINED") for filter_ in config["filters"]]
+
+
+def dedup_settings(config):
+    """Return the dedup mode and the bytes the values seen may take.
+
+    The mode is None when every occurrence is reported. CLI arguments
+    override the settings from the config file when they are given.
+
+    :param config: Config returned by 'prep_config'.
+    """
+    settings = config.get("settings") or {}
+    cli_kwargs = config["cli_kwargs"]
+
+    mode = cli_kwargs.get("dedup") or settings.get("dedup")
+    # YAML reads 'Yes' as True.
+    if mode is True:
+        mode = "file"
+    memory = (
+        cli_kwargs.get("dedup_memory")
+        or settings.get("dedup_memory")
+        or DEFAULT_DEDUP_MEMORY
+    )
+    return mode or None, int(memory) * 1024 * 1024
+
+
+def dedup_findings(deduper, findings, keys, labels):
+    """Return the findings holding the first occurrence of a value.
+
+    :param deduper: Deduper holding the values seen so far.
+    :param findings: List of (index, column, filter position, string)
+        tuples, in line order.
+    :param keys: Dedup key of each finding, see 'TxtFerret.scan_range'.
+    :param labels: List of filter labels, see 'filter_labels'.
+
+    :return: Tuple of (list of findings, dict of first occurrences per
+        filter label).
+    """
+    if keys is None:
+        # Not deduplicated by the worker (ex: read from the scan cache).
+        return findings, {}
+
+    kept = []
+    unique = {}
+    for finding, key in zip(findings or [], keys):
+        if deduper.add(key):
+            label = labels[finding[2]]
+            unique[label] = unique.get(label, 0) + 1
+            kept.append(finding)
+    return kept, unique
+
+
+def write_findings(writer, file_name, findings, labels, column_names=None):
+    """Hand the findings of a file to a ResultWriter.
+
+    :param writer: ResultWriter of the combined results file.
+    :param file_name: Name of the scanned file.
+    :param findings: List of (index, column, filter position, string)
+        tuples, in line order. Window mode adds the offset of the match.
+    :param labels: List of filter labels, see 'filter_labels'.
+    :param column_names: Column names read from the header of a CSV
+        file, if any.
+    """
+    writer.write(
+        [
+            (
+                file_name,
+                labels[position],
+                index,
+                column,
+                string_to_log,
+                column_names,
+                *offset,
+            )
+            for index, column, position, string_to_log, *offset in findings or []
+        ]
+    )
+
+
+def log_headers(config):
+    """Return the headers of the results of a scan.
+
+    Window mode adds the offset of the matches, see WINDOW_LOG_HEADERS.
+    """
+    scan_mode = config["cli_kwargs"].get("scan_mode") or (
+        config.get("settings") or {}
+    ).get("scan_mode")
+    if scan_mode == "window":
+        return WINDOW_LOG_HEADERS
+    return LOG_HEADERS
+
+
+def open_results_writer(config):
+    """Return a ResultWriter for the combined results file or None.
+
+    The results file is written from the start with the log headers.
+    """
+    results_file = config["cli_kwargs"].get("results_file") or (
+        config.get("settings") or {}
+    ).get("results_file")
+    if not results_file:
+        return None
+
+    encoding = (config.get("settings") or {}).get("file_encoding") or DEFAULT_ENCODING
+    fh = open(results_file, "w", encoding=encoding)
+    fh.write(f"{log_headers(config)}\n")
+    return ResultWriter(fh)
+
+
+def open_cache(config):
+    """Return the ScanCache set up by the settings/CLI or None."""
+    cli_kwargs = config["cli_kwargs"]
+    cache_file = cli_kwargs.get("cache_file") or (config.get("settings") or {}).get(
+        "cache_file"
+    )
+    if not cache_file:
+        return None
+    return ScanCache(
+        cache_file, config_hash(config), force=bool(cli_kwargs.get("force"))
+    )
+
+
+def skip_cached(files, cache, cached):
+    """Yield the files which are not fresh in the scan cache.
+
+    :param files: Iterable of file names or (file_name, size) tuples.
+    :param cache: ScanCache to check files against.
+    :param cached: List the names of fresh files are appended to.
+    """
+    for file_ in files:
+        file_name = file_[0] if isinstance(file_, tuple) else file_
+        if cache.fresh(file_name):
+            cached.append(file_name)
+            continue
+        yield file_
+
+
+def report_cached(
+    config, file_names, cache, test_class=None, writer=None, run_deduper=None
+):
+    """Write the cached results of files and return their summaries.
+
+    :param config: Config returned by 'prep_config'.
+    :param file_names: Names of the files fresh in the cache.
+    :param cache: ScanCache holding the results.
+    :param test_class: Used to pass a TxtFerret stub for testing.
+    :param writer: ResultWriter of the combined results file, if any.
+    :param run_deduper: Deduper holding the values seen in the run,
+        when deduplicating across files (see 'collect_results').
+    """
+    ferret_class = test_class or TxtFerret
+    ferret = None
+    results = []
+    labels = filter_labels(config)
+    dedup, dedup_memory = dedup_settings(config)
+
+    for file_name in file_names:
+        summary, findings = cache.get(file_name)
+        # The file was not scanned by this run.
+        summary.pop("stats", None)
+        keys = summary.pop("dedup_keys", None)
+
+        if writer is not None:
+            if dedup is not None and keys is not None:
+                findings, summary["unique"] = dedup_findings(
+                    run_deduper or Deduper(dedup_memory), findings, keys, labels
+                )
+            write_findings(
+                writer, file_name, findings, labels, summary.get("column_names")
+            )
+            results.append(summary)
+            continue
+
+        if ferret is None:
+            ferret = ferret_class(file_config(config, file_name))
+            if run_deduper is not None:
+                ferret.deduper = run_deduper
+        else:
+            ferret.set_file(file_name)
+
+        ferret.scan_file(
+            range_results=[
+                {
+                    "findings": findings,
+                    "dedup_keys": keys,
+                    "failures": summary["failures"],
+                    "passes": summary["passes"],
+                    "counts": summary.get("counts"),
+                    "lines": 0,
+                    "time": summary["time"],
+                }
+            ]
+        )
+        result = ferret.summary()
+        if keys is None and "unique" in summary:
+            # Deduplicated before they were stored.
+            result["unique"] = summary["unique"]
+        results.append(result)
+
+    return results
+
+
+def get_counts(results):
+    """Return the counts of file summaries merged together."""
+    totals = {}
+    for result in results:
+        add_counts(totals, result.get("counts"))
+    return count_rows(totals)
+
+
+def get_unique(results):
+    """Return the first occurrences per filter label of file summaries."""
+    totals = {}
+    for result in results:
+        for label, unique in (result.get("unique") or {}).items():
+            totals[label] = totals.get(label, 0) + unique
+    return totals
+
+
+def get_stats(results):
+    """Return the stats of file summaries added together.
+
+    :return: None if no file recorded stats.
+    """
+    totals = None
+    for result in results:
+        if result.get("stats"):
+            if totals is None:
+                totals = new_scan_stats()
+            add_stats(totals, result["stats"])
+    return totals
+
+
+def save_stats(config, results):
+    """Write the stats of file summaries to the stats file, if set.
+
+    :param config: Config returned by 'prep_config'.
+    :param results: List of file summaries.
+    """
+    stats_file = config["cli_kwargs"].get("stats_file") or config["settings"].get(
+        "stats_file"
+    )
+    total = get_stats(results)
+    if not stats_file or total is None:
+        return
+    files = {
+        result["file_name"]: result["stats"]
+        for result in results
+        if result.get("stats")
+    }
+    write_stats(stats_file, total, files)
+    logger.info(f"Wrote scan stats to {stats_file}.")
 
 
 def get_totals(results=None):
@@ -90,8 +698,12 @@ def get_totals(results=None):
     return _total_failures, _total_passes
 
 
-def log_summary(result=None, file_count=None, results=None):
-    """Log summary to logger."""
+def log_summary(result=None, file_count=None, results=None, makespan=None):
+    """Log summary to logger.
+
+    :param makespan: Tuple of (predicted, actual) seconds for the bulk
+        scan schedule.
+    """
     failures = result.get("failures")
     passes = result.get("passes")
     logger.info("SUMMARY:")
@@ -104,6 +716,34 @@ def log_summary(result=None, file_count=None, results=None):
 
     logger.info(f"  - Finished in {seconds} seconds (~{minutes} minutes).")
 
+    counts = result.get("counts")
+    if counts:
+        logger.info("FILTER SUMMARIES:")
+        for label, column, _failures, _passes in sorted(
+            counts, key=lambda row: (row[0], row[1] or 0)
+        ):
+            _name = label if column is None else f"{label}, column {column}"
+            logger.info(
+                f"  - {_name}: {_passes} passed sanity checks and {_failures} failed"
+            )
+
+    unique = result.get("unique")
+    if unique:
+        logger.info("FIRST OCCURRENCES:")
+        for label, _unique in sorted(unique.items()):
+            logger.info(f"  - {label}: {_unique} distinct value(s) reported")
+
+    if makespan is not None:
+        predicted, actual = makespan
+        logger.info(
+            f"  - Makespan: predicted {predicted:.2f} seconds, "
+            f"actual {actual:.2f} seconds."
+        )
+
+    stats = result.get("stats")
+    if stats:
+        log_stats(stats)
+
     if results is None:
         return
 
@@ -121,6 +761,339 @@ def log_summary(result=None, file_count=None, results=None):
         )
 
 
+def log_stats(stats):
+    """Log where the scan spent its time, slowest filter first.
+
+    :param stats: Stats returned by 'get_stats'.
+    """
+    megabytes = stats["bytes"] / 1024 / 1024
+    logger.info("FILTER STATS:")
+    logger.info(
+        f"  - Scanned {megabytes:.1f} MB in {stats['lines']} line(s), "
+        f"{stats['search_seconds']:.3f} seconds finding lines holding a hit."
+    )
+
+    def _seconds(item):
+        return sum(value for key, value in item[1].items() if key.endswith("_seconds"))
+
+    for label, _stats in sorted(stats["filters"].items(), key=_seconds, reverse=True):
+        logger.info(
+            f"  - {label}: regex {_stats['regex_seconds']:.3f}s "
+            f"({_stats['candidates']} candidate(s) in "
+            f"{_stats['bytes'] / 1024 / 1024:.1f} MB), "
+            f"exclusions {_stats['exclude_seconds']:.3f}s "
+            f"({_stats['excluded']} excluded), "
+            f"sanity {_stats['sanity_seconds']:.3f}s ({_stats['checked']} checked), "
+            f"output {_stats['output_seconds']:.3f}s ({_stats['reported']} reported)"
+        )
+
+
+def log_schedule(tasks, workers):
+    """Log how a bulk scan was scheduled and return the split files.
+
+    :param tasks: List of Task objects from 'plan_tasks'.
+    :param workers: Number of worker processes.
+
+    :return: dict of file name to the number of ranges the file was
+        split into.
+    """
+    split_files = {}
+    file_count = 0
+    for task in tasks:
+        for file_name, start, _ in task.items:
+            if start is None:
+                file_count += 1
+            else:
+                split_files[file_name] = split_files.get(file_name, 0) + 1
+
+    total = sum(task.cost for task in tasks)
+    busiest = worker_loads((task.cost for task in tasks), workers)[0]
+
+    logger.info(
+        f"Scheduled {file_count + len(split_files)} file(s) as {len(tasks)} "
+        f"task(s) for {workers} worker(s), largest first. "
+        f"{len(split_files)} file(s) split into ranges."
+    )
+    logger.info(
+        f"Busiest worker: {busiest / 1024 / 1024:.1f} MB of "
+        f"{total / 1024 / 1024:.1f} MB."
+    )
+    return split_files
+
+
+def predict_makespan(tasks, workers, busy_seconds):
+    """Return the predicted time to run the tasks, in seconds.
+
+    The scan rate is taken from the time the workers spent scanning,
+    so the prediction shows how well the schedule balanced the work
+    (the actual makespan also holds the time spent waiting on slow
+    tasks and starting processes).
+
+    :param tasks: List of Task objects from 'plan_tasks'.
+    :param workers: Number of worker processes.
+    :param busy_seconds: Seconds spent scanning by all workers.
+    """
+    total = sum(task.cost for task in tasks)
+    if not total:
+        return 0.0
+    busiest = worker_loads((task.cost for task in tasks), workers)[0]
+    return busiest * busy_seconds / total
+
+
+def bulk_scan(config):
+    """Scan the files of a directory with a pool of worker processes.
+
+    :param config: Config returned by 'prep_config'.
+
+    :return: Tuple of (list of file summaries sorted by file name,
+        (predicted, actual) makespan in seconds or None).
+    """
+    cli_kwargs = config["cli_kwargs"]
+
+    start = datetime.now()
+
+    cpus = cli_kwargs["workers"] or mp.cpu_count()
+    schedule = (
+        cli_kwargs.get("schedule")
+        or config["settings"].get("schedule")
+        or DEFAULT_SCHEDULE
+    )
+
+    tasks = None
+    split_files = {}
+
+    cache = open_cache(config)
+    cached = []
+
+    writer = open_results_writer(config)
+    if writer is not None and cli_kwargs.get("resume"):
+        logger.info("--resume is ignored when writing a combined results file.")
+
+    if cache is not None and cli_kwargs.get("prune"):
+        logger.info(f"Pruned {cache.prune()} deleted file(s) from the scan cache.")
+
+    if schedule == "size":
+        files = get_files_from_dir(
+            directory=cli_kwargs["file_name"],
+            with_size=True,
+            **walk_options(config),
+        )
+        if cache is not None:
+            files = skip_cached(files, cache, cached)
+        # CSV records can span lines, fixed length records have no
+        # newlines to split on and windows ignore them, so such
+        # files are never split.
+        settings = config["settings"]
+        splittable = (
+            (cli_kwargs.get("file_format") or settings.get("file_format")) != "csv"
+            and not (cli_kwargs.get("record_length") or settings.get("record_length"))
+            and (cli_kwargs.get("scan_mode") or settings.get("scan_mode")) != "window"
+        )
+        tasks = plan_tasks(files, cpus, splitter=file_ranges if splittable else None)
+        split_files = log_schedule(tasks, cpus)
+        task_items = (task.items for task in tasks)
+    else:
+        # Devy out the work to available CPUs as files are found.
+        file_names = get_files_from_dir(
+            directory=cli_kwargs["file_name"], **walk_options(config)
+        )
+        if cache is not None:
+            file_names = skip_cached(file_names, cache, cached)
+        task_items = ([(file_name, None, None)] for file_name in file_names)
+
+    dedup, dedup_memory = dedup_settings(config)
+    # Values seen in the files scanned and in the cached files.
+    run_deduper = Deduper(dedup_memory) if dedup == "run" else None
+
+    with mp.Pool(
+        cpus,
+        initializer=init_worker,
+        initargs=(
+            config,
+            None,
+            cache is not None,
+            writer is not None or dedup == "run",
+        ),
+    ) as p:
+        results, busy_seconds = collect_results(
+            config,
+            p.imap_unordered(scan_worker_task, task_items),
+            split_files,
+            cache,
+            writer=writer,
+            run_deduper=run_deduper,
+        )
+
+    if cache is not None:
+        results.extend(
+            report_cached(config, cached, cache, writer=writer, run_deduper=run_deduper)
+        )
+        logger.info(f"Reported {len(cached)} unchanged file(s) from the scan cache.")
+        cache.close()
+
+    if writer is not None:
+        writer.close()
+        writer.file_handler.close()
+
+    # Files finish in any order, keep the summaries stable.
+    results.sort(key=lambda result: result.get("file_name"))
+
+    makespan = None
+    if tasks:
+        makespan = (
+            predict_makespan(tasks, cpus, busy_seconds),
+            (datetime.now() - start).total_seconds(),
+        )
+
+    return results, makespan
+
+
+def run_benchmarks(
+    config,
+    directory,
+    size,
+    workers,
+    files=DEFAULT_BENCH_FILES,
+    repeat=DEFAULT_BENCH_REPEAT,
+    delimiter=",",
+    **line_kwargs,
+):
+    """Write synthetic files to a directory and time scanning them.
+
+    'TxtFerret.scan_file' is timed on a plain, a gzipped and a
+    delimited file, 'get_column_map', 'sanity_test' and 'luhn' on the
+    lines and matches of those files, and bulk scans of the same data
+    split into files with 1, 2, 4... up to 'workers' processes.
+
+    :param config: Config to scan with (filters and settings).
+    :param directory: Directory to write the files and results to.
+    :param size: Bytes of data to scan per benchmark.
+    :param workers: Most worker processes of the bulk scans.
+    :param files: Number of files of the bulk scans.
+    :param repeat: Runs per benchmark, the fastest one is kept.
+    :param delimiter: Delimiter of the delimited file (str).
+    :param line_kwargs: Passed on to 'generate_lines'.
+
+    :return: List of 'bench_result' records.
+    """
+    output_file = os.path.join(directory, "bench.log")
+    settings = config.get("settings") or {}
+    encoding = settings.get("file_encoding") or DEFAULT_ENCODING
+
+    def scan_config(file_name, **cli_kwargs):
+        return {
+            **config,
+            "cli_kwargs": {
+                "file_name": file_name,
+                "output_file": output_file,
+                "workers": 1,
+                **cli_kwargs,
+            },
+        }
+
+    corpora = [
+        ("scan_file", "plain.txt", {}, {}),
+        ("scan_file_gzip", "plain.txt.gz", {"compress": True}, {}),
+        (
+            "scan_file_delimited",
+            "delimited.txt",
+            {"delimiter": delimiter},
+            {"delimiter": delimiter},
+        ),
+    ]
+
+    results = []
+    for name, base_name, corpus_kwargs, cli_kwargs in corpora:
+        file_name = os.path.join(directory, base_name)
+        written = write_corpus(file_name, size, **corpus_kwargs, **line_kwargs)
+        ferret_config = scan_config(file_name, **cli_kwargs)
+
+        seconds = best_time(lambda: TxtFerret(ferret_config).scan_file(), repeat)
+        results.append(bench_result(name, seconds, written["bytes"], written["lines"]))
+
+    filters = [Filter(filter_dict=f, gzip=False) for f in config["filters"]]
+    delimited = list(generate_lines(size, delimiter=delimiter, **line_kwargs))
+    results.append(bench_get_column_map(filters, delimited, delimiter.encode(), repeat))
+
+    found = candidates(filters, generate_lines(size, **line_kwargs))
+    results.append(bench_sanity_test(found, encoding, repeat))
+    results.append(bench_luhn(found, encoding, repeat))
+
+    bulk_directory = os.path.join(directory, "bulk")
+    written = corpus_files(bulk_directory, files, size, **line_kwargs)
+    single = None
+    for count in worker_counts(workers):
+        bulk_config = scan_config(bulk_directory, bulk=True, workers=count)
+        seconds = best_time(lambda: bulk_scan(bulk_config), repeat)
+        single = single or seconds
+        results.append(
+            bench_result(
+                f"bulk_{count}",
+                seconds,
+                written["bytes"],
+                written["lines"],
+                workers=count,
+                speedup=round(single / seconds, 2),
+            )
+        )
+
+    return results
+
+
+def follow_files(config, test_class=None, stop=None):
+    """Follow the file (or files with --bulk) until interrupted.
+
+    :param config: Config returned by 'prep_config'.
+    :param test_class: Used to pass a TxtFerret stub for testing.
+    :param stop: Passed on to 'follow', used for testing.
+
+    :return: Tuple of (file summaries, number of files followed).
+    """
+    ferret_class = test_class or TxtFerret
+    cli_kwargs = config["cli_kwargs"]
+
+    if cli_kwargs.get("bulk"):
+        file_names = get_files_from_dir(
+            directory=cli_kwargs["file_name"], **walk_options(config)
+        )
+    else:
+        file_names = [cli_kwargs["file_name"]]
+
+    ferrets = []
+    for file_name in file_names:
+        if gzipped_file_check(file_name):
+            logger.info(f"Unable to follow gzipped file '{file_name}', skipping.")
+            continue
+        ferrets.append(ferret_class(file_config(config, file_name)))
+
+    if ferrets and ferrets[0].dedup == "run":
+        for ferret in ferrets[1:]:
+            ferret.deduper = ferrets[0].deduper
+
+    interval = float(
+        cli_kwargs.get("follow_interval")
+        or config["settings"].get("follow_interval")
+        or DEFAULT_FOLLOW_INTERVAL
+    )
+
+    logger.info(f"Following {len(ferrets)} file(s), press Ctrl-C to stop.")
+    follow(ferrets, interval=interval, stop=stop)
+
+    results = []
+    for ferret in ferrets:
+        result = {
+            "file_name": ferret.file_name,
+            "failures": ferret.failed_sanity,
+            "passes": ferret.passed_sanity,
+            "counts": ferret.counts(),
+            "unique": ferret.unique(),
+        }
+        if ferret.stats is not None:
+            result["stats"] = ferret.stats.as_dict()
+        results.append(result)
+    return results, len(ferrets)
+
+
 @click.group()
 def cli():
     """Placeholder"""
@@ -150,7 +1123,177 @@ def cli():
     default="",
     help="Delimiter to use for field parsing instead of line parsing.",
 )
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(FILE_FORMATS),
+    default=None,
+    help="Parse files as plain text or as CSV with quoted fields.",
+)
+@click.option(
+    "--csv-header",
+    is_flag=True,
+    help="With --format csv, read column names from the first record.",
+)
+@click.option(
+    "--record-length",
+    type=int,
+    default=None,
+    help="Bytes per record of files made of fixed length records without newlines.",
+)
 @click.option("--bulk", "-b", is_flag=True, help="Scan multiple files in a directory.")
+@click.option(
+    "--scan-engine",
+    type=click.Choice(SCAN_ENGINES),
+    default=None,
+    help="Run all filters in one combined regex pass or each filter separately.",
+)
+@click.option(
+    "--scan-mode",
+    type=click.Choice(SCAN_MODES),
+    default=None,
+    help="Search large blocks of the file at once, scan line by line or scan "
+    "windows of bounded size ignoring lines.",
+)
+@click.option(
+    "--block-size",
+    type=int,
+    default=None,
+    help="Size of the blocks (in megabytes) read in block scan mode.",
+)
+@click.option(
+    "--window-size",
+    type=int,
+    default=None,
+    help="Size of the windows (in megabytes) read in window scan mode.",
+)
+@click.option(
+    "--window-overlap",
+    type=int,
+    default=None,
+    help="Bytes shared by consecutive windows in window scan mode. At least "
+    "the longest match of the filters.",
+)
+@click.option(
+    "--workers",
+    "-w",
+    type=int,
+    default=None,
+    help="Number of processes used to scan a file (or files with --bulk).",
+)
+@click.option(
+    "--gzip-index",
+    is_flag=True,
+    help="Write a gzip index while scanning gzipped files for later --workers scans.",
+)
+@click.option(
+    "--include",
+    multiple=True,
+    help="With --bulk, only scan files matching this glob (repeatable).",
+)
+@click.option(
+    "--exclude",
+    multiple=True,
+    help="With --bulk, skip files and directories matching this glob (repeatable).",
+)
+@click.option(
+    "--max-depth",
+    type=int,
+    default=None,
+    help="With --bulk, number of sub directory levels to walk (0 for none).",
+)
+@click.option(
+    "--follow-symlinks",
+    is_flag=True,
+    help="With --bulk, follow symlinks to files and directories.",
+)
+@click.option(
+    "--max-size",
+    type=int,
+    default=None,
+    help="With --bulk, skip files larger than this many megabytes.",
+)
+@click.option(
+    "--schedule",
+    type=click.Choice(SCHEDULES),
+    default=None,
+    help="With --bulk, scan the largest files first or files in the order found.",
+)
+@click.option(
+    "--cache-file",
+    default=None,
+    help="With --bulk, skip files unchanged since they were scanned into this cache.",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    help="With --cache-file, rescan every file (the cache is still updated).",
+)
+@click.option(
+    "--prune",
+    is_flag=True,
+    help="With --cache-file, remove deleted files from the cache.",
+)
+@click.option(
+    "--follow",
+    "-f",
+    is_flag=True,
+    help="Keep scanning lines appended to the file(s) until interrupted.",
+)
+@click.option(
+    "--follow-interval",
+    type=float,
+    default=None,
+    help="With --follow, seconds between checks for appended lines.",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Save checkpoints while scanning and pick up from the last one.",
+)
+@click.option(
+    "--checkpoint-bytes",
+    type=int,
+    default=None,
+    help="Megabytes scanned between checkpoints.",
+)
+@click.option(
+    "--checkpoint-seconds",
+    type=float,
+    default=None,
+    help="Seconds between checkpoints.",
+)
+@click.option(
+    "--checkpoint-dir",
+    default=None,
+    help="Directory to write checkpoints to instead of next to the scanned files.",
+)
+@click.option(
+    "--results-file",
+    default=None,
+    help="With --bulk, write the findings of every file to this one file.",
+)
+@click.option(
+    "--dedup",
+    type=click.Choice(DEDUP_MODES),
+    default=None,
+    help="Only report the first occurrence of each value in a file or in the "
+    "whole run.",
+)
+@click.option(
+    "--dedup-memory",
+    type=int,
+    default=None,
+    help="Memory (in megabytes) kept for the values seen before switching to a "
+    "Bloom filter.",
+)
+@click.option(
+    "--stats",
+    "stats_file",
+    default=None,
+    help="Record the time spent per filter in regexes, exclusions, sanity checks "
+    "and output, and write it to this JSON file.",
+)
 @click.argument("file_name")
 def scan(**cli_kwargs):
     """Kicks off scanning of user-defined file(s)."""
@@ -162,11 +1305,30 @@ def scan(**cli_kwargs):
     if not cli_kwargs["output_file"]:
         # Results will be printed to screen so log headers will
         # help user know what they're looking at.
-        logger.info(f"Log headers: {LOG_HEADERS}")
+        logger.info(f"Log headers: {log_headers(config)}")
+
+    if cli_kwargs.get("follow"):
 
-    if not cli_kwargs["bulk"]:
+        start = datetime.now()
+
+        results, file_count = follow_files(config)
+
+        total_failures, total_passes = get_totals(results)
+        total_result = {
+            "failures": total_failures,
+            "passes": total_passes,
+            "time": (datetime.now() - start).seconds,
+            "counts": get_counts(results),
+            "unique": get_unique(results),
+            "stats": get_stats(results),
+        }
+
+        log_summary(result=total_result, file_count=file_count)
+
+    elif not cli_kwargs["bulk"]:
 
         result = bootstrap(config)
+        results = [result]
 
         log_summary(result=result, file_count=1)
 
@@ -174,36 +1336,31 @@ def scan(**cli_kwargs):
 
         start = datetime.now()
 
-        file_names = get_files_from_dir(directory=cli_kwargs["file_name"])
-        configs = []
-
-        # Generate a config for each file name which can be passed to
-        # multiprocessing...
-        for file_ in file_names:
-            temp_config = copy.deepcopy(config)
-            temp_config["cli_kwargs"]["file_name"] = file_
-            configs.append(temp_config)
-
-        # Devy out the work to available CPUs
-        cpus = mp.cpu_count()
-        with mp.Pool(cpus) as p:
-            results = p.map(bootstrap, configs)
-
-        end = datetime.now()
+        results, makespan = bulk_scan(config)
 
         total_failures, total_passes = get_totals(results)
 
         total_scanned = len(results)
 
-        delta = end - start
+        delta = datetime.now() - start
 
         total_result = {
             "failures": total_failures,
             "passes": total_passes,
             "time": delta.seconds,
+            "counts": get_counts(results),
+            "unique": get_unique(results),
+            "stats": get_stats(results),
         }
 
-        log_summary(result=total_result, file_count=total_scanned, results=results)
+        log_summary(
+            result=total_result,
+            file_count=total_scanned,
+            results=results,
+            makespan=makespan,
+        )
+
+    save_stats(config, results)
 
 
 @click.command()
@@ -214,5 +1371,165 @@ def dump_config(file_name):
     save_config(config, file_name)
 
 
+@click.command()
+@click.option(
+    "--span",
+    type=int,
+    default=DEFAULT_INDEX_SPAN // 1024 // 1024,
+    help="Megabytes of inflated data between checkpoints.",
+)
+@click.argument("file_name")
+def index(file_name, span):
+    """Writes a gzip index so a gzipped file can be split with --workers."""
+    gzip_index = build_index(file_name, span=span * 1024 * 1024)
+    index_name = save_index(file_name, gzip_index)
+    if index_name is None:
+        sys.exit(1)
+
+    checkpoints = len(gzip_index["checkpoints"])
+    logger.info(f"Wrote {checkpoints} checkpoint(s) to {index_name}.")
+    if checkpoints < 2:
+        logger.info(
+            "The file is a single gzip member and cannot be split between workers."
+        )
+
+
+@click.command()
+@click.option(
+    "--config-file", "-c", default=None, help="Load user-defined config file."
+)
+@click.option(
+    "--size",
+    type=float,
+    default=DEFAULT_BENCH_SIZE,
+    help="Megabytes of synthetic data scanned per benchmark.",
+)
+@click.option(
+    "--hit-density",
+    type=float,
+    default=DEFAULT_HIT_DENSITY,
+    help="Share of the lines holding a card number.",
+)
+@click.option(
+    "--valid-ratio",
+    type=float,
+    default=DEFAULT_VALID_RATIO,
+    help="Share of the card numbers passing the Luhn check.",
+)
+@click.option(
+    "--line-length",
+    type=int,
+    default=DEFAULT_LINE_LENGTH,
+    help="Approximate length of the lines.",
+)
+@click.option(
+    "--delimiter",
+    "-d",
+    default=",",
+    help="Delimiter of the delimited file.",
+)
+@click.option(
+    "--seed",
+    type=int,
+    default=DEFAULT_BENCH_SEED,
+    help="Seed of the generator, the same seed writes the same files.",
+)
+@click.option(
+    "--repeat",
+    type=int,
+    default=DEFAULT_BENCH_REPEAT,
+    help="Runs per benchmark, the fastest one is reported.",
+)
+@click.option(
+    "--workers",
+    "-w",
+    type=int,
+    default=None,
+    help="Most processes of the bulk scans (defaults to the number of CPUs).",
+)
+@click.option(
+    "--files",
+    type=int,
+    default=DEFAULT_BENCH_FILES,
+    help="Number of files the bulk scans are split into.",
+)
+@click.option(
+    "--directory",
+    default=None,
+    help="Write the synthetic files here and keep them (a temporary directory "
+    "is used otherwise).",
+)
+@click.option(
+    "--label",
+    default=None,
+    help="Label saved with the results (ex: the version being measured).",
+)
+@click.option(
+    "--output-file",
+    "-o",
+    default=None,
+    help="Write the JSON results to this file instead of stdout.",
+)
+def bench(**cli_kwargs):
+    """Benchmarks scanning synthetic files, reporting MB/s and lines/s as JSON."""
+    # Only problems are logged, the findings are written to files.
+    logger.configure(handlers=[{"sink": sys.stderr, "level": "WARNING"}])
+
+    config = load_config(yaml_file=cli_kwargs["config_file"])
+    workers = cli_kwargs["workers"] or mp.cpu_count()
+    corpus = {
+        "size": int(cli_kwargs["size"] * 1024 * 1024),
+        "hit_density": cli_kwargs["hit_density"],
+        "valid_ratio": cli_kwargs["valid_ratio"],
+        "line_length": cli_kwargs["line_length"],
+        "seed": cli_kwargs["seed"],
+    }
+
+    directory = cli_kwargs["directory"]
+    temp_dir = None
+    if directory is None:
+        temp_dir = tempfile.TemporaryDirectory(prefix="txtferret-bench-")
+        directory = temp_dir.name
+    else:
+        os.makedirs(directory, exist_ok=True)
+
+    try:
+        results = run_benchmarks(
+            config,
+            directory,
+            workers=workers,
+            files=cli_kwargs["files"],
+            repeat=cli_kwargs["repeat"],
+            delimiter=cli_kwargs["delimiter"],
+            **corpus,
+        )
+    finally:
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+    report = {
+        "label": cli_kwargs["label"],
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": mp.cpu_count(),
+        "corpus": {
+            **corpus,
+            "delimiter": cli_kwargs["delimiter"],
+            "files": cli_kwargs["files"],
+        },
+        "results": results,
+    }
+
+    output = json.dumps(report, indent=2)
+    if cli_kwargs["output_file"]:
+        with open(cli_kwargs["output_file"], "w") as wf:
+            wf.write(output)
+            wf.write("\n")
+    else:
+        click.echo(output)
+
+
 cli.add_command(scan)
 cli.add_command(dump_config)
+cli.add_command(index)
+cli.add_command(bench)
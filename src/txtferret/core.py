@@ -1,22 +1,75 @@
 """Core classes and functions for txt_ferret."""
 
-from datetime import datetime
-import gzip
+from datetime import datetime, timedelta
+import copy
+import io
+from itertools import groupby
+import multiprocessing as mp
 import os
 from pathlib import Path
 import re
 
 from loguru import logger
 
+from ._checkpoint import (
+    Checkpointer,
+    checkpoint_file_name,
+    file_identity,
+    load_checkpoint,
+    remove_checkpoint,
+    save_checkpoint,
+)
 from ._config import ALLOWED_SETTINGS_KEYS
-from ._sanity import sanity_check
+from ._csv import CsvRecords
+from ._dedup import Deduper, dedup_key
+from ._gzindex import index_ranges, load_index, make_index, save_index
+from ._plan import (
+    ColumnPlan,
+    FixedColumns,
+    ScanPlan,
+    combine_exclusions,
+    max_match_length,
+    prefilter_requirements,
+)
+from ._reader import (
+    GzipBlockReader,
+    LineCounter,
+    SkippingReader,
+    iter_blocks,
+    iter_records,
+    iter_windows,
+    open_mmap,
+    split_ranges,
+)
+from ._sanity import sanity_check, sanity_check_batch
+from ._stats import (
+    ScanStats,
+    TimedRegex,
+    timed_excluded,
+    timed_output,
+    timed_sanity,
+)
 from ._default import (
     DEFAULT_SUBSTITUTE,
     DEFAULT_ENCODING,
     DEFAULT_MASK_INDEX,
     DEFAULT_MASK_VALUE,
+    DEFAULT_BLOCK_SIZE,
+    DEFAULT_CHECKPOINT_SECONDS,
+    DEFAULT_DEDUP_MEMORY,
+    DEFAULT_SCAN_ENGINE,
+    DEFAULT_SCAN_MODE,
+    DEFAULT_WINDOW_OVERLAP,
+    DEFAULT_WINDOW_SIZE,
+    DEFAULT_FILE_FORMAT,
+    DEDUP_MODES,
+    FILE_FORMATS,
     LOG_HEADERS,
+    SCAN_ENGINES,
+    SCAN_MODES,
+    WINDOW_LOG_HEADERS,
 )
+from ._writer import WRITE_BATCH, ResultWriter, format_finding
 
 
 CURRENT_DIR = dir
@@ -92,6 +145,17 @@ def _byte_code_to_string(byte_code, _encoding):
     return bytes((code_,))
 
 
+def _word_delimiter(delimiter, _encoding):
+    """Return True if the delimiter contains word characters.
+
+    Word boundaries ('\\b') at the edge of a column only hold in the
+    whole line if the delimiter is not a word character itself.
+    """
+    if not delimiter:
+        return False
+    return re.search(rb"\w", _byte_code_to_string(delimiter, _encoding)) is not None
+
+
 def gzipped_file_check(file_to_scan, _opener=None):
     """ Return bool based on if opening file having first two
     gzip chars.
@@ -118,6 +182,33 @@ def gzipped_file_check(file_to_scan, _opener=None):
     return False
 
 
+def file_ranges(file_name, parts, gzip=None):
+    """Return the byte ranges a file can be split into (if any).
+
+    Uncompressed files are split on newlines. Gzipped files can only
+    be split at the checkpoints of a gzip index.
+
+    :param file_name: Name of the file to split.
+    :param parts: Number of ranges wanted.
+    :param gzip: True if the file is gzipped. Checked if None.
+
+    :return: List of (start, end) byte ranges. Compressed offsets of
+        gzip index checkpoints for gzipped files. Empty if the file
+        cannot be split.
+    """
+    if gzip is None:
+        gzip = gzipped_file_check(file_name)
+
+    if not gzip:
+        return split_ranges(file_name, parts)
+
+    index = load_index(file_name)
+    if index is None:
+        logger.info(f"No gzip index for '{file_name}', scanning with one process.")
+        return []
+    return index_ranges(index, parts)
+
+
 class Filter:
     """ Helper class to  hold filter configurations and add a simple
     API to interface with Filter attributes.
@@ -127,14 +218,21 @@ class Filter:
         match text.
     :attribute substitute: The regular expression used to replace
         characters within the matched string (like a delimiter).
+    :attribute substitute_regex: Compiled substitute.
+    :attribute exclude_patterns: Compiled exclude patterns.
+    :attribute exclude_regex: The exclude patterns combined into one
+        regex (see 'combine_exclusions'), None if there are none.
+    :attribute allowlist: Set of known safe values (ex: test card
+        numbers) without the substitute characters.
     :attribute type: A classification of the filter.
     :attribute sanity: The name of the sanity check (ex: 'luhn').
     :attribute mask_value: Mask used to mask filter results.
     :attribute mask_index: Index in clear-text string in which the
         mask should start being applied.
+    :attribute position: Position of the filter in the config.
     """
 
-    def __init__(self, filter_dict, gzip, _encoding=DEFAULT_ENCODING):
+    def __init__(self, filter_dict, gzip, _encoding=DEFAULT_ENCODING, position=None):
         """Initialize the Filter object. Lots handling input from
         the config file here.
 
@@ -142,6 +240,7 @@ class Filter:
         :raise: ValueError - Token index is not an integer.
         """
         self.label = filter_dict.get("label", "NOT_DEFINED")
+        self.position = position
 
         # Get pattern from filter. This is required, so raise an
         # exception if it's missing.
@@ -184,11 +283,26 @@ class Filter:
             self.exclude_patterns = [
                 re.compile(pattern.encode(_encoding)) for pattern in _exclude_patterns
             ]
+            self.exclude_regex, self._exclude_separate = combine_exclusions(
+                [pattern.encode(_encoding) for pattern in _exclude_patterns]
+            )
 
         self.mask_value = self.mask_value.encode(_encoding)
         self.pattern = self.pattern.encode(_encoding)
         self.substitute = self.substitute.encode(_encoding)
         self.empty = b""  # Used in re.sub in 'sanity_check'
+        self.substitute_regex = re.compile(self.substitute)
+
+        self.allowlist = frozenset()
+        allowlist_file = filter_dict.get("allowlist_file")
+        if allowlist_file:
+            self.allowlist = load_allowlist(allowlist_file, self.substitute_regex)
+
+        # False when no match can be excluded, so they are not checked.
+        self.has_exclusions = bool(self.allowlist or self.exclude_patterns)
+
+        # Cheap conditions every match meets, checked before the regex.
+        self.min_digits, self.prefixes = prefilter_requirements(self.pattern)
 
         try:
             self.mask_index = int(filter_dict["mask"].get("index", 0))
@@ -197,6 +311,53 @@ class Filter:
 
         self.regex = re.compile(self.pattern)
 
+    def excluded(self, match):
+        """Return True if a match is allowlisted or excluded by a pattern.
+
+        :param match: The matched bytes.
+        """
+        if self.allowlist and (
+            self.substitute_regex.sub(self.empty, match) in self.allowlist
+        ):
+            return True
+        if self.exclude_regex is not None and self.exclude_regex.search(match):
+            return True
+        return any(exclusion.search(match) for exclusion in self._exclude_separate)
+
+    def exclude(self, matches):
+        """Return the matches which are not excluded (see 'excluded')."""
+        if not self.has_exclusions:
+            return matches
+        return [match for match in matches if not self.excluded(match)]
+
+
+def load_allowlist(file_name, substitute_regex):
+    """Return the known safe values listed in a file.
+
+    The file holds one value per line. Blank lines and lines starting
+    with '#' are skipped. Values are stored without the characters
+    matching the filter's substitute (ex: '4111-1111-1111-1111' is
+    stored as '4111111111111111') so they are compared to matches the
+    same way whatever their separators.
+
+    :param file_name: Name of the allowlist file.
+    :param substitute_regex: Compiled substitute of the filter.
+
+    :raise: ValueError - The file cannot be read.
+    """
+    try:
+        with open(file_name, "rb") as rf:
+            lines = rf.read().splitlines()
+    except OSError as e:
+        raise ValueError(f"Unable to read allowlist '{file_name}' ({e}).")
+
+    values = set()
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith(b"#"):
+            values.add(substitute_regex.sub(b"", line))
+    return frozenset(values)
+
 
 def results_file_name(file_path, output_dir):
     file_name = os.path.basename(file_path)
@@ -209,6 +370,101 @@ def get_file_path(file_path, output_file):
     return results_file_name(file_path, _output_dir)
 
 
+def add_counts(totals, counts):
+    """Add counts (see 'TxtFerret.counts') to a dict of totals.
+
+    :param totals: dict of [failures, passes] per (filter label,
+        column), updated in place.
+    :param counts: List of [filter label, column, failures, passes].
+    """
+    for label, column, failures, passes in counts or []:
+        entry = totals.get((label, column))
+        if entry is None:
+            entry = totals[(label, column)] = [0, 0]
+        entry[0] += failures
+        entry[1] += passes
+
+
+def count_rows(totals):
+    """Return a dict of totals (see 'add_counts') as a counts list."""
+    return [
+        [label, column, failures, passes]
+        for (label, column), (failures, passes) in totals.items()
+    ]
+
+
+def line_matches(regex, data, pos, end):
+    """Yield the matches of a regex starting in data[pos:end].
+
+    A match never runs across a newline (it may end with one), so
+    patterns allowing separators (ex: '[\\W_]') do not join digits of
+    consecutive lines. The whole data is searched at once, only the
+    line of a match running across a newline is searched on its own.
+    Lines without a newline in data (ex: longer than a window) are
+    searched up to the end of data.
+
+    :param regex: Compiled regex without anchors or look-arounds.
+    :param data: bytes-like object to search.
+    :param pos: Offset in data to search from.
+    :param end: Offset in data past which matches may not start.
+    """
+    while pos < end:
+        for match in regex.finditer(data, pos):
+            if match.start() >= end:
+                return
+            newline = data.find(b"\n", match.start(), match.end() - 1)
+            if newline == -1:
+                yield match
+                continue
+
+            # Matches in the rest of the line start at or after this one.
+            for match in regex.finditer(data, match.start(), newline + 1):
+                if match.start() >= end:
+                    return
+                yield match
+            pos = newline + 1
+            break
+        else:
+            return
+
+
+def merge_findings(range_results):
+    """Yield range results with line numbers counted from the file start.
+
+    The line numbers found in a range are offset by the number of
+    lines in the ranges before it. Offsets of window mode matches are
+    already counted from the file start.
+
+    :param range_results: Iterable of 'scan_range' results in file
+        order.
+    """
+    lines = 0
+    for result in range_results:
+        findings = [
+            (index + lines, column, position, string_to_log, *offset)
+            for index, column, position, string_to_log, *offset in result["findings"]
+        ]
+        yield {**result, "findings": findings}
+        lines += result["lines"]
+
+
+def open_results_file(file_path, encoding, offset=None):
+    """Return a results file opened for writing.
+
+    :param file_path: Name of the results file.
+    :param encoding: Encoding of the results file.
+    :param offset: Position recorded in a checkpoint. The file is cut
+        down to it and written from there, dropping whatever was
+        written after the checkpoint. The file is emptied if None.
+    """
+    if offset is not None and os.path.exists(file_path):
+        fh = open(file_path, "r+", encoding=encoding)
+        fh.seek(offset)
+        fh.truncate()
+        return fh
+    return open(file_path, "w+", encoding=encoding)
+
+
 class TxtFerret:
     """Class to hold state and manage scanning files for data.
 
@@ -226,20 +482,317 @@ class TxtFerret:
     :attribute delimiter: String representing the delimiter for
         columns within the file. If present, txt_ferret will scan
         each column and also report column number in output.
+    :attribute include_columns: Set of column numbers to scan. Every
+        column (except 'ignore_columns') is scanned if empty.
+    :attribute columns: ColumnPlan splitting delimited lines or None.
+    :attribute file_format: 'text' or 'csv'. CSV files follow quoted
+        fields across delimiters and lines.
+    :attribute csv: CsvRecords assembling the records of CSV files.
+    :attribute csv_header: If True, the first record of CSV files
+        holds the column names.
+    :attribute column_names: Column names read from the header, if any.
+    :attribute fixed: FixedColumns cutting the columns of fixed width
+        lines or records, None if not configured.
+    :attribute record_length: Bytes per record of files made of fixed
+        length records without newlines. 0 for files made of lines.
     :attribute failed_sanity: Count of strings that matched a filter
         but failed sanity checks.
     :attribute passed_sanity: Count of strings that matched a filter
         and passed sanity checks.
     :attribute filters: List of filters to be used during the file scan.
+    :attribute scan_engine: 'combined' runs all filters in one regex
+        pass per line, 'per_filter' runs each filter regex separately.
+    :attribute plan: ScanPlan used to run the filters over each line.
+    :attribute scan_mode: 'block' searches large blocks of the file and
+        only scans lines holding a hit, 'line' scans every line and
+        'window' scans overlapping windows of the file, ignoring lines.
+    :attribute block_size: Number of bytes read per block in block mode.
+    :attribute window_size: Number of bytes read per window in window
+        mode, which ignores lines so memory stays bounded.
+    :attribute window_overlap: Bytes shared by consecutive windows, at
+        least as many as the longest match of the filters.
+    :attribute workers: Number of processes used to scan a single
+        file. Each process scans a range of lines. Gzipped files need
+        a gzip index to be split.
+    :attribute gzip_index: If True, write a gzip index when a gzipped
+        file is scanned so later scans can be split between workers.
+    :attribute resume: If True, pick up from the checkpoint of the file
+        (if any) instead of starting over.
+    :attribute follow: True when following growing files.
+    :attribute checkpoint_dir: Directory holding checkpoints. They are
+        written next to the scanned files if not set.
+    :attribute checkpoint: State loaded from the checkpoint of the
+        file when resuming, None otherwise.
+    :attribute checkpoint_bytes: Bytes scanned between checkpoints.
+    :attribute checkpoint_seconds: Seconds between checkpoints.
+    :attribute dedup: 'file' only reports the first occurrence of each
+        value in a file, 'run' in every file scanned by the object.
+        None reports every occurrence.
+    :attribute dedup_memory: Bytes the values seen may take.
+    :attribute deduper: Deduper remembering the values seen, None if
+        dedup is off.
+    :attribute stats_file: File the CLI writes the stats of the scan
+        to. Stats are recorded (see ScanStats) when set.
+    :attribute stats: ScanStats of the file, None if not recorded.
     """
 
     def __init__(self, config):
         """Initialize the TxtFerret object."""
         cli_settings = config["cli_kwargs"]
 
-        self.file_name = cli_settings["file_name"]
         self.output_file = cli_settings.get("output_file")
         self.file_encoding = cli_settings.get("file_encoding", DEFAULT_ENCODING)
+
+        # Needed before the results file is opened, since resuming
+        # continues the results file from the checkpoint.
+        self.follow = bool(cli_settings.get("follow"))
+        self.resume = self.follow or bool(cli_settings.get("resume"))
+        self.checkpoint_dir = cli_settings.get("checkpoint_dir") or config[
+            "settings"
+        ].get("checkpoint_dir")
+
+        self.set_file(cli_settings["file_name"])
+
+        # TODO - we should explicitly set these settings to avoid
+        # TODO - dependency issues/ordering...
+        # Set settings from file.
+        self.set_attributes(**config["settings"])
+
+        # Override settings from file with CLI arguments if present.
+        self.set_attributes(**cli_settings)
+
+        self.file_format = getattr(self, "file_format", None) or DEFAULT_FILE_FORMAT
+        if self.file_format not in FILE_FORMATS:
+            raise ValueError(f"File format '{self.file_format}' is not supported.")
+        self.csv_header = bool(getattr(self, "csv_header", False))
+
+        if self.file_format == "csv" and not self.delimiter:
+            self.delimiter = ","
+
+        if self.delimiter:
+            self.delimiter = self.delimiter.encode(self.file_encoding)
+
+        # Settings added after the original config format may be
+        # missing from older user-defined config files.
+        self.scan_engine = getattr(self, "scan_engine", None) or DEFAULT_SCAN_ENGINE
+        if self.scan_engine not in SCAN_ENGINES:
+            raise ValueError(f"Scan engine '{self.scan_engine}' is not supported.")
+
+        self.scan_mode = getattr(self, "scan_mode", None) or DEFAULT_SCAN_MODE
+        if self.scan_mode not in SCAN_MODES:
+            raise ValueError(f"Scan mode '{self.scan_mode}' is not supported.")
+
+        try:
+            block_size = int(getattr(self, "block_size", None) or DEFAULT_BLOCK_SIZE)
+        except ValueError:
+            raise ValueError("Block size must be an integer (megabytes).")
+        self.block_size = block_size * 1024 * 1024
+
+        try:
+            window_size = int(getattr(self, "window_size", None) or DEFAULT_WINDOW_SIZE)
+            window_overlap = int(getattr(self, "window_overlap", None) or 0)
+        except ValueError:
+            raise ValueError(
+                "Window size (megabytes) and overlap (bytes) must be integers."
+            )
+        self.window_size = window_size * 1024 * 1024
+        self.window_overlap = window_overlap
+
+        try:
+            self.workers = int(getattr(self, "workers", None) or 1)
+        except ValueError:
+            raise ValueError("Workers must be an integer.")
+
+        self.gzip_index = bool(getattr(self, "gzip_index", False))
+
+        # YAML reads 'Yes' as True.
+        dedup = getattr(self, "dedup", None)
+        self.dedup = "file" if dedup is True else dedup or None
+        if self.dedup is not None and self.dedup not in DEDUP_MODES:
+            raise ValueError(f"Dedup mode '{self.dedup}' is not supported.")
+        try:
+            dedup_memory = int(
+                getattr(self, "dedup_memory", None) or DEFAULT_DEDUP_MEMORY
+            )
+        except ValueError:
+            raise ValueError("Dedup memory must be an integer (megabytes).")
+        self.dedup_memory = dedup_memory * 1024 * 1024
+        self.deduper = None
+        if self.dedup is not None:
+            self.deduper = Deduper(self.dedup_memory)
+
+        try:
+            self.record_length = int(getattr(self, "record_length", None) or 0)
+        except ValueError:
+            raise ValueError("Record length must be an integer (bytes).")
+        if self.record_length and self.follow:
+            raise ValueError("Files with a record length cannot be followed.")
+
+        self.fixed = None
+        fixed_columns = getattr(self, "fixed_columns", None)
+        if fixed_columns:
+            if self.delimiter:
+                raise ValueError("Fixed columns cannot be used with a delimiter.")
+            try:
+                fixed_columns = [
+                    (int(offset), int(width)) for offset, width in fixed_columns
+                ]
+            except (TypeError, ValueError):
+                raise ValueError("Fixed columns must be [offset, width] pairs.")
+            self.fixed = FixedColumns(
+                fixed_columns,
+                include_columns=getattr(self, "include_columns", None),
+                ignore_columns=self.ignore_columns,
+            )
+
+        try:
+            checkpoint_bytes = int(getattr(self, "checkpoint_bytes", None) or 0)
+            self.checkpoint_seconds = float(
+                getattr(self, "checkpoint_seconds", None) or 0
+            )
+        except ValueError:
+            raise ValueError("Checkpoint bytes and seconds must be numbers.")
+        self.checkpoint_bytes = checkpoint_bytes * 1024 * 1024
+
+        if self.resume and not (self.checkpoint_bytes or self.checkpoint_seconds):
+            self.checkpoint_seconds = DEFAULT_CHECKPOINT_SECONDS
+
+        self._checkpointer = None
+        self._scan_stat = None
+
+        self.filters = [
+            Filter(filter_dict=filter_, gzip=self.gzip, position=position)
+            for position, filter_ in enumerate(config["filters"])
+        ]
+
+        self._config = config
+
+        # Fixed width columns and records are memoryview slices, which
+        # the prefilter cannot count digits in.
+        self.plan = ScanPlan(
+            self.filters,
+            combined=self.scan_engine == "combined",
+            prefilter=self.fixed is None and not self.record_length,
+        )
+
+        # Fixed width columns and records are not separated by anything,
+        # so a word boundary at their edge may not be one in the file.
+        allow_boundaries = (
+            self.fixed is None
+            and not self.record_length
+            and not _word_delimiter(self.delimiter, self.file_encoding)
+        )
+
+        if self.scan_mode == "window":
+            if self.delimiter or self.fixed is not None or self.record_length:
+                raise ValueError("Window mode cannot be used with columns or records.")
+            if self.follow:
+                raise ValueError("Window mode cannot be used when following files.")
+            self._set_window_overlap()
+
+        if self.scan_mode in ("block", "window") and not self.plan.block_safe(
+            allow_boundaries=allow_boundaries
+        ):
+            logger.info(
+                "One or more filters use anchors or look-arounds which "
+                "cannot be searched across lines. Reverting to line mode."
+            )
+            self.scan_mode = "line"
+
+        self.csv = None
+        if self.file_format == "csv":
+            self.csv = CsvRecords(
+                _byte_code_to_string(self.delimiter, self.file_encoding)
+            )
+            if self.scan_mode == "block":
+                logger.info(
+                    "CSV records can span lines so CSV files are scanned "
+                    "line by line. Reverting to line mode."
+                )
+                self.scan_mode = "line"
+
+        self.columns = None
+        if self.delimiter:
+            self.columns = ColumnPlan(
+                _byte_code_to_string(self.delimiter, self.file_encoding),
+                include_columns=getattr(self, "include_columns", None),
+                ignore_columns=self.ignore_columns,
+            )
+
+        # Searching the whole line (or block of records) for the
+        # columns holding a hit only works if no pattern depends on
+        # what surrounds a match.
+        self._line_gate = self.plan.combined and self.plan.block_safe(
+            allow_boundaries=allow_boundaries
+        )
+
+        self._sanity_test_batch = sanity_test_batch
+        self.stats = None
+        if getattr(self, "stats_file", None):
+            self.stats = ScanStats()
+            self._instrument()
+
+    def _instrument(self):
+        """Record the time spent in each step of the scan per filter.
+
+        The regexes, exclusions, sanity checks and output of this
+        object's filters are wrapped to record to 'stats', so scans
+        without stats run exactly the same code as before.
+        """
+        if self.plan.regex is not None:
+            self.plan.regex = TimedRegex(
+                self.plan.regex, self.stats.stats, key="search_seconds", count=False
+            )
+
+        for filter_ in self.filters:
+            entry = self.stats.filter(filter_.label)
+            filter_.regex = TimedRegex(filter_.regex, entry)
+            filter_.excluded = timed_excluded(filter_.excluded, entry)
+
+        self._sanity_test_batch = timed_sanity(self._sanity_test_batch, self.stats)
+        self._handle_match = timed_output(self._handle_match, self.stats)
+
+    def _set_window_overlap(self):
+        """Make the window overlap as long as the longest match.
+
+        Filters with matches of any length (ex: '\\d+') use the
+        configured overlap, or DEFAULT_WINDOW_OVERLAP if not set.
+        Their matches may be cut at the end of a window past it.
+
+        :raise: ValueError - The overlap is not smaller than the window.
+        """
+        lengths = [max_match_length(filter_.pattern) for filter_ in self.filters]
+        longest = max((length for length in lengths if length is not None), default=0)
+
+        if None in lengths:
+            if not self.window_overlap:
+                self.window_overlap = DEFAULT_WINDOW_OVERLAP
+            logger.info(
+                f"One or more filters match strings of any length. Matches "
+                f"longer than {max(self.window_overlap, longest)} bytes may be "
+                f"cut at the edge of a window."
+            )
+        if self.window_overlap < longest:
+            self.window_overlap = longest
+
+        if self.window_overlap >= self.window_size:
+            raise ValueError("Window overlap must be smaller than the window size.")
+
+    def set_file(self, file_name, open_output=True):
+        """Set the file to scan and reset the per-file state.
+
+        The compiled filters and scan plan are kept, so one TxtFerret
+        object can scan many files one after the other (ex: in a bulk
+        scan worker process).
+
+        :param file_name: The name of the file to scan.
+        :param open_output: Open the results file for the file. Not
+            needed when only scanning ranges (see 'scan_range').
+        """
+        if getattr(self, "fh", None) is not None and not self.fh.closed:
+            self.close_output()
+
+        self.file_name = file_name
         self.gzip = gzipped_file_check(self.file_name)
 
         if self.gzip:
@@ -248,32 +801,121 @@ class TxtFerret:
                 f"attempting GZIP mode (slower)."
             )
 
-        if self.output_file:
+        self.checkpoint = None
+        if self.resume:
+            self.checkpoint = load_checkpoint(self.checkpoint_name())
+
+        if self.checkpoint is not None and not self.follow:
+            # A file being scanned from start to end must be exactly
+            # the file the checkpoint was saved for.
+            stat_result = os.stat(self.file_name)
+            saved = (
+                self.checkpoint.get(key)
+                for key in ("device", "inode", "size", "mtime_ns")
+            )
+            current = (
+                stat_result.st_dev,
+                stat_result.st_ino,
+                stat_result.st_size,
+                stat_result.st_mtime_ns,
+            )
+            if tuple(saved) != current:
+                logger.info(
+                    f"'{self.file_name}' changed since its checkpoint, "
+                    f"scanning it from the start."
+                )
+                self.checkpoint = None
+
+        if self.output_file and open_output:
             file_path = get_file_path(self.file_name, self.output_file)
-            self.fh = open(file_path, "w+", encoding=self.file_encoding)
+            output_offset = None
+            if self.checkpoint is not None:
+                output_offset = self.checkpoint.get("output_offset")
+            self.fh = open_results_file(file_path, self.file_encoding, output_offset)
         else:
             self.fh = None
 
-        # TODO - we should explicitly set these settings to avoid
-        # TODO - dependency issues/ordering...
-        # Set settings from file.
-        self.set_attributes(**config["settings"])
+        self.column_names = None
+        if self.checkpoint is not None:
+            self.column_names = self.checkpoint.get("column_names")
+        if getattr(self, "csv", None) is not None:
+            self.csv.clear()
 
-        # Override settings from file with CLI arguments if present.
-        self.set_attributes(**cli_settings)
+        self.writer = ResultWriter(self.fh)
+        # Findings not handed to the writer yet.
+        self._pending = []
 
-        if self.delimiter:
-            self.delimiter = self.delimiter.encode(self.file_encoding)
+        if getattr(self, "dedup", None) == "file":
+            self.deduper = Deduper(self.dedup_memory)
+        # First occurrences per filter label.
+        self._unique = {}
+
+        if getattr(self, "stats", None) is not None:
+            self.stats.reset()
 
         # Counters
         self.failed_sanity = 0
         self.passed_sanity = 0
 
+        # [failures, passes] per (filter label, column number).
+        self._counts = {}
+
+        if self.checkpoint is not None:
+            self.failed_sanity = self.checkpoint["failures"]
+            self.passed_sanity = self.checkpoint["passes"]
+            self.add_counts(self.checkpoint.get("counts"))
+
         self._time_delta = None
 
-        self.filters = [
-            Filter(filter_dict=filter_, gzip=self.gzip) for filter_ in config["filters"]
-        ]
+        # When set to a list, findings are collected here instead of
+        # being logged. See 'scan_range'.
+        self.findings = None
+
+        # The dedup keys of the collected findings, in the same order,
+        # so another process can deduplicate them across files.
+        self.finding_keys = []
+
+        # When set to a list, findings are also kept here after being
+        # logged (ex: to store them in the scan cache).
+        self.found = None
+
+    def checkpoint_name(self):
+        """Return the name of the checkpoint file of the file."""
+        return checkpoint_file_name(self.file_name, self.checkpoint_dir)
+
+    def save_checkpoint(self, offset, lines, stat_result, **state):
+        """Record how far the scan of the file got.
+
+        :param offset: Offset just after the last line scanned.
+        :param lines: Number of lines scanned.
+        :param stat_result: os.stat result of the scanned file, used to
+            tell if the file was replaced when resuming.
+        :param state: Extra values to save.
+        """
+        # Findings before the checkpoint must not be lost if the scan
+        # stops, whether they go to a results file or to stdout.
+        self.flush_results()
+        output_offset = None
+        if self.fh is not None:
+            output_offset = self.fh.tell()
+
+        return save_checkpoint(
+            self.checkpoint_name(),
+            {
+                "file_name": self.file_name,
+                **file_identity(stat_result),
+                "size": stat_result.st_size,
+                "mtime_ns": stat_result.st_mtime_ns,
+                "offset": offset,
+                "lines": lines,
+                "failures": self.failed_sanity,
+                "passes": self.passed_sanity,
+                "counts": self.counts(),
+                "column_names": self.column_names,
+                "output_offset": output_offset,
+                **state,
+            },
+        )
 
     def set_attributes(self, **kwargs):
         """Sets attributes for the TxtFerret object.
@@ -291,9 +933,20 @@ class TxtFerret:
             if setting not in ALLOWED_SETTINGS_KEYS:
                 continue
 
-            # ignore_columns will not be a switch, so we want to go
-            # ahead and handle it here instead of trying to determine
-            # if it's a cli_argument further down.
+            # ignore_columns and include_columns will not be switches,
+            # so we want to go ahead and handle them here instead of
+            # trying to determine if it's a cli_argument further down.
+            if setting == "include_columns":
+                value = {int(column) for column in value or []}
+                self.include_columns = value
+                if value:
+                    print_string = ", ".join([str(col) for col in sorted(value)])
+                    log_message = f"Columns set to be scanned: {print_string}"
+                    logger.info(log_message)
+                    if self.fh is not None:
+                        self.fh.write(f"{log_message}\n")
+                continue
+
             if setting == "ignore_columns":
                 if value is not None and value:
                     value = {int(column) for column in value}
@@ -333,12 +986,37 @@ class TxtFerret:
             setattr(self, setting, value)
 
     def summary(self):
-        return {
+        summary = {
             "file_name": self.file_name,
             "failures": self.failed_sanity,
             "passes": self.passed_sanity,
             "time": self._time_delta.seconds,
+            "counts": self.counts(),
         }
+        if self.column_names:
+            summary["column_names"] = self.column_names
+        if self.deduper is not None:
+            summary["unique"] = self.unique()
+        if self.stats is not None:
+            summary["stats"] = self.stats.as_dict()
+        return summary
+
+    def counts(self):
+        """Return the sanity check counts per filter and column.
+
+        :return: List of [filter label, column, failures, passes]
+            lists. column is the column number (starting at 1) for
+            delimited files and None otherwise.
+        """
+        return count_rows(self._counts)
+
+    def add_counts(self, counts):
+        """Add counts returned by 'counts' (ex: by another process)."""
+        add_counts(self._counts, counts)
+
+    def unique(self):
+        """Return the first occurrences reported per filter label."""
+        return dict(self._unique)
 
     def _get_file_size(self):
         """Return file size in Megabytes."""
@@ -346,51 +1024,70 @@ class TxtFerret:
         mb = file_.stat().st_size / 1024 / 1024
         return mb
 
-    def scan_file(self, file_name=None):
+    def scan_file(self, file_name=None, range_results=None):
         """Manage/coordinate the file scan.
 
         :param file_name: Name of the file to scan.
+        :param range_results: List of 'scan_range' results covering
+            the whole file, in file order. When given, the file was
+            already scanned by other processes and only the results
+            are written.
         """
 
         start = datetime.now()
 
         file_to_scan = file_name or self.file_name
 
-        log_message = f"Beginning scan for {file_to_scan}"
-        logger.info(log_message)
-        if self.fh is not None:
-            self.fh.write(f"{log_message}\n")
-
-        log_headers = LOG_HEADERS
-
-        if self.fh is not None:
-            self.fh.write(f"{log_headers}\n")
+        resuming = self.checkpoint is not None and range_results is None
 
-        if not self.gzip:
-            _open = open
+        if resuming:
+            # The results file already holds the headers and the
+            # findings up to the checkpoint.
+            log_message = (
+                f"Resuming scan for {file_to_scan} from line "
+                f"{self.checkpoint['lines'] + 1}"
+            )
+            logger.info(log_message)
+            if self.fh is not None:
+                self.fh.write(f"{log_message}\n")
         else:
-            _open = gzip.open
+            log_message = f"Beginning scan for {file_to_scan}"
+            logger.info(log_message)
+            if self.fh is not None:
+                self.fh.write(f"{log_message}\n")
 
-        with _open(file_to_scan, "rb") as rf:
-            for index, line in enumerate(rf):
+            log_headers = LOG_HEADERS
+            if self.scan_mode == "window":
+                log_headers = WINDOW_LOG_HEADERS
 
-                # if isinstance(line, bytes):
-                #    line = str(line)
+            if self.fh is not None:
+                self.fh.write(f"{log_headers}\n")
 
-                # If delimiter, then treat file as if it has columns.
-                if self.delimiter:
-                    self._scan_delimited_line(line, index)
-                    continue
+        if range_results is not None:
+            self.merge_ranges(range_results)
+        else:
+            # Checkpoints are only saved by scans made by one process.
+            ranges = [] if resuming else self._parallel_ranges(file_to_scan)
 
-                # Treat file as a flat file without columns.
-                self._scan_non_delimited_line(line, index)
+            if len(ranges) > 1:
+                self._scan_parallel(file_to_scan, ranges)
+            else:
+                self._scan_serial(file_to_scan)
 
         end = datetime.now()
         self._time_delta = end - start
 
+        if range_results is not None:
+            # Report the time the ranges took to scan, not to write.
+            self._time_delta = timedelta(
+                seconds=sum(result.get("time", 0) for result in range_results)
+            )
+
         delta_seconds = str(self._time_delta.seconds)
         delta_minutes = str(self._time_delta.seconds // 60)
 
+        self.flush_results()
+
         finished_message = (
             f"Finished scan for {self.file_name} in {delta_seconds} seconds "
             f"(~{delta_minutes} minutes)."
@@ -398,58 +1095,708 @@ class TxtFerret:
         logger.info(finished_message)
         if self.fh is not None:
             self.fh.write(f"{finished_message}\n")
+        self.close_output()
+
+    def _log_finding(self, label, index, column, string_to_log, offset=None):
+        """Queue a finding for the results writer.
+
+        :param label: Label of the filter which matched.
+        :param index: The line number.
+        :param column: Column number (starting at 0) if delimited.
+        :param string_to_log: The (masked) string that matched.
+        :param offset: Offset of the match in the file (window mode).
+        """
+        record = (self.file_name, label, index, column, string_to_log)
+        if offset is None:
+            record += (self.column_names,)
+        else:
+            record += (self.column_names, offset)
+        self._pending.append(record)
+        if len(self._pending) >= WRITE_BATCH:
+            self.writer.write(self._pending)
+            self._pending = []
+
+    def flush_results(self):
+        """Write every queued finding to the results."""
+        self.writer.write(self._pending)
+        self._pending = []
+        self.writer.flush()
+
+    def close_output(self):
+        """Write the queued findings and close the results file."""
+        self.writer.write(self._pending)
+        self._pending = []
+        self.writer.close()
+        if self.fh is not None and not self.fh.closed:
             self.fh.close()
 
+    def _scan_serial(self, file_to_scan):
+        """Scan the whole file in this process.
+
+        Saves checkpoints along the way when they are turned on and
+        picks up from the checkpoint loaded for the file, if any. The
+        checkpoint is removed once the scan is done.
+
+        :param file_to_scan: Name of the file to scan.
+        """
+        offset = index = 0
+        if self.checkpoint is not None:
+            offset = self.checkpoint["offset"]
+            index = self.checkpoint["lines"]
+
+        if self.resume or self.checkpoint_bytes or self.checkpoint_seconds:
+            self._scan_stat = os.stat(file_to_scan)
+            self._checkpointer = Checkpointer(
+                self.checkpoint_bytes, self.checkpoint_seconds, offset
+            )
+
+        if self.record_length:
+            self._scan_fixed_records(file_to_scan, offset, index)
+        elif self._scan_mapped(file_to_scan, offset, index=index) is None:
+            if not self.gzip:
+                self._scan_stream(file_to_scan, offset, index=index)
+            else:
+                # Gzip data can only be inflated from the start of a
+                # member, so inflate from the last indexed member
+                # before the offset and drop what was already scanned.
+                start = inflated = 0
+                gzip_index = load_index(file_to_scan) if offset else None
+                for compressed, checkpoint_inflated, _ in (gzip_index or {}).get(
+                    "checkpoints", []
+                ):
+                    if checkpoint_inflated <= offset:
+                        start, inflated = compressed, checkpoint_inflated
+                self._scan_stream(
+                    file_to_scan,
+                    start,
+                    index=index,
+                    skip=offset - inflated,
+                    offset=offset,
+                )
+
+        if self._checkpointer is not None:
+            remove_checkpoint(self.checkpoint_name())
+            self._checkpointer = None
+
+    def _segment_size(self, size):
+        """Return the bytes to scan between two chances to checkpoint.
+
+        Blocks and windows are cut to 'checkpoint_bytes' so checkpoints
+        are saved as often as asked for.
+
+        :param size: Size of the blocks (or windows) to scan.
+        """
+        if self._checkpointer is not None and self.checkpoint_bytes:
+            return min(size, self.checkpoint_bytes)
+        return size
+
+    def _checkpoint_due(self, offset):
+        """Return True if a checkpoint should be saved at offset.
+
+        Never in the middle of a CSV record spanning several lines.
+        """
+        if self.csv is not None and self.csv.pending:
+            return False
+        return self._checkpointer is not None and self._checkpointer.due(offset)
+
+    def _save_progress(self, offset, lines, **state):
+        """Save a checkpoint of the scan in progress.
+
+        :param offset: Offset just after the last line scanned. For
+            gzipped files, the number of inflated bytes scanned.
+        :param lines: Number of lines scanned.
+        :param state: Extra values to save.
+        """
+        self.save_checkpoint(offset, lines, self._scan_stat, **state)
+        self._checkpointer.reset(offset)
+
+    def scan_range(self, start, end):
+        """Scan the lines in a byte range of the file.
+
+        Used by worker processes when a single file is split between
+        them. Findings are collected with line numbers relative to the
+        start of the range instead of being logged, so the parent
+        process can write them in order with absolute line numbers.
+
+        :param start: Offset of the first line in the range.
+        :param end: Offset just after the last line in the range.
+
+        :return: dict with the findings, counters and number of lines
+            in the range. When deduplicating, the dedup keys of the
+            findings too, as the same value may show up in other ranges.
+        """
+        self.findings = []
+        self.finding_keys = []
+        start_time = datetime.now()
+
+        lines = self._scan_mapped(self.file_name, start, end, count_lines=True)
+        if lines is None:
+            lines = self._scan_stream(self.file_name, start, end)
+
+        result = {
+            "findings": self.findings,
+            "failures": self.failed_sanity,
+            "passes": self.passed_sanity,
+            "counts": self.counts(),
+            "lines": lines,
+            "time": (datetime.now() - start_time).total_seconds(),
+        }
+        if self.deduper is not None:
+            result["dedup_keys"] = self.finding_keys
+        if self.stats is not None:
+            result["stats"] = self.stats.as_dict()
+        return result
+
+    def merge_ranges(self, range_results):
+        """Write the findings of ranges scanned by other processes.
+
+        :param range_results: Iterable of 'scan_range' results in file
+            order.
+        """
+        for result in merge_findings(range_results):
+            self.failed_sanity += result["failures"]
+            self.passed_sanity += result["passes"]
+            self.add_counts(result.get("counts"))
+            if self.stats is not None:
+                self.stats.add(result.get("stats"))
+
+            keys = None
+            if self.deduper is not None:
+                keys = result.get("dedup_keys")
+
+            for i, finding in enumerate(result["findings"]):
+                index, column, position, string_to_log, *offset = finding
+                label = self.filters[position].label
+                if keys is not None and not self._first_occurrence(label, keys[i]):
+                    continue
+
+                self._log_finding(label, index, column, string_to_log, *offset)
+
+                if self.found is not None:
+                    self.found.append(tuple(finding))
+
+    def _parallel_ranges(self, file_to_scan):
+        """Return the byte ranges to scan in parallel (if any).
+
+        :param file_to_scan: Name of the file to scan.
+        """
+        if (
+            self.workers < 2
+            or self.csv is not None
+            or self.record_length
+            or self.scan_mode == "window"
+        ):
+            return []
+        return file_ranges(file_to_scan, self.workers, gzip=self.gzip)
+
+    def _scan_parallel(self, file_to_scan, ranges):
+        """Scan byte ranges of a file in worker processes.
+
+        Results are written as each range finishes, in file order.
+
+        :param file_to_scan: Name of the file to scan.
+        :param ranges: List of (start, end) byte ranges. Compressed
+            offsets of gzip index checkpoints for gzipped files.
+        """
+        # Workers scan with a single process each and must not open
+        # (and truncate) the output file.
+        worker_config = copy.deepcopy(self._config)
+        worker_config["cli_kwargs"].update(
+            {"file_name": file_to_scan, "output_file": None, "workers": 1}
+        )
+
+        tasks = [(worker_config, start, end) for start, end in ranges]
+
+        with mp.Pool(min(self.workers, len(tasks) or 1)) as pool:
+            self.merge_ranges(pool.imap(_scan_range_task, tasks))
+
+    def _scan_mapped(self, file_to_scan, start=0, end=None, count_lines=False, index=0):
+        """Scan an uncompressed file in block mode through a memory map.
+
+        Lets the regex engine read the file straight from the page
+        cache instead of copying it into blocks.
+
+        :param file_to_scan: Name of the file to scan.
+        :param start: Offset of the first line to scan.
+        :param end: Offset just after the last line to scan.
+        :param count_lines: Count the lines in the range when done.
+        :param index: Line number of the first line to scan.
+
+        :return: None if the file was not scanned (gzip, line mode or
+            the file cannot be mapped). Otherwise the number of lines
+            in the range if count_lines is True, else 0.
+        """
+        if self.scan_mode != "block" or self.gzip:
+            return None
+
+        with open_mmap(file_to_scan) as mapped:
+            if mapped is None:
+                return None
+
+            if end is None:
+                end = len(mapped)
+
+            counter = LineCounter(
+                mapped, index=index, offset=start, chunk_size=self.block_size
+            )
+            first = start
+
+            if self._checkpointer is None:
+                self._scan_block(mapped, counter, start, end)
+            else:
+                # Scan in newline aligned segments so the progress can
+                # be saved between them.
+                block_size = self._segment_size(self.block_size)
+                while start < end:
+                    cut = mapped.find(b"\n", start + block_size - 1, end)
+                    segment_end = end if cut == -1 else cut + 1
+                    self._scan_block(mapped, counter, start, segment_end)
+                    start = segment_end
+                    if self._checkpoint_due(start):
+                        self._save_progress(start, counter.line_at(start))
+
+            if self.stats is not None:
+                self.stats.add_scanned(end - first, counter.line_at(end) - index)
+
+            if not count_lines:
+                return 0
+            return counter.line_at(end)
+
+    def _scan_stream(
+        self, file_to_scan, start=0, end=None, index=0, skip=0, offset=None
+    ):
+        """Scan a file by reading it from start to end.
+
+        Used for gzipped files, line and window mode and for files which
+        cannot be memory mapped. Gzipped files are inflated on a separate
+        thread while they are scanned.
+
+        :param file_to_scan: Name of the file to scan.
+        :param start: Offset of the first line to scan. For gzipped
+            files, the compressed offset of a gzip index checkpoint.
+        :param end: Offset just after the last line to scan.
+        :param index: Line number of the first line to scan.
+        :param skip: Inflated bytes to drop before scanning (gzip).
+        :param offset: Offset of the first line scanned, as saved in
+            checkpoints. Defaults to start for uncompressed files and 0
+            for gzipped files.
+
+        :return: Line number after the last line scanned.
+        """
+        if offset is None:
+            offset = 0 if self.gzip else start
+        first = index
+
+        if self.gzip:
+            reader = GzipBlockReader(
+                file_to_scan,
+                chunk_size=self._segment_size(self.block_size),
+                start=start,
+                end=end,
+            )
+            size = None
+        else:
+            reader = open(file_to_scan, "rb")
+            reader.seek(start)
+            size = None if end is None else end - start
+
+        with reader as rf:
+            if skip:
+                rf = SkippingReader(rf, skip)
+
+            if self.scan_mode == "block":
+                block_size = self._segment_size(self.block_size)
+                for block in iter_blocks(rf, block_size, size):
+                    index = self.scan_lines(block, index)
+                    offset += len(block)
+                    if self._checkpoint_due(offset):
+                        self._save_progress(offset, index)
+            elif self.scan_mode == "window":
+                index = self._scan_windows(rf, offset, index)
+            else:
+                for line in self._iter_lines(rf, size):
+                    self._scan_line(line, index)
+                    index += 1
+                    offset += len(line)
+                    if self._checkpoint_due(offset):
+                        self._save_progress(offset, index)
+
+            if self.stats is not None:
+                if self.gzip:
+                    scanned = reader.inflated - skip
+                else:
+                    scanned = reader.tell() - start
+                    if size is not None:
+                        scanned = min(scanned, size)
+                self.stats.add_scanned(scanned, index - first)
+
+        if self.csv is not None:
+            self._scan_records(self.csv.finish())
+
+        if self.gzip and self.gzip_index and start == 0 and end is None:
+            save_index(file_to_scan, make_index(file_to_scan, reader))
+
+        return index
+
+    def _iter_lines(self, rf, size=None):
+        """Yield the lines read from a file or GzipBlockReader.
+
+        :param rf: Open file or GzipBlockReader.
+        :param size: Stop after this many bytes. Only for files.
+        """
+        if self.gzip:
+            for block in iter_blocks(rf, self.block_size):
+                # Iterating a BytesIO splits on b"\n" just like a file.
+                yield from io.BytesIO(block)
+            return
+
+        for line in rf:
+            if size is not None:
+                if size <= 0:
+                    return
+                size -= len(line)
+            yield line
+
+    def scan_lines(self, block, index=0):
+        """Scan a block of complete lines.
+
+        :param block: Lines as bytes, the last one may be missing its
+            newline.
+        :param index: Line number of the first line in block.
+
+        :return: Line number just after the block.
+        """
+        if self.scan_mode == "block":
+            counter = LineCounter(block, index=index)
+            self._scan_block(block, counter)
+            return counter.line_at(len(block))
+
+        for line in io.BytesIO(block):
+            self._scan_line(line, index)
+            index += 1
+        return index
+
+    def _scan_line(self, line, index):
+        """Scan a single line from the file.
+
+        :param line: One line from a file (bytes).
+        :param index: The line number.
+        """
+        if self.csv is not None:
+            self._scan_csv_line(line, index)
+            return
+
+        if self.fixed is not None:
+            self._scan_fixed_record(line, index)
+            return
+
+        # If delimiter, then treat file as if it has columns.
+        if self.delimiter:
+            self._scan_delimited_line(line, index)
+            return
+
+        # Treat file as a flat file without columns.
+        self._scan_non_delimited_line(line, index)
+
+    def _scan_block(self, block, counter, start=0, end=None):
+        """Scan a block of complete lines.
+
+        The filters are searched over the whole block at once. Line
+        numbers are only worked out (by counting newlines) for lines
+        holding a hit, which are then scanned like any other line.
+
+        :param block: bytes-like object holding complete lines. This
+            can be a memory map so the regex reads the file directly.
+        :param counter: LineCounter for the block.
+        :param start: Offset in block where the first line begins.
+        :param end: Offset in block just after the last line.
+        """
+        if end is None:
+            end = len(block)
+
+        for line_start, line_end in self.plan.candidate_lines(block, start, end):
+            index = counter.line_at(line_start)
+            self._scan_line(block[line_start:line_end], index)
+
+    def _scan_windows(self, rf, offset=0, index=0):
+        """Scan a file in overlapping windows instead of lines.
+
+        Memory stays bounded by the window size however long the lines
+        of the file are (ex: a file without newlines). Matches stop at
+        newlines like in line mode (see 'line_matches'). Each match is
+        reported once, by the window it starts in, with its offset and
+        line number.
+
+        :param rf: Open file or GzipBlockReader, at offset.
+        :param offset: Offset of the first byte read.
+        :param index: Line number at offset.
+
+        :return: Line number at the end of the file.
+        """
+        # Offset in the file just after the last match of each filter,
+        # so a match shared by two windows is only reported once.
+        resume = [0] * len(self.filters)
+        if self.checkpoint is not None and self.checkpoint.get("window_resume"):
+            resume = self.checkpoint["window_resume"]
+
+        for window, window_offset, start, end in iter_windows(
+            rf, self._segment_size(self.window_size), self.window_overlap, offset
+        ):
+            index = self._scan_window(window, window_offset, start, end, index, resume)
+            if self._checkpoint_due(window_offset + end):
+                self._save_progress(window_offset + end, index, window_resume=resume)
+
+        return index
+
+    def _scan_window(self, window, window_offset, start, end, index, resume):
+        """Scan the matches starting in the bytes a window owns.
+
+        Matches are reported in the order they appear in the file,
+        whatever the window size.
+
+        :param window: Bytes of the window (see 'iter_windows').
+        :param window_offset: Offset in the file of window[0].
+        :param start: Offset in window of the first byte it owns.
+        :param end: Offset in window just after the last byte it owns.
+        :param index: Line number at start.
+        :param resume: List of offsets in the file per filter, scanning
+            resumes past them. Updated with the matches found.
+
+        :return: Line number at end.
+        """
+        counter = LineCounter(window, index=index, offset=start)
+
+        if self.plan.combined and self.plan.search(window, start) is None:
+            return counter.line_at(end)
+
+        found = []
+        for filter_ in self.filters:
+            groups = filter_.regex.groups
+            pos = max(start, resume[filter_.position] - window_offset)
+            for match in line_matches(filter_.regex, window, pos, end):
+                # The same values 'findall' returns in line mode.
+                if not groups:
+                    value = match.group()
+                elif groups == 1:
+                    value = match.group(1)
+                else:
+                    value = match.groups()
+                found.append((match.start(), filter_, value))
+                resume[filter_.position] = window_offset + match.end()
+
+        found.sort(key=lambda hit: hit[0])
+
+        # Consecutive matches of a filter in a line are handled in one
+        # batch.
+        hits = groupby(
+            found, key=lambda hit: (counter.line_at(hit[0]), hit[1].position)
+        )
+        for (line, _), line_hits in hits:
+            matches, offsets = [], []
+            for match_start, filter_, value in line_hits:
+                if not (filter_.has_exclusions and filter_.excluded(value)):
+                    matches.append(value)
+                    offsets.append(window_offset + match_start)
+            if matches:
+                self._handle_matches(filter_, matches, line, offsets=offsets)
+
+        return counter.line_at(end)
+
     def _scan_delimited_line(self, line, index):
         """Scan a delimited line.
 
+        Only the columns holding a hit of the combined regex are cut
+        out of the line when the filters allow it, otherwise the line
+        is split once (see ColumnPlan).
+
         :param line: String of text. One line from a file.
         :param index: The line number.
         """
-        for filter_ in self.filters:
+        if self._line_gate:
+            columns = self.columns.hit_columns(line, self.plan.search)
+        else:
+            columns = self.columns.split(line)
 
-            # Make sure to convert to bytecode/hex if necessary.
-            # For example... Start Of Header (SOH).
-            delimiter = _byte_code_to_string(self.delimiter, self.file_encoding)
+        self._scan_columns(columns, index)
 
-            columns = line.split(delimiter)
+    def _scan_fixed_records(self, file_to_scan, offset=0, index=0):
+        """Scan a file made of fixed length records without newlines.
 
-            column_map = get_column_map(
-                columns=columns, filter_=filter_, ignore_columns=self.ignore_columns
+        Record numbers are reported as line numbers. Uncompressed files
+        are scanned through a memory map, others are read in blocks of
+        whole records.
+
+        :param file_to_scan: Name of the file to scan.
+        :param offset: Offset of the first record to scan.
+        :param index: Record number of the first record to scan.
+        """
+        first_offset, first = offset, index
+
+        if not self.gzip:
+            with open_mmap(file_to_scan) as mapped:
+                if mapped is not None:
+                    with memoryview(mapped) as view:
+                        index = self._scan_mapped_records(view, offset, index)
+                    if self.stats is not None:
+                        self.stats.add_scanned(len(mapped) - offset, index - first)
+                    return
+
+        if self.gzip:
+            reader = GzipBlockReader(
+                file_to_scan, chunk_size=self._segment_size(self.block_size)
             )
+        else:
+            reader = open(file_to_scan, "rb")
+            reader.seek(offset)
 
-            for column_number, column_match_list in column_map.items():
-                for column_match in column_match_list:
+        with reader as rf:
+            if self.gzip and offset:
+                rf = SkippingReader(rf, offset)
 
-                    if not sanity_test(
-                        filter_, column_match, encoding=self.file_encoding
-                    ):
-                        self.failed_sanity += 1
+            block_size = self._segment_size(self.block_size)
+            for block in iter_records(rf, self.record_length, block_size):
+                index = self._scan_record_block(memoryview(block), index)
+                offset += len(block)
+                if self._checkpoint_due(offset):
+                    self._save_progress(offset, index)
 
-                        continue
+        if self.stats is not None:
+            self.stats.add_scanned(offset - first_offset, index - first)
 
-                    self.passed_sanity += 1
+    def _scan_mapped_records(self, view, offset=0, index=0):
+        """Scan the fixed length records of a memory mapped file.
 
-                    _string_to_log = mask(
-                        column_match,
-                        filter_.mask_value,
-                        filter_.mask_index,
-                        mask=self.mask,
-                        encoding_=self.file_encoding,
-                        show_matches=self.show_matches,
-                    )
-                    # Print a str instead of byte-string
-                    string_to_log = _string_to_log.decode(self.file_encoding)
-
-                    if not self.summarize:
-                        log_success(
-                            self.file_name,
-                            filter_,
-                            index,
-                            string_to_log,
-                            self.fh,
-                            column=int(column_number),
-                        )
+        :param view: memoryview of the memory map.
+        :param offset: Offset of the first record to scan.
+        :param index: Record number of the first record to scan.
+
+        :return: Record number after the last record scanned.
+        """
+        records = max(self._segment_size(self.block_size) // self.record_length, 1)
+        block_size = records * self.record_length
+        for start in range(offset, len(view), block_size):
+            end = min(start + block_size, len(view))
+            index = self._scan_record_block(view[start:end], index)
+            if self._checkpoint_due(end):
+                self._save_progress(end, index)
+        return index
+
+    def _scan_record_block(self, block, index):
+        """Scan a block of fixed length records.
+
+        When the filters allow it, the block is searched at once and
+        only the records holding a hit are scanned.
+
+        :param block: memoryview of whole records. The last one may be
+            partial at the end of the file.
+        :param index: Record number of the first record in block.
+
+        :return: Record number just after the block.
+        """
+        length = self.record_length
+
+        if self._line_gate:
+            pos = 0
+            while pos < len(block):
+                hit = self.plan.search(block, pos)
+                if hit is None:
+                    break
+                start = hit.start() - hit.start() % length
+                self._scan_record(
+                    block[start : start + length], index + start // length
+                )
+                pos = start + length
+        else:
+            for start in range(0, len(block), length):
+                self._scan_record(
+                    block[start : start + length], index + start // length
+                )
+
+        return index - (-len(block) // length)
+
+    def _scan_record(self, record, index):
+        """Scan a fixed length record.
+
+        :param record: memoryview of the record.
+        :param index: The record number.
+        """
+        if self.fixed is not None:
+            self._scan_columns(self.fixed.slices(record), index)
+        else:
+            self._scan_non_delimited_line(record, index)
+
+    def _scan_fixed_record(self, record, index):
+        """Scan the fixed width columns of a line or record.
+
+        :param record: One line or record from a file (bytes-like).
+        :param index: The line or record number.
+        """
+        if self._line_gate and self.plan.search(record) is None:
+            return
+        self._scan_columns(self.fixed.slices(record), index)
+
+    def _scan_csv_line(self, line, index):
+        """Scan a line of a CSV file.
+
+        Lines without quotes are scanned like any delimited line. Lines
+        holding one are scanned once the record they belong to is
+        complete, with the line number of its first line.
+
+        :param line: One line from a file (bytes).
+        :param index: The line number.
+        """
+        records = self.csv.feed(line, index)
+        if records is None:
+            if index or not self.csv_header:
+                self._scan_delimited_line(line, index)
+                return
+            records = [(index, self.csv.split(line))]
+        self._scan_records(records)
+
+    def _scan_records(self, records):
+        """Scan CSV records, reading the header from the first one.
+
+        :param records: List of (line number, columns) tuples.
+        """
+        for index, columns in records:
+            if index == 0 and self.csv_header:
+                self.set_column_names(columns)
+                continue
+            self._scan_columns(self.columns.select(columns), index)
+
+    def set_column_names(self, columns):
+        """Set the column names reported with findings.
+
+        :param columns: The columns of the header record (bytes).
+        """
+        self.column_names = [
+            column.decode(self.file_encoding, errors="replace").strip()
+            for column in columns
+        ]
+
+    def _scan_columns(self, columns, index):
+        """Scan the columns of a line.
+
+        Each column is run through the scan plan, so only the filters
+        with a hit in a column run their own regex over it. Matches are
+        handled filter by filter, each filter's columns in order.
+
+        :param columns: Iterable of (column index, column) tuples.
+        :param index: The line number.
+        """
+        results = []
+        for column, text in columns:
+            for filter_, matches in self.plan.findall(text):
+                results.append((filter_.position, column, filter_, matches))
+
+        if len(results) > 1:
+            # Stable, so the columns of a filter stay in order.
+            results.sort(key=lambda result: result[0])
+
+        for _, column, filter_, matches in results:
+            included = filter_.exclude(matches)
+            if included:
+                self._handle_matches(filter_, included, index, column=column)
 
     def _scan_non_delimited_line(self, line=None, index=None):
         """Scan string assuming there are no columns/delimiters.
@@ -457,53 +1804,152 @@ class TxtFerret:
         :param line: The string of text. One line from a text file.
         :param index: The line number.
         """
-        for filter_ in self.filters:
-            matches = filter_.regex.findall(line)
+        for filter_, matches in self.plan.findall(line):
+            # TODO Add metric for failing exclusions?
+            included = filter_.exclude(matches)
+            if included:
+                self._handle_matches(filter_, included, index)
+
+    def _handle_matches(self, filter_, matches, index, column=None, offsets=None):
+        """Sanity check, mask and log the matches of a filter in a line.
+
+        The matches are sanity checked in one batch. When summarizing,
+        only the counts are kept, the matches are not masked or decoded.
+
+        :param filter_: The Filter object which matched.
+        :param matches: List of matched bytes which passed exclusions.
+        :param index: The line number.
+        :param column: Column number (starting at 0) if delimited.
+        :param offsets: Offsets of the matches in the file (window mode).
+        """
+        if self.deduper is None:
+            passed = self._sanity_test_batch(
+                filter_, matches, encoding=self.file_encoding
+            )
+            report, keys = passed, [None] * len(matches)
+        else:
+            passed, report, keys = self._dedup_matches(filter_, matches)
+
+        passes = sum(passed)
+        failures = len(passed) - passes
+        self.failed_sanity += failures
+        self.passed_sanity += passes
+
+        count_key = (filter_.label, None if column is None else column + 1)
+        entry = self._counts.get(count_key)
+        if entry is None:
+            entry = self._counts[count_key] = [0, 0]
+        entry[0] += failures
+        entry[1] += passes
+
+        if self.summarize or not passes:
+            return
+
+        if offsets is None:
+            offsets = [None] * len(matches)
+
+        for match, match_reported, offset, key in zip(matches, report, offsets, keys):
+            if match_reported:
+                self._handle_match(
+                    filter_, match, index, column=column, offset=offset, key=key
+                )
+
+    def _dedup_matches(self, filter_, matches):
+        """Sanity check the matches of a filter, skipping known values.
+
+        Values are keyed without separators, like in the sanity checks.
+        A value surely seen before passed the sanity checks the first
+        time, so it is counted as a pass without being checked again.
+        Values the Bloom filter takes for repeats are checked, so the
+        counts stay exact even for a false positive.
+
+        :param filter_: The Filter object which matched.
+        :param matches: List of matched bytes which passed exclusions.
+
+        :return: Tuple of lists of (passed sanity checks, first
+            occurrence to report, dedup key) per match.
+        """
+        keys = [
+            dedup_key(filter_.label, filter_.substitute_regex.sub(filter_.empty, match))
+            for match in matches
+        ]
+        seen = [self.deduper.known(key) for key in keys]
+
+        fresh = [match for match, was_seen in zip(matches, seen) if not was_seen]
+        fresh_passed = iter(
+            self._sanity_test_batch(filter_, fresh, encoding=self.file_encoding)
+            if fresh
+            else []
+        )
 
-            if not matches:
+        passed, report = [], []
+        for key, was_seen in zip(keys, seen):
+            if was_seen:
+                passed.append(True)
+                report.append(False)
                 continue
+            match_passed = next(fresh_passed)
+            passed.append(match_passed)
+            report.append(match_passed and self._first_occurrence(filter_.label, key))
+        return passed, report, keys
 
-            for match in matches:
+    def _first_occurrence(self, label, key):
+        """Return True if a value was not seen before, counting it.
 
-                exclusion_found = False
-                for exclusion in filter_.exclude_patterns:
-                    if exclusion.search(match):
-                        exclusion_found = True
+        :param label: Label of the filter which matched.
+        :param key: Dedup key of the value (see 'dedup_key').
+        """
+        if not self.deduper.add(key):
+            return False
+        self._unique[label] = self._unique.get(label, 0) + 1
+        return True
 
-                if exclusion_found:
-                    continue
+    def _handle_match(self, filter_, match, index, column=None, offset=None, key=None):
+        """Mask and log a match which passed exclusions and sanity checks.
 
-                for exclusion_pattern in filter_.exclude_patterns:
-                    if exclusion_pattern.search(match):
-                        # TODO Add metric for failing exclusions?
-                        continue
+        :param filter_: The Filter object which matched.
+        :param match: The matched bytes.
+        :param index: The line number.
+        :param column: Column number (starting at 0) if delimited.
+        :param offset: Offset of the match in the file (window mode).
+        :param key: Dedup key of the match, if deduplicating.
+        """
+        _string_to_log = mask(
+            match,
+            filter_.mask_value,
+            filter_.mask_index,
+            mask=self.mask,
+            encoding_=self.file_encoding,
+            show_matches=self.show_matches,
+        )
 
-                if not sanity_test(filter_, match):
-                    self.failed_sanity += 1
-                    continue
+        # Print a str instead of byte-string
+        string_to_log = _string_to_log.decode(self.file_encoding)
 
-                self.passed_sanity += 1
+        finding = (index, column, filter_.position, string_to_log)
+        if offset is not None:
+            finding += (offset,)
 
-                _string_to_log = mask(
-                    match,
-                    filter_.mask_value,
-                    filter_.mask_index,
-                    mask=self.mask,
-                    encoding_=self.file_encoding,
-                    show_matches=self.show_matches,
-                )
+        if self.findings is not None:
+            self.findings.append(finding)
+            if key is not None:
+                self.finding_keys.append(key)
+            return
 
-                # Print a str instead of byte-string
-                string_to_log = _string_to_log.decode(self.file_encoding)
+        self._log_finding(filter_.label, index, column, string_to_log, offset)
+
+        if self.found is not None:
+            self.found.append(finding)
 
-                if not self.summarize:
-                    log_success(
-                        self.file_name,
-                        filter_,
-                        index,
-                        string_to_log,
-                        file_handler=self.fh,
-                    )
+
+def _scan_range_task(task):
+    """Scan a byte range of a file in a worker process.
+
+    :param task: Tuple of (config, start, end).
+    """
+    config, start, end = task
+    ferret = TxtFerret(config)
+    return ferret.scan_range(start, end)
 
 
 # TODO get_column_map needs tests.
@@ -531,14 +1977,7 @@ def get_column_map(columns=None, filter_=None, ignore_columns=None):
             continue
 
         # Filter out strings that match exclusions.
-        final_matches = []
-        for match in _matches:
-            include = True
-            for exclude_pattern in filter_.exclude_patterns:
-                if exclude_pattern.search(match):
-                    include = False
-            if include:
-                final_matches.append(match)
+        final_matches = filter_.exclude(_matches)
 
         # Fill out the column_map with {"index": "match"}
         for match in final_matches:
@@ -568,7 +2007,11 @@ def sanity_test(filter_, text, sub=True, encoding=DEFAULT_ENCODING, sanity_func=
     _sanity_checker = sanity_func or sanity_check
 
     if sub:
-        _text = re.sub(filter_.substitute, filter_.empty, text)
+        substitute_regex = getattr(filter_, "substitute_regex", None)
+        if substitute_regex is None:
+            _text = re.sub(filter_.substitute, filter_.empty, text)
+        else:
+            _text = substitute_regex.sub(filter_.empty, text)
     else:
         _text = text
 
@@ -579,6 +2022,54 @@ def sanity_test(filter_, text, sub=True, encoding=DEFAULT_ENCODING, sanity_func=
     return True
 
 
+def sanity_test_batch(
+    filter_, texts, sub=True, encoding=DEFAULT_ENCODING, sanity_func=None
+):
+    """Return a list of bools, whether each text passed the sanity checks.
+
+    Each sanity check runs once over the texts which passed the
+    previous checks (see '_sanity.sanity_check_batch').
+
+    :param filter_: Filter object.
+    :param texts: List of texts being tested by the sanity checks.
+    :param sub: Remove the substitute portion before passing texts to
+        sanity checks.
+    :param encoding: Encoding of the texts that will be checked.
+    :sanity_func: Used for tests.
+    """
+    _batch_checker = sanity_func or sanity_check_batch
+
+    if sub:
+        # Filters built outside of 'Filter' (ex: tests) may not have
+        # the compiled substitute.
+        substitute_regex = getattr(filter_, "substitute_regex", None)
+        if substitute_regex is None:
+            substitute_regex = re.compile(filter_.substitute)
+        empty = filter_.empty
+        _texts = [substitute_regex.sub(empty, text) for text in texts]
+    else:
+        _texts = list(texts)
+
+    if len(filter_.sanity) == 1:
+        return list(_batch_checker(filter_.sanity[0], _texts, encoding=encoding))
+
+    passed = [True] * len(_texts)
+    remaining = list(range(len(_texts)))
+
+    for algorithm_name in filter_.sanity:
+        if not remaining:
+            break
+        results = _batch_checker(
+            algorithm_name, [_texts[i] for i in remaining], encoding=encoding
+        )
+        for i, result in zip(remaining, results):
+            if not result:
+                passed[i] = False
+        remaining = [i for i in remaining if passed[i]]
+
+    return passed
+
+
 def log_success(file_name, filter_, index, string_, file_handler, column=None):
     """Log success messages.
 
@@ -588,20 +2079,8 @@ def log_success(file_name, filter_, index, string_, file_handler, column=None):
     "param file_handler: File handler to write logs to.
     :param column: Column which the filter matched some text.
     """
-    matched_string = string_
-    date_time = datetime.now()
-    _column = "N/A"
-    if column is not None:
-        _column = str(column + 1)
-    message = "\t".join(
-        [
-            date_time.ctime(),
-            file_name,
-            filter_.label,
-            str(index + 1),
-            _column,
-            matched_string,
-        ]
+    message = format_finding(
+        datetime.now().ctime(), file_name, filter_.label, index, column, string_
     )
     if file_handler is None:
         logger.info(message)
@@ -0,0 +1,102 @@
+import gzip
+import random
+import re
+
+import pytest
+
+from txtferret._bench import (
+    bench_result,
+    card_number,
+    corpus_files,
+    generate_lines,
+    luhn_digit,
+    worker_counts,
+    write_corpus,
+)
+from txtferret._config import load_config
+from txtferret._sanity import luhn
+from txtferret.core import Filter
+
+
+@pytest.fixture(scope="module")
+def default_filters():
+    config = load_config()
+    return [Filter(filter_dict=f, gzip=False) for f in config["filters"]]
+
+
+def test_luhn_digit():
+    assert luhn_digit("411111111111111") == "1"
+    assert luhn_digit("37828224631000") == "5"
+
+
+@pytest.mark.parametrize("valid", [True, False])
+def test_card_number_matches_default_filters(default_filters, valid):
+    rng = random.Random(0)
+    for _ in range(200):
+        number = card_number(rng, valid=valid).encode()
+        matched = [f for f in default_filters if f.regex.fullmatch(number)]
+        assert len(matched) == 1
+        assert luhn(re.sub(rb"[\W_]", b"", number), "utf-8") == valid
+
+
+def test_generate_lines_deterministic():
+    lines = list(generate_lines(10000, seed=3))
+    assert lines == list(generate_lines(10000, seed=3))
+    assert lines != list(generate_lines(10000, seed=4))
+    assert sum(len(line) for line in lines) >= 10000
+    assert all(line.endswith(b"\n") for line in lines)
+
+
+def test_generate_lines_hit_density(default_filters):
+    lines = list(generate_lines(200000, hit_density=0.1, seed=0))
+    hits = [
+        line for line in lines if any(f.regex.search(line) for f in default_filters)
+    ]
+    assert 0.07 < len(hits) / len(lines) < 0.13
+    assert not list(
+        line
+        for line in generate_lines(200000, hit_density=0)
+        if any(f.regex.search(line) for f in default_filters)
+    )
+
+
+def test_generate_lines_delimiter():
+    for line in generate_lines(5000, delimiter="|", line_length=40, hit_density=0):
+        assert b" " not in line
+        assert len(line.split(b"|")) > 1
+
+
+def test_write_corpus_gzip(tmp_path):
+    file_name = tmp_path / "corpus.txt.gz"
+    written = write_corpus(str(file_name), 50000, compress=True, seed=1)
+    data = gzip.decompress(file_name.read_bytes())
+    assert data == b"".join(generate_lines(50000, seed=1))
+    assert written == {"bytes": len(data), "lines": data.count(b"\n")}
+
+
+def test_corpus_files(tmp_path):
+    written = corpus_files(str(tmp_path / "bulk"), 3, 30000, seed=0)
+    names = sorted(path.name for path in (tmp_path / "bulk").iterdir())
+    assert names == ["bulk_0.txt", "bulk_1.txt", "bulk_2.txt"]
+    sizes = [path.stat().st_size for path in (tmp_path / "bulk").iterdir()]
+    assert written["bytes"] == sum(sizes)
+
+
+@pytest.mark.parametrize(
+    "workers,expected", [(1, [1]), (4, [1, 2, 4]), (6, [1, 2, 4, 6])]
+)
+def test_worker_counts(workers, expected):
+    assert worker_counts(workers) == expected
+
+
+def test_bench_result():
+    result = bench_result("luhn", 2.0, 4 * 1024 * 1024, 100, unit="items", x=1)
+    assert result == {
+        "name": "luhn",
+        "seconds": 2.0,
+        "bytes": 4 * 1024 * 1024,
+        "mb_per_second": 2.0,
+        "items": 100,
+        "items_per_second": 50.0,
+        "x": 1,
+    }
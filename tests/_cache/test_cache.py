@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+from txtferret._cache import ScanCache, config_hash
+
+SUMMARY = {"file_name": "x", "failures": 1, "passes": 2, "time": 0}
+FINDINGS = [(0, None, 1, "4111111111111111"), (5, 2, 0, "REDACTED")]
+
+
+@pytest.fixture
+def scanned_file(tmp_path):
+    file_name = tmp_path / "scanned.txt"
+    file_name.write_bytes(b"some text\n")
+    return str(file_name)
+
+
+def test_cache_round_trip(tmp_path, scanned_file):
+    db_file = str(tmp_path / "cache.db")
+
+    with ScanCache(db_file, "hash") as cache:
+        assert not cache.fresh(scanned_file)
+        cache.put(scanned_file, SUMMARY, FINDINGS)
+
+    with ScanCache(db_file, "hash") as cache:
+        assert cache.fresh(scanned_file)
+        assert cache.get(scanned_file) == (SUMMARY, FINDINGS)
+
+
+def test_cache_stale_when_file_or_config_changes(tmp_path, scanned_file):
+    db_file = str(tmp_path / "cache.db")
+
+    with ScanCache(db_file, "hash") as cache:
+        cache.fresh(scanned_file)
+        cache.put(scanned_file, SUMMARY, FINDINGS)
+
+    with ScanCache(db_file, "other hash") as cache:
+        assert not cache.fresh(scanned_file)
+
+    with ScanCache(db_file, "hash", force=True) as cache:
+        assert not cache.fresh(scanned_file)
+
+    with open(scanned_file, "ab") as wf:
+        wf.write(b"more text\n")
+
+    with ScanCache(db_file, "hash") as cache:
+        assert not cache.fresh(scanned_file)
+
+
+def test_cache_prune(tmp_path, scanned_file):
+    with ScanCache(str(tmp_path / "cache.db"), "hash") as cache:
+        cache.put(scanned_file, SUMMARY, FINDINGS)
+        cache.put(str(tmp_path / "deleted.txt"), SUMMARY, [])
+        os.remove(scanned_file)
+
+        assert cache.prune() == 1
+        assert not cache.fresh(scanned_file)
+
+
+def test_config_hash_ignores_scan_speed_settings():
+    config = {
+        "filters": [{"label": "a", "pattern": "[0-9]+"}],
+        "settings": {"mask": False, "workers": 1},
+        "cli_kwargs": {"file_name": "a.txt", "mask": False},
+    }
+    faster = {
+        **config,
+        "settings": {"mask": False, "workers": 8},
+        "cli_kwargs": {"file_name": "b.txt", "mask": False, "scan_mode": "line"},
+    }
+    masked = {**config, "cli_kwargs": {"file_name": "a.txt", "mask": True}}
+
+    assert config_hash(config) == config_hash(faster)
+    assert config_hash(config) != config_hash(masked)
+
+
+def test_config_hash_allowlist_contents(tmp_path):
+    allowlist = tmp_path / "allow.txt"
+    allowlist.write_text("4111111111111111\n")
+    config = {
+        "filters": [
+            {"label": "a", "pattern": "[0-9]+", "allowlist_file": str(allowlist)}
+        ],
+        "settings": {},
+        "cli_kwargs": {},
+    }
+
+    before = config_hash(config)
+    assert config_hash(config) == before
+
+    allowlist.write_text("4111111111111111\n5555555555554444\n")
+    assert config_hash(config) != before
+
+
+def test_config_hash_window_mode():
+    config = {"filters": [], "settings": {}, "cli_kwargs": {"scan_mode": "block"}}
+    line = {**config, "cli_kwargs": {"scan_mode": "line"}}
+    window = {**config, "cli_kwargs": {"scan_mode": "window"}}
+
+    assert config_hash(config) == config_hash(line)
+    assert config_hash(config) != config_hash(window)
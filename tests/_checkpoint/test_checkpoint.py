@@ -0,0 +1,68 @@
+import os
+
+from txtferret._checkpoint import (
+    Checkpointer,
+    CHECKPOINT_VERSION,
+    checkpoint_file_name,
+    file_identity,
+    load_checkpoint,
+    save_checkpoint,
+)
+
+
+def test_checkpoint_file_name(tmp_path):
+    assert checkpoint_file_name("/var/log/app.log") == "/var/log/app.log.txfck"
+
+    first = checkpoint_file_name("/var/log/a/app.log", str(tmp_path))
+    second = checkpoint_file_name("/var/log/b/app.log", str(tmp_path))
+    assert os.path.dirname(first) == str(tmp_path)
+    assert os.path.basename(first).startswith("app.log-")
+    assert first != second
+
+
+def test_save_and_load_checkpoint(tmp_path):
+    checkpoint_name = str(tmp_path / "scan.txfck")
+
+    assert load_checkpoint(checkpoint_name) is None
+    assert save_checkpoint(checkpoint_name, {"offset": 10, "lines": 2})
+    assert load_checkpoint(checkpoint_name) == {
+        "version": CHECKPOINT_VERSION,
+        "offset": 10,
+        "lines": 2,
+    }
+    assert os.listdir(tmp_path) == ["scan.txfck"]
+
+
+def test_load_checkpoint_wrong_version(tmp_path):
+    checkpoint_name = tmp_path / "scan.txfck"
+    checkpoint_name.write_text('{"version": 0, "offset": 10}')
+    assert load_checkpoint(str(checkpoint_name)) is None
+
+
+def test_save_checkpoint_unwritable(tmp_path):
+    assert not save_checkpoint(str(tmp_path / "missing" / "scan.txfck"), {})
+
+
+def test_file_identity(tmp_path):
+    file_name = tmp_path / "file.txt"
+    file_name.write_bytes(b"")
+    stat_result = os.stat(file_name)
+    assert file_identity(stat_result) == {
+        "device": stat_result.st_dev,
+        "inode": stat_result.st_ino,
+    }
+
+
+def test_checkpointer_bytes():
+    checkpointer = Checkpointer(every_bytes=100, offset=50)
+    assert not checkpointer.due(149)
+    assert checkpointer.due(150)
+    checkpointer.reset(150)
+    assert not checkpointer.due(200)
+
+
+def test_checkpointer_seconds():
+    checkpointer = Checkpointer(every_seconds=60)
+    assert not checkpointer.due(10**9)
+    checkpointer.last_time -= 60
+    assert checkpointer.due(0)
@@ -0,0 +1,59 @@
+import pytest
+
+from txtferret._csv import CsvRecords
+
+
+def test_lines_without_quotes_are_left_to_split():
+    records = CsvRecords()
+    assert records.feed(b"a,4111,b\n", 0) is None
+    assert records.split(b"a,4111,b\n") == [b"a", b"4111", b"b\n"]
+
+
+def test_quoted_delimiter():
+    records = CsvRecords()
+    assert records.feed(b'a,"x, y",4111\n', 3) == [(3, [b"a", b"x, y", b"4111"])]
+
+
+def test_record_spanning_lines():
+    records = CsvRecords()
+    assert records.feed(b'a,"first\n', 0) == []
+    assert records.feed(b"second, still quoted\n", 1) == []
+    assert records.feed(b'end",4111\n', 2) == [
+        (0, [b"a", b"first\nsecond, still quoted\nend", b"4111"])
+    ]
+    assert not records.pending
+    assert records.feed(b"b,c\n", 3) is None
+
+
+def test_escaped_quotes_and_bytes_kept():
+    records = CsvRecords(delimiter=b"\x01")
+    line = 'é\x01"say ""hi"""\x014111\n'.encode("utf-8")
+    assert records.feed(line, 0) == [(0, ["é".encode("utf-8"), b'say "hi"', b"4111"])]
+
+
+def test_stray_quotes_split_as_lines():
+    records = CsvRecords()
+    assert records.feed(b'a,5" tv,b\n', 0) == []
+    assert records.feed(b'c,6" tv\n', 1) == [
+        (0, [b"a", b'5" tv', b"b\n"]),
+        (1, [b"c", b'6" tv\n']),
+    ]
+
+
+def test_unbalanced_quote_gives_up_after_max_lines():
+    records = CsvRecords(max_lines=2)
+    assert records.feed(b'a,"b\n', 5) == []
+    assert records.feed(b"c,d\n", 6) == [(5, [b"a", b'"b\n']), (6, [b"c", b"d\n"])]
+    assert records.finish() == []
+
+
+def test_finish_returns_unfinished_record():
+    records = CsvRecords()
+    records.feed(b'a,"b\n', 0)
+    assert records.finish() == [(0, [b"a", b'"b\n'])]
+    assert not records.pending
+
+
+def test_delimiter_must_be_one_character():
+    with pytest.raises(ValueError):
+        CsvRecords(delimiter=b"||")
@@ -0,0 +1,50 @@
+import pytest
+
+from txtferret._dedup import BloomFilter, Deduper, dedup_key
+
+
+def test_dedup_key_per_label():
+    assert dedup_key("visa", b"4111") == dedup_key("visa", b"4111")
+    assert dedup_key("visa", b"4111") != dedup_key("amex", b"4111")
+    assert len(dedup_key("visa", b"4111")) == 16
+
+
+def test_bloom_filter_no_false_negatives():
+    bloom = BloomFilter(1024)
+    keys = [dedup_key("visa", b"%d" % i) for i in range(bloom.capacity)]
+    assert all(bloom.add(key) for key in keys[:10])
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+
+    others = [dedup_key("amex", b"%d" % i) for i in range(10000)]
+    false_positives = sum(key in bloom for key in others)
+    assert false_positives < 100
+
+
+def test_deduper_exact_set():
+    deduper = Deduper(max_bytes=1024 * 1024)
+    assert deduper.add(b"a" * 16)
+    assert not deduper.add(b"a" * 16)
+    assert deduper.add(b"b" * 16)
+    assert deduper.bloom is None
+    assert deduper.known(b"a" * 16)
+    assert not deduper.known(b"c" * 16)
+
+
+@pytest.mark.parametrize("max_bytes", [1000, 5000])
+def test_deduper_switches_to_bloom_filter(max_bytes):
+    deduper = Deduper(max_bytes=max_bytes)
+    keys = [dedup_key("visa", b"%d" % i) for i in range(200)]
+    assert all(deduper.add(key) for key in keys[:50])
+    assert deduper.bloom is not None
+    assert not deduper.keys
+
+    # Values seen before the switch are still known.
+    assert not any(deduper.add(key) for key in keys[:50])
+    for key in keys[50:]:
+        deduper.add(key)
+    assert not any(deduper.add(key) for key in keys)
+    assert len(deduper.bloom.bits) == max_bytes
+    # The Bloom filter may be wrong, nothing is known for sure.
+    assert not any(deduper.known(key) for key in keys)
@@ -0,0 +1,163 @@
+import os
+
+from loguru import logger
+import pytest
+
+from txtferret._config import load_config
+from txtferret._follow import FollowedFile, follow
+from txtferret.core import TxtFerret
+
+CARD = b"card 4111111111111111\n"
+PLAIN = b"nothing here\n"
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    file_name = tmp_path / "app.log"
+    file_name.write_bytes(PLAIN + CARD)
+    (tmp_path / "out").mkdir()
+    return file_name
+
+
+def make_ferret(log_file):
+    config = load_config()
+    config["cli_kwargs"] = {
+        "file_name": str(log_file),
+        "output_file": str(log_file.parent / "out" / "output.log"),
+        "follow": True,
+    }
+    return TxtFerret(config)
+
+
+def append(file_name, data):
+    with open(file_name, "ab") as wf:
+        wf.write(data)
+
+
+def found_lines(log_file):
+    """Return the line numbers written to the results file."""
+    with open(log_file.parent / "out" / "app.log.results") as rf:
+        rows = [line.split("\t") for line in rf if line.count("\t") == 5]
+    return [int(row[3]) for row in rows if row[3].isdigit()]
+
+
+def test_follow_appended_lines(log_file):
+    ferret = make_ferret(log_file)
+    followed = FollowedFile(ferret)
+
+    assert followed.poll() == len(PLAIN + CARD)
+
+    # A line still being written is left for the next poll.
+    append(log_file, b"card 41111111")
+    assert followed.poll() == 0
+    append(log_file, b"11111111\n" + PLAIN)
+    assert followed.poll() == len(CARD + PLAIN)
+
+    followed.close()
+    ferret.fh.close()
+
+    assert ferret.passed_sanity == 2
+    assert found_lines(log_file) == [2, 3]
+
+
+def test_follow_resumes_from_checkpoint(log_file):
+    ferret = make_ferret(log_file)
+    followed = FollowedFile(ferret)
+    followed.poll()
+    followed.close()
+    ferret.fh.close()
+
+    append(log_file, CARD)
+
+    ferret = make_ferret(log_file)
+    followed = FollowedFile(ferret)
+    assert followed.offset == len(PLAIN + CARD)
+    assert followed.poll() == len(CARD)
+    followed.close()
+    ferret.fh.close()
+
+    assert ferret.passed_sanity == 2
+    assert found_lines(log_file) == [2, 3]
+
+
+def test_follow_rotation(log_file):
+    ferret = make_ferret(log_file)
+    followed = FollowedFile(ferret)
+    followed.poll()
+
+    # The end of the old file is written just before it is rotated.
+    append(log_file, b"last " + CARD[:-1])
+    os.rename(log_file, f"{log_file}.1")
+    log_file.write_bytes(CARD)
+
+    assert followed.poll() == len(b"last " + CARD[:-1] + CARD)
+    followed.close()
+    ferret.fh.close()
+
+    assert ferret.passed_sanity == 3
+    assert found_lines(log_file) == [2, 3, 1]
+
+
+def test_follow_truncation(log_file):
+    ferret = make_ferret(log_file)
+    followed = FollowedFile(ferret)
+    followed.poll()
+
+    log_file.write_bytes(CARD)
+
+    assert followed.poll() == len(CARD)
+    followed.close()
+    ferret.fh.close()
+
+    assert found_lines(log_file) == [2, 1]
+
+
+def stdout_ferret(log_file):
+    config = load_config()
+    config["cli_kwargs"] = {"file_name": str(log_file), "follow": True}
+    return TxtFerret(config)
+
+
+def test_follow_checkpoint_flushes_stdout(log_file):
+    ferret = stdout_ferret(log_file)
+    followed = FollowedFile(ferret)
+
+    assert followed.poll()
+    # Written before the checkpoint moved past them.
+    assert ferret._pending == []
+    followed.close()
+
+
+def test_follow_prints_each_poll(log_file):
+    logged = []
+    sink = logger.add(logged.append, format="{message}")
+    printed = []
+
+    def stop():
+        printed.append(sum("visa_16_ccn" in message for message in logged))
+        if len(printed) == 2:
+            append(log_file, CARD)
+        return len(printed) > 3
+
+    try:
+        follow([stdout_ferret(log_file)], interval=0, stop=stop)
+    finally:
+        logger.remove(sink)
+
+    assert printed == [0, 1, 2, 2]
+
+
+def test_follow_until_stopped(log_file):
+    polls = []
+
+    def stop():
+        polls.append(None)
+        if len(polls) == 2:
+            append(log_file, CARD)
+        return len(polls) > 3
+
+    ferret = make_ferret(log_file)
+    follow([ferret], interval=0, stop=stop)
+
+    assert ferret.fh.closed
+    assert found_lines(log_file) == [2, 3]
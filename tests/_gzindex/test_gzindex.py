@@ -0,0 +1,71 @@
+import gzip
+import os
+
+import pytest
+
+from txtferret._gzindex import (
+    build_index,
+    index_file_name,
+    index_ranges,
+    load_index,
+    save_index,
+)
+
+
+@pytest.fixture
+def multi_member_file(tmp_path):
+    """Ten gzip members of ten lines each plus one split mid-line."""
+    members = [
+        b"".join(b"member %d line %d\n" % (m, i) for i in range(10)) for m in range(10)
+    ]
+    members.append(b"half a ")
+    members.append(b"line\n")
+    file_name = tmp_path / "rotated.log.gz"
+    file_name.write_bytes(b"".join(gzip.compress(member) for member in members))
+    return str(file_name)
+
+
+def test_build_index_checkpoints(multi_member_file):
+    index = build_index(multi_member_file, span=1)
+    checkpoints = index["checkpoints"]
+
+    # The member starting in the middle of a line is not a checkpoint.
+    assert len(checkpoints) == 11
+    assert checkpoints[0] == (0, 0, 0)
+    assert [lines for _, _, lines in checkpoints] == list(range(0, 110, 10))
+    assert index["lines"] == 101
+
+
+def test_build_index_span(multi_member_file):
+    index = build_index(multi_member_file, span=400)
+    assert len(index["checkpoints"]) < 11
+
+
+def test_save_and_load_index(multi_member_file):
+    index = build_index(multi_member_file, span=1)
+    assert save_index(multi_member_file, index) == index_file_name(multi_member_file)
+    assert load_index(multi_member_file)["checkpoints"] == [
+        list(checkpoint) for checkpoint in index["checkpoints"]
+    ]
+
+
+def test_load_index_stale(multi_member_file):
+    save_index(multi_member_file, build_index(multi_member_file, span=1))
+    os.utime(multi_member_file, ns=(0, 0))
+    assert load_index(multi_member_file) is None
+
+
+def test_load_index_missing(multi_member_file):
+    assert load_index(multi_member_file) is None
+
+
+@pytest.mark.parametrize("parts", [1, 2, 3, 20])
+def test_index_ranges(multi_member_file, parts):
+    index = build_index(multi_member_file, span=1)
+    ranges = index_ranges(index, parts)
+
+    assert len(ranges) == min(parts, 11)
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == os.path.getsize(multi_member_file)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start
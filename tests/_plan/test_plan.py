@@ -0,0 +1,279 @@
+import re
+import sys
+
+import pytest
+
+from txtferret._config import load_config
+from txtferret._plan import (
+    ColumnPlan,
+    FixedColumns,
+    PREFILTER_SAMPLE,
+    Prefilter,
+    ScanPlan,
+    block_safe,
+    combine_exclusions,
+    combine_patterns,
+    max_match_length,
+    prefilter_requirements,
+    strip_groups,
+)
+from txtferret.core import Filter
+
+
+@pytest.fixture(scope="module")
+def default_filters():
+    config = load_config()
+    return [Filter(filter_dict=f, gzip=False) for f in config["filters"]]
+
+
+def _per_filter(filters, data):
+    results = []
+    for filter_ in filters:
+        matches = filter_.regex.findall(data)
+        if matches:
+            results.append((filter_, matches))
+    return results
+
+
+def _filter(pattern, label="test"):
+    return Filter(
+        filter_dict={
+            "label": label,
+            "pattern": pattern,
+            "exclude_patterns": [],
+            "mask": {},
+        },
+        gzip=False,
+    )
+
+
+@pytest.mark.parametrize(
+    "pattern,expected",
+    [
+        (b"(4[0-9]{3})", b"(?:4[0-9]{3})"),
+        (b"(?:34|37)(\\d)", b"(?:34|37)(?:\\d)"),
+        (b"\\((a)[(]", b"\\((?:a)[(]"),
+        (b"[](](?P<x>b)", b"[](](?:b)"),
+    ],
+)
+def test_strip_groups(pattern, expected):
+    assert strip_groups(pattern) == expected
+
+
+def test_combine_patterns_names_owner(default_filters):
+    plan = ScanPlan(default_filters)
+    line = b"card 6011000000000004 here"
+    match = plan.search(line)
+    assert plan.owner(line, match.start()).label == "discover_16_ccn"
+
+
+def test_combine_patterns_back_reference_not_combined():
+    filters = [_filter("(a)\\1"), _filter("(b)")]
+    assert combine_patterns(filters) is None
+    assert ScanPlan(filters).combined == False
+
+
+def test_combine_exclusions():
+    regex, separate = combine_exclusions([b"^4111", b"(0004)$", b"(a)\\1"])
+    assert [regex.search(value) is not None for value in (b"41119", b"90004")] == [
+        True,
+        True,
+    ]
+    assert regex.search(b"aa") is None
+    assert [pattern.pattern for pattern in separate] == [b"(a)\\1"]
+
+
+def test_combine_exclusions_empty():
+    assert combine_exclusions([]) == (None, [])
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        b"nothing to see here\n",
+        b"visa 4111111111111111 and amex 378282246310005\n",
+        b"4111-1111-1111-1111,5500 0000 0000 0004,6011000000000004\n",
+        b"overlap 60110000000000041111111111111111\n",
+    ],
+)
+def test_findall_matches_per_filter(default_filters, line):
+    plan = ScanPlan(default_filters)
+    assert plan.findall(line) == _per_filter(default_filters, line)
+
+
+def test_findall_overlapping_filters():
+    filters = [_filter("(abc)", "first"), _filter("(bcd)", "second")]
+    plan = ScanPlan(filters)
+    assert plan.combined
+    assert plan.findall(b"xabcd") == _per_filter(filters, b"xabcd")
+
+
+def test_findall_per_filter_engine(default_filters):
+    plan = ScanPlan(default_filters, combined=False)
+    line = b"visa 4111111111111111\n"
+    assert plan.regex is None
+    assert plan.findall(line) == _per_filter(default_filters, line)
+
+
+@pytest.mark.parametrize(
+    "pattern,expected",
+    [
+        (b"(?:34|37)[0-9]{2}", (4, (b"34", b"37"))),
+        (b"(5[1-5][0-9]{2})\\W?[0-9]{4}", (8, (b"51", b"52", b"53", b"54", b"55"))),
+        (b"\\b4[0-9]{3}", (4, (b"4",))),
+        (b"(?:ab|abc)\\d", (1, (b"ab",))),
+        (b"(?i)card\\d{3}", (3, None)),
+        (b"\\d{3}-\\d{2}|x", (0, None)),
+        (b"[A-Z]{2}\\d{2}", (2, None)),
+        (b"(?:\\d{2}|\\d{4})-?[0-9]", (3, None)),
+        (b"(", (0, None)),
+    ],
+)
+def test_prefilter_requirements(pattern, expected):
+    assert prefilter_requirements(pattern) == expected
+
+
+@pytest.mark.parametrize(
+    "pattern,expected",
+    [
+        (b"4[0-9]{15}", 16),
+        (b"(?:ab|abcd)-?\\d{2}", 7),
+        (b"\\b\\d{4}(?=x)", 4),
+        (b"\\d+", None),
+        (b"(", None),
+    ],
+)
+def test_max_match_length(pattern, expected):
+    assert max_match_length(pattern) == expected
+
+
+@pytest.mark.parametrize(
+    "pattern,expected",
+    [
+        (b"4[0-9]{15}", True),
+        (b"\\b4[0-9]{3}\\b", True),
+        (b"(?:4|5)[0-9]{3}$", False),
+        (b"(4[0-9]{3})+(?!x)", False),
+        (b"(1)?(?(1)^2|3)", False),
+        (b"(", False),
+    ],
+)
+def test_block_safe(pattern, expected):
+    assert block_safe(pattern) == expected
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason="needs atomic groups")
+@pytest.mark.parametrize(
+    "pattern,expected",
+    [
+        (b"(?>4[0-9]{3})", True),
+        (b"(?>^4[0-9]{3})", False),
+        (b"(?>4(?=1))[0-9]{3}", False),
+        (b"(?:^4)*+[0-9]{3}", False),
+        (b"(?:\\b4)++[0-9]{3}", True),
+    ],
+)
+def test_block_safe_atomic(pattern, expected):
+    assert block_safe(pattern) == expected
+
+
+def test_default_filter_requirements(default_filters):
+    requirements = {f.label: (f.min_digits, f.prefixes) for f in default_filters}
+    assert requirements["visa_16_ccn"] == (16, (b"4",))
+    assert requirements["discover_16_ccn"] == (16, (b"6011",))
+    assert requirements["american_express_15_ccn"] == (15, (b"34", b"37"))
+
+
+def test_prefilter_filters_for(default_filters):
+    prefilter = Prefilter(default_filters)
+    assert prefilter.min_digits == 15
+    assert prefilter.filters_for(b"no digits at all") == []
+    assert prefilter.filters_for(b"4111111111111111") == [
+        f for f in default_filters if f.label == "visa_16_ccn"
+    ]
+
+
+def test_prefilter_turns_itself_off(default_filters):
+    prefilter = Prefilter(default_filters)
+    for _ in range(PREFILTER_SAMPLE):
+        prefilter.check(b"2019-05-01 12:00:00.123")
+    assert not prefilter.active
+
+    prefilter = Prefilter(default_filters)
+    for _ in range(PREFILTER_SAMPLE):
+        prefilter.check(b"a line of prose")
+    assert prefilter.active
+
+
+def test_prefilter_disabled_without_requirements():
+    plan = ScanPlan([_filter("(?i)secret"), _filter("[a-z]+")])
+    assert plan.prefilter is None
+
+
+@pytest.mark.parametrize("combined", [True, False])
+def test_findall_with_prefilter(default_filters, combined):
+    with_prefilter = ScanPlan(default_filters, combined=combined)
+    without = ScanPlan(default_filters, combined=combined, prefilter=False)
+    lines = [
+        b"nothing to see here\n",
+        b"4111-1111-1111-1111 and 378282246310005\n",
+        b"only 12 digits 123456789012\n",
+        b"60110000000000045500000000000004\n",
+    ]
+    for line in lines:
+        assert with_prefilter.findall(line) == without.findall(line)
+
+
+def test_column_plan_all_columns():
+    plan = ColumnPlan(b",", ignore_columns={2})
+    assert plan.split(b"a,b,c\n") == [(0, b"a"), (2, b"c\n")]
+
+
+def test_column_plan_include_columns():
+    plan = ColumnPlan(b"\x01", include_columns={4, 2, 5}, ignore_columns={5})
+    assert plan.columns == [1, 3]
+    assert plan.maxsplit == 4
+    line = b"\x01".join([b"a", b"b", b"c", b"d", b"e", b"f\n"])
+    assert plan.split(line) == [(1, b"b"), (3, b"d")]
+    # Short lines only return the columns they have.
+    assert plan.split(b"a\x01b\n") == [(1, b"b\n")]
+
+
+def test_column_plan_everything_ignored():
+    plan = ColumnPlan(b",", include_columns={1}, ignore_columns={1})
+    assert plan.split(b"a,b\n") == []
+
+
+@pytest.mark.parametrize(
+    "include_columns, expected",
+    [
+        (None, [(1, b"1234"), (3, b"56")]),
+        ({2}, [(1, b"1234")]),
+        ({1, 3}, []),
+        ({3, 4}, [(3, b"56")]),
+    ],
+)
+def test_column_plan_hit_columns(include_columns, expected):
+    plan = ColumnPlan(b",", include_columns=include_columns, ignore_columns={5})
+    search = re.compile(rb"\d+").search
+    line = b"a,1234,b,56,78\n"
+    assert list(plan.hit_columns(line, search)) == expected
+    # Same columns as splitting the line and searching each column.
+    assert expected == [(i, column) for i, column in plan.split(line) if search(column)]
+
+
+def test_fixed_columns_slices():
+    columns = FixedColumns([(0, 3), (3, 4), (10, 2)], ignore_columns={1})
+    assert [(i, bytes(column)) for i, column in columns.slices(b"abc1234xyz99\n")] == [
+        (1, b"1234"),
+        (2, b"99"),
+    ]
+    # Short records only return the columns they have.
+    assert [(i, bytes(column)) for i, column in columns.slices(b"abc12")] == [
+        (1, b"12")
+    ]
+
+
+def test_fixed_columns_include_columns():
+    columns = FixedColumns([(0, 3), (3, 4), (10, 2)], include_columns={1, 3})
+    assert [span[0] for span in columns.spans] == [0, 2]
@@ -0,0 +1,159 @@
+import gzip
+import io
+
+import pytest
+
+from txtferret._reader import (
+    GzipBlockReader,
+    LineCounter,
+    SkippingReader,
+    iter_blocks,
+    iter_records,
+    iter_windows,
+    open_mmap,
+    split_ranges,
+)
+
+
+@pytest.mark.parametrize("block_size", [1, 3, 5, 100])
+def test_iter_blocks_end_on_newlines(block_size):
+    data = b"one\ntwo\n\nthree\nfour"
+    blocks = list(iter_blocks(io.BytesIO(data), block_size))
+    assert b"".join(blocks) == data
+    for block in blocks[:-1]:
+        assert block.endswith(b"\n")
+
+
+def test_iter_blocks_empty_file():
+    assert list(iter_blocks(io.BytesIO(b""), 10)) == []
+
+
+@pytest.mark.parametrize("block_size", [1, 5, 7, 100])
+def test_iter_records_whole_records(block_size):
+    data = b"aaaabbbbccccdd"
+    blocks = list(iter_records(io.BytesIO(data), 4, block_size))
+    assert b"".join(blocks) == data
+    for block in blocks[:-1]:
+        assert len(block) % 4 == 0
+    assert blocks[-1].endswith(b"dd")
+
+
+@pytest.mark.parametrize("window_size", [1, 3, 8, 100])
+@pytest.mark.parametrize("overlap", [0, 2, 5])
+def test_iter_windows_own_every_byte_once(window_size, overlap):
+    data = bytes(range(50))
+    expected = 0
+    for window, offset, start, end in iter_windows(
+        io.BytesIO(data), window_size, overlap, offset=10
+    ):
+        assert offset + start - 10 == expected
+        assert window == data[offset - 10 : offset - 10 + len(window)]
+        assert start <= overlap
+        assert len(window) <= window_size + 2 * overlap
+        if end < len(window):
+            # Matches up to 'overlap' long starting in the owned bytes
+            # are whole in the window.
+            assert len(window) - end >= overlap
+        expected = offset + end - 10
+    assert expected == len(data)
+
+
+def test_open_mmap_maps_file(tmp_path):
+    file_name = tmp_path / "mapped.txt"
+    file_name.write_bytes(b"hello\nworld\n")
+    with open_mmap(str(file_name)) as mapped:
+        assert mapped[:5] == b"hello"
+
+
+def test_open_mmap_empty_file(tmp_path):
+    file_name = tmp_path / "empty.txt"
+    file_name.write_bytes(b"")
+    with open_mmap(str(file_name)) as mapped:
+        assert mapped is None
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4, 1024])
+def test_line_counter_with_and_without_count(chunk_size):
+    data = b"a\nb\n\nc\nd"
+
+    class NoCount:
+        def __getitem__(self, item):
+            return data[item]
+
+    for buffer in (data, NoCount()):
+        counter = LineCounter(buffer, index=10, chunk_size=chunk_size)
+        assert counter.line_at(0) == 10
+        assert counter.line_at(4) == 12
+        assert counter.line_at(len(data)) == 14
+
+
+@pytest.mark.parametrize("parts", [1, 2, 3, 7, 50])
+def test_split_ranges_newline_aligned(tmp_path, parts):
+    data = b"first line\nsecond\n\nthird line here\nlast"
+    file_name = tmp_path / "split.txt"
+    file_name.write_bytes(data)
+
+    ranges = split_ranges(str(file_name), parts)
+
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == len(data)
+    assert len(ranges) <= parts
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start
+        assert data[end - 1 : end] == b"\n"
+
+
+def _read_all(reader):
+    chunks = []
+    with reader:
+        while True:
+            chunk = reader.read()
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 16, 1024 * 1024])
+def test_gzip_block_reader_multi_member(tmp_path, chunk_size):
+    first = b"".join(b"line %d\n" % i for i in range(500))
+    second = b"second member\nno newline at end"
+    file_name = tmp_path / "rotated.gz"
+    file_name.write_bytes(gzip.compress(first) + gzip.compress(second))
+
+    reader = GzipBlockReader(str(file_name), chunk_size=chunk_size, queue_size=2)
+    assert _read_all(reader) == first + second
+
+
+@pytest.mark.parametrize("chunk_size", [1, 16, 1024 * 1024])
+def test_gzip_block_reader_zero_padding(tmp_path, chunk_size):
+    first = b"".join(b"line %d\n" % i for i in range(500))
+    second = b"second member\n"
+    padded = gzip.compress(first) + b"\0" * 7 + gzip.compress(second) + b"\0" * 512
+    file_name = tmp_path / "padded.gz"
+    file_name.write_bytes(padded)
+
+    reader = GzipBlockReader(str(file_name), chunk_size=chunk_size, queue_size=2)
+    assert _read_all(reader) == gzip.decompress(padded) == first + second
+
+
+def test_gzip_block_reader_truncated(tmp_path):
+    file_name = tmp_path / "truncated.gz"
+    file_name.write_bytes(gzip.compress(b"hello world\n" * 100)[:-10])
+
+    with pytest.raises(EOFError):
+        _read_all(GzipBlockReader(str(file_name)))
+
+
+def test_gzip_block_reader_stops_early(tmp_path):
+    file_name = tmp_path / "big.gz"
+    file_name.write_bytes(gzip.compress(b"x" * 100000))
+
+    with GzipBlockReader(str(file_name), chunk_size=10, queue_size=1) as reader:
+        assert reader.read() == b"x" * 10
+
+
+@pytest.mark.parametrize("skip", [0, 3, 4, 5, 11, 20])
+def test_skipping_reader(skip):
+    data = b"first\nsecond\nthird\n"
+    reader = SkippingReader(io.BytesIO(data), skip)
+    assert b"".join(iter(lambda: reader.read(4), b"")) == data[skip:]
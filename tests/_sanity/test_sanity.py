@@ -1,6 +1,7 @@
 import pytest
 
-from txtferret._sanity import luhn, sanity_check
+from txtferret import _sanity
+from txtferret._sanity import luhn, luhn_batch, sanity_check, sanity_check_batch
 
 
 # LUHN Algorithm Tests
@@ -50,6 +51,23 @@ def test_luhn_for_value_error_with_delimeters():
         _ = luhn(non_int_with_delims, "utf-8")
 
 
+def test_luhn_bytes_and_encodings(good_luhn_fake_account_num):
+    assert luhn(good_luhn_fake_account_num.encode(), "utf-8") == True
+    assert luhn(good_luhn_fake_account_num.encode("utf-16-le"), "utf-16-le") == True
+    with pytest.raises(ValueError):
+        luhn("12\u0663", "utf-8")
+
+
+def test_luhn_batch(good_luhn_fake_account_num, bad_luhn_fake_account_num):
+    candidates = [
+        good_luhn_fake_account_num.encode(),
+        bad_luhn_fake_account_num.encode(),
+        b"123abc",
+        b"4111111111111111",
+    ]
+    assert luhn_batch(candidates) == [True, False, False, True]
+
+
 # Sanity check function tests
 
 
@@ -96,3 +114,116 @@ def test_sanity_check_algorithm_name_doesnt_exist():
     data = "placeholder"
     with pytest.raises(ValueError) as e_info:
         sanity_check(name, data, encoding="utf-8", sanity_map=test_sanity_map)
+
+
+def test_sanity_check_batch_uses_batch_algorithm():
+    def batch_stub(candidates, encoding):
+        return [candidate == "yes" for candidate in candidates]
+
+    rv = sanity_check_batch("stub", ["yes", "no"], batch_map={"stub": batch_stub})
+    assert rv == [True, False]
+
+
+def test_sanity_check_batch_falls_back_to_single_checks(always_true_algorithm_stub):
+    test_sanity_map = {"always_true": always_true_algorithm_stub}
+    rv = sanity_check_batch("always_true", ["a", "b"], sanity_map=test_sanity_map)
+    assert rv == [True, True]
+
+
+def test_sanity_check_batch_algorithm_name_doesnt_exist():
+    with pytest.raises(ValueError):
+        sanity_check_batch("nope", ["placeholder"])
+
+
+# Built in validators and the registry
+
+
+@pytest.mark.parametrize(
+    "name,candidates,expected",
+    [
+        (
+            "iban",
+            [
+                b"GB82WEST12345698765432",
+                b"de89370400440532013000",
+                b"GB82WEST12345698765433",
+                b"GB82WEST1234569876543",
+                b"G182WEST12345698765432",
+            ],
+            [True, True, False, False, False],
+        ),
+        (
+            "aba",
+            [b"011000015", b"021000021", b"011000016", b"131000015", b"01100001"],
+            [True, True, False, False, False],
+        ),
+        (
+            "ssn",
+            [b"123456789", b"666123456", b"912345678", b"123006789", b"123450000"],
+            [True, False, False, False, False],
+        ),
+        (
+            "npi",
+            [b"1234567893", b"1234567894", b"3234567893", b"123456789"],
+            [True, False, False, False],
+        ),
+    ],
+)
+def test_builtin_validators(name, candidates, expected):
+    assert sanity_check_batch(name, candidates) == expected
+    assert [sanity_check(name, c) for c in candidates] == expected
+
+
+def test_validators_reject_non_ascii():
+    assert sanity_check_batch("ssn", ["12345678٣"]) == [False]
+
+
+@pytest.fixture
+def clean_registry(monkeypatch):
+    monkeypatch.setattr(_sanity, "sanity_mapping", dict(_sanity.sanity_mapping))
+    monkeypatch.setattr(
+        _sanity, "batch_sanity_mapping", dict(_sanity.batch_sanity_mapping)
+    )
+    monkeypatch.setattr(_sanity, "_plugins_loaded", False)
+
+
+def test_register(clean_registry):
+    _sanity.register(
+        "even", lambda candidates, encoding: [len(c) % 2 == 0 for c in candidates]
+    )
+    assert sanity_check_batch("even", [b"ab", b"abc"]) == [True, False]
+    assert sanity_check("even", b"ab") == True
+
+
+def test_plugins_loaded_from_entry_points(clean_registry, monkeypatch):
+    class EntryPointStub:
+        def __init__(self, name, func):
+            self.name = name
+            self.value = f"plugin:{name}"
+            self.func = func
+
+        def load(self):
+            return self.func
+
+    loaded = []
+
+    def iter_entry_points_stub(group):
+        loaded.append(group)
+        return [
+            EntryPointStub(
+                "always", lambda candidates, encoding: [True] * len(candidates)
+            ),
+            EntryPointStub(
+                "luhn", lambda candidates, encoding: [True] * len(candidates)
+            ),
+        ]
+
+    monkeypatch.setattr(_sanity, "_iter_entry_points", iter_entry_points_stub)
+
+    assert sanity_check_batch("always", [b"x", b"y"]) == [True, True]
+    assert sanity_check("always", b"x") == True
+    # Built in checks are not replaced and entry points are read once.
+    assert sanity_check_batch("luhn", [b"4111111111111112"]) == [False]
+    with pytest.raises(ValueError):
+        sanity_check_batch("missing", [b"x"])
+    assert loaded == [_sanity.ENTRY_POINT_GROUP]
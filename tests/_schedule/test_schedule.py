@@ -0,0 +1,64 @@
+from txtferret._schedule import FILE_COST, Task, plan_tasks, worker_loads
+
+MB = 1024 * 1024
+
+
+def test_plan_tasks_largest_first():
+    files = [("small.txt", 2 * MB), ("big.txt", 50 * MB), ("medium.txt", 10 * MB)]
+
+    tasks = plan_tasks(files, workers=2)
+
+    assert [task.items[0][0] for task in tasks] == [
+        "big.txt",
+        "medium.txt",
+        "small.txt",
+    ]
+    assert tasks[0].cost == 50 * MB + FILE_COST
+
+
+def test_plan_tasks_batches_small_files():
+    files = [(f"tiny_{i}.txt", 1024) for i in range(10)]
+
+    tasks = plan_tasks(files, workers=4, batch_size=4 * (1024 + FILE_COST))
+
+    assert [len(task.items) for task in tasks] == [4, 4, 2]
+    assert sorted(item[0] for task in tasks for item in task.items) == sorted(
+        name for name, _ in files
+    )
+
+
+def test_plan_tasks_splits_large_files():
+    files = [("huge.txt", 400 * MB), ("other.txt", 100 * MB)]
+
+    def splitter(file_name, parts):
+        assert file_name == "huge.txt"
+        step = 400 * MB // parts
+        return [(i * step, (i + 1) * step) for i in range(parts)]
+
+    tasks = plan_tasks(files, workers=4, splitter=splitter)
+
+    items = [item for task in tasks for item in task.items]
+    assert ("other.txt", None, None) in items
+    assert [item for item in items if item[0] == "huge.txt"] == [
+        ("huge.txt", i * 100 * MB, (i + 1) * 100 * MB) for i in range(4)
+    ]
+
+
+def test_plan_tasks_unsplittable_file():
+    tasks = plan_tasks([("huge.gz", 400 * MB)], workers=4, splitter=lambda *_: [])
+
+    assert [task.items for task in tasks] == [[("huge.gz", None, None)]]
+
+
+def test_worker_loads():
+    assert worker_loads([5, 4, 3, 3, 3], 2) == [10, 8]
+    assert worker_loads([], 3) == [0, 0, 0]
+
+
+def test_task_add():
+    task = Task()
+    task.add("a.txt", 10)
+    task.add("b.txt", 20, 0, 20)
+
+    assert task.items == [("a.txt", None, None), ("b.txt", 0, 20)]
+    assert task.cost == 30 + 2 * FILE_COST
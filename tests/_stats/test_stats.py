@@ -0,0 +1,87 @@
+import json
+import re
+
+from txtferret._stats import (
+    ScanStats,
+    TimedRegex,
+    add_stats,
+    new_filter_stats,
+    new_scan_stats,
+    timed_excluded,
+    write_stats,
+)
+
+
+def test_timed_regex_counts():
+    entry = new_filter_stats()
+    regex = TimedRegex(re.compile(rb"\d+"), entry)
+    assert regex.findall(b"a 12 b 345", 2) == [b"12", b"345"]
+    assert regex.search(b"abc 6", 0, 3) is None
+    assert [match.group() for match in regex.finditer(b"7 8")] == [b"7", b"8"]
+    assert regex.groups == 0
+    assert entry["calls"] == 3
+    assert entry["bytes"] == 8 + 3 + 3
+    assert entry["candidates"] == 4
+    assert entry["regex_seconds"] > 0
+
+
+def test_timed_regex_without_counts():
+    stats = new_scan_stats()
+    regex = TimedRegex(re.compile(b"x"), stats, key="search_seconds", count=False)
+    assert regex.search(b"abx").start() == 2
+    assert stats["search_seconds"] > 0
+    assert "calls" not in stats
+
+
+def test_timed_excluded():
+    entry = new_filter_stats()
+    excluded = timed_excluded(lambda match: match == b"x", entry)
+    assert [excluded(match) for match in (b"x", b"y", b"x")] == [True, False, True]
+    assert entry["excluded"] == 2
+
+
+def test_scan_stats_reset_keeps_entries():
+    stats = ScanStats()
+    entry = stats.filter("visa")
+    entry["candidates"] = 3
+    entry["regex_seconds"] = 1.5
+    stats.add_scanned(100, 2)
+    stats.reset()
+    assert stats.filter("visa") is entry
+    assert stats.as_dict() == {
+        "bytes": 0,
+        "lines": 0,
+        "search_seconds": 0.0,
+        "filters": {"visa": new_filter_stats()},
+    }
+
+
+def test_add_stats():
+    first = ScanStats()
+    first.add_scanned(10, 1)
+    first.filter("visa")["candidates"] = 2
+    second = ScanStats()
+    second.add_scanned(5, 1)
+    second.filter("visa")["candidates"] = 1
+    second.filter("amex")["reported"] = 4
+
+    totals = new_scan_stats()
+    for stats in (first.as_dict(), None, second.as_dict()):
+        add_stats(totals, stats)
+    assert totals["bytes"] == 15
+    assert totals["lines"] == 2
+    assert totals["filters"]["visa"]["candidates"] == 3
+    assert totals["filters"]["amex"]["reported"] == 4
+
+    first.add(second.as_dict())
+    assert first.as_dict() == totals
+
+
+def test_write_stats(tmp_path):
+    stats = ScanStats()
+    stats.filter("visa")["sanity_seconds"] = 0.1234567
+    file_name = tmp_path / "stats.json"
+    write_stats(str(file_name), stats.as_dict(), {"b.txt": stats.as_dict()})
+    report = json.loads(file_name.read_text())
+    assert report["total"]["filters"]["visa"]["sanity_seconds"] == 0.123457
+    assert list(report["files"]) == ["b.txt"]
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from txtferret._walker import walk_files
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """A small directory tree with files at three depths."""
+    (tmp_path / "logs" / "old").mkdir(parents=True)
+    (tmp_path / ".git").mkdir()
+    files = [
+        "top.txt",
+        "top.csv",
+        "top.txt.gz.txfidx",
+        "logs/app.log",
+        "logs/app.csv",
+        "logs/old/app.log",
+        ".git/HEAD",
+    ]
+    for name in files:
+        (tmp_path / name).write_bytes(b"x" * 10)
+    (tmp_path / "logs" / "big.log").write_bytes(b"x" * (2 * 1024 * 1024))
+    return tmp_path
+
+
+def names(tree, **kwargs):
+    return sorted(
+        os.path.relpath(name, tree) for name in walk_files(str(tree), **kwargs)
+    )
+
+
+def test_walk_files_recursive(tree):
+    assert names(tree) == [
+        ".git/HEAD",
+        "logs/app.csv",
+        "logs/app.log",
+        "logs/big.log",
+        "logs/old/app.log",
+        "top.csv",
+        "top.txt",
+    ]
+
+
+def test_walk_files_is_lazy(tree):
+    walker = walk_files(str(tree))
+    assert os.path.isabs(next(walker))
+
+
+def test_walk_files_max_depth(tree):
+    assert names(tree, max_depth=0) == ["top.csv", "top.txt"]
+    assert "logs/old/app.log" not in names(tree, max_depth=1)
+    assert "logs/app.log" in names(tree, max_depth=1)
+
+
+def test_walk_files_include_exclude(tree):
+    assert names(tree, include=["*.log"], exclude=[".git", "old"]) == [
+        "logs/app.log",
+        "logs/big.log",
+    ]
+    # Globs with a '/' match the path relative to the top directory.
+    assert names(tree, include=["logs/*.csv"]) == ["logs/app.csv"]
+
+
+def test_walk_files_max_size(tree):
+    assert "logs/big.log" not in names(tree, max_size=1024 * 1024)
+    assert "logs/big.log" in names(tree, max_size=4 * 1024 * 1024)
+
+
+def test_walk_files_symlinks(tree):
+    os.symlink(tree / "logs", tree / "linked")
+    os.symlink(tree / "top.txt", tree / "linked.txt")
+    # A loop back to the top directory is only walked once.
+    os.symlink(tree, tree / "logs" / "loop")
+
+    assert not any(name.startswith(("linked", "logs/loop")) for name in names(tree))
+
+    followed = names(tree, follow_symlinks=True)
+    assert "linked.txt" in followed
+    assert sum(name.endswith("old/app.log") for name in followed) == 1
+
+
+def test_walk_files_missing_directory(tmp_path):
+    assert list(walk_files(str(tmp_path / "missing"))) == []
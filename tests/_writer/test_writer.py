@@ -0,0 +1,65 @@
+import io
+
+import pytest
+
+from txtferret._writer import ResultWriter, format_finding
+
+
+def test_format_finding():
+    assert format_finding("now", "f.txt", "visa", 0, None, "4111") == (
+        "now\tf.txt\tvisa\t1\tN/A\t4111"
+    )
+    assert format_finding("now", "f.txt", "visa", 9, 2, "4111").split("\t")[3:5] == [
+        "10",
+        "3",
+    ]
+
+
+def test_format_finding_column_names():
+    names = ["name", "card"]
+    line = format_finding("now", "f.txt", "visa", 0, 1, "4111", names)
+    assert line.split("\t")[4] == "2 (card)"
+    line = format_finding("now", "f.txt", "visa", 0, 2, "4111", names)
+    assert line.split("\t")[4] == "3"
+
+
+def test_format_finding_offset():
+    line = format_finding("now", "f.txt", "visa", 0, None, "4111", None, 1234)
+    assert line.split("\t")[3:] == ["1", "N/A", "4111", "1234"]
+
+
+def test_writer_writes_batches_in_order():
+    fh = io.StringIO()
+    writer = ResultWriter(fh, max_pending=2)
+    for batch in range(10):
+        writer.write([("f.txt", "visa", batch * 3 + i, None, "x") for i in range(3)])
+    writer.flush()
+    writer.close()
+
+    rows = [line.split("\t") for line in fh.getvalue().splitlines()]
+    assert [row[3] for row in rows] == [str(i + 1) for i in range(30)]
+
+
+def test_writer_without_findings_starts_no_thread():
+    fh = io.StringIO()
+    writer = ResultWriter(fh)
+    writer.write([])
+    writer.flush()
+    writer.close()
+    assert writer._thread is None
+    assert fh.getvalue() == ""
+
+
+def test_writer_raises_write_errors():
+    class FullDisk:
+        def write(self, text):
+            raise OSError("No space left on device")
+
+        def flush(self):
+            pass
+
+    writer = ResultWriter(FullDisk())
+    writer.write([("f.txt", "visa", 0, None, "x")])
+    with pytest.raises(OSError):
+        writer.flush()
+    writer.close()
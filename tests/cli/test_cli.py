@@ -1,4 +1,31 @@
-from txtferret.cli import prep_config, bootstrap, get_totals
+import json
+
+import pytest
+
+from txtferret._cache import ScanCache, config_hash
+from txtferret._config import load_config
+from txtferret._dedup import Deduper
+from txtferret.cli import (
+    collect_results,
+    follow_files,
+    prep_config,
+    report_cached,
+    run_benchmarks,
+    save_stats,
+    bootstrap,
+    get_counts,
+    get_stats,
+    get_totals,
+    get_unique,
+    init_worker,
+    log_headers,
+    open_results_writer,
+    scan_worker_file,
+    scan_worker_task,
+    skip_cached,
+    walk_options,
+)
+from txtferret.core import file_ranges
 
 
 def test_prep_config():
@@ -34,3 +61,442 @@ def test_get_totals():
     results = [{"failures": 2, "passes": 5}, {"failures": 3, "passes": 10}]
 
     assert get_totals(results) == (5, 15)
+
+
+def test_get_counts():
+    results = [
+        {"counts": [["visa", None, 1, 2], ["amex", 3, 0, 1]]},
+        {"counts": [["visa", None, 4, 5]]},
+        {},
+    ]
+    assert sorted(get_counts(results)) == [["amex", 3, 0, 1], ["visa", None, 5, 7]]
+
+
+def test_walk_options():
+    config = {
+        "settings": {"include": "*.log", "exclude": None, "max_depth": 2},
+        "cli_kwargs": {
+            "include": (),
+            "exclude": ("tmp",),
+            "max_depth": 0,
+            "follow_symlinks": False,
+            "max_size": 5,
+        },
+    }
+
+    assert walk_options(config) == {
+        "include": ["*.log"],
+        "exclude": ["tmp"],
+        "max_depth": 0,
+        "follow_symlinks": False,
+        "max_size": 5 * 1024 * 1024,
+    }
+
+
+def test_scan_worker_file_reuses_ferret():
+    class StubClass:
+        instances = 0
+
+        def __init__(self, config):
+            StubClass.instances += 1
+            self.workers = config["cli_kwargs"]["workers"]
+            self.set_file(config["cli_kwargs"]["file_name"])
+
+        def set_file(self, file_name, open_output=True):
+            self.file_name = file_name
+
+        def scan_file(self):
+            pass
+
+        def summary(self):
+            return {"file_name": self.file_name, "workers": self.workers}
+
+    config = {"filters": [], "settings": {}, "cli_kwargs": {"workers": 4}}
+
+    init_worker(config, StubClass)
+    results = [scan_worker_file(name) for name in ("a.txt", "b.txt")]
+
+    assert results == [
+        {"file_name": "a.txt", "workers": 1},
+        {"file_name": "b.txt", "workers": 1},
+    ]
+    assert StubClass.instances == 1
+    assert config["cli_kwargs"] == {"workers": 4}
+
+
+def test_collect_results_merges_split_files(tmp_path):
+    lines = [b"line %d 4111111111111111\n" % i for i in range(200)]
+    file_name = tmp_path / "split_me.txt"
+    file_name.write_bytes(b"".join(lines))
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+
+    config = load_config()
+    config["cli_kwargs"] = {
+        "file_name": str(tmp_path),
+        "output_file": str(output_dir / "output.log"),
+    }
+
+    ranges = file_ranges(str(file_name), 3)
+    assert len(ranges) == 3
+
+    init_worker(config)
+    # Hand the ranges back out of order, like imap_unordered may.
+    task_results = [
+        scan_worker_task([(str(file_name), start, end)]) for start, end in ranges
+    ][::-1]
+
+    results, busy_seconds = collect_results(config, task_results, {str(file_name): 3})
+
+    assert [(r["file_name"], r["passes"]) for r in results] == [(str(file_name), 200)]
+    assert busy_seconds >= 0
+
+    with open(output_dir / "split_me.txt.results") as rf:
+        rows = [line.split("\t") for line in rf if line.count("\t") == 5][1:]
+    assert [row[3] for row in rows] == [str(i + 1) for i in range(200)]
+
+
+def test_report_cached_files(tmp_path):
+    file_name = tmp_path / "cached.txt"
+    file_name.write_bytes(b"visa 4111111111111111\n" * 3)
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+
+    config = load_config()
+    config["cli_kwargs"] = {
+        "file_name": str(tmp_path),
+        "output_file": str(output_dir / "output.log"),
+    }
+
+    with ScanCache(str(tmp_path / "cache.db"), config_hash(config)) as cache:
+        cached = []
+        assert list(skip_cached([str(file_name)], cache, cached)) == [str(file_name)]
+
+        init_worker(config, record=True)
+        task_results = [scan_worker_task([(str(file_name), None, None)])]
+        results, _ = collect_results(config, task_results, cache=cache)
+        assert "findings" not in results[0]
+
+        with open(output_dir / "cached.txt.results") as rf:
+            scanned = [line.split("\t")[1:] for line in rf if line.count("\t") == 5]
+
+        assert list(skip_cached([(str(file_name), 66)], cache, cached)) == []
+        assert cached == [str(file_name)]
+
+        cached_results = report_cached(config, cached, cache)
+
+    assert [(r["file_name"], r["passes"]) for r in cached_results] == [
+        (str(file_name), 3)
+    ]
+    with open(output_dir / "cached.txt.results") as rf:
+        reported = [line.split("\t")[1:] for line in rf if line.count("\t") == 5]
+    assert reported == scanned
+    assert len(reported) == 4
+
+
+def test_report_cached_window_mode(tmp_path):
+    file_name = tmp_path / "cached.txt"
+    file_name.write_bytes(b"visa 4111111111111111\nnothing\n5500000000000004\n")
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+
+    config = load_config()
+    config["cli_kwargs"] = {
+        "file_name": str(tmp_path),
+        "output_file": str(output_dir / "output.log"),
+        "scan_mode": "window",
+    }
+
+    with ScanCache(str(tmp_path / "cache.db"), config_hash(config)) as cache:
+        init_worker(config, record=True)
+        task_results = [scan_worker_task([(str(file_name), None, None)])]
+        collect_results(config, task_results, cache=cache)
+
+        with open(output_dir / "cached.txt.results") as rf:
+            scanned = [line.split("\t")[1:] for line in rf if line.count("\t") == 6]
+
+        cached_results = report_cached(config, [str(file_name)], cache)
+
+    assert [r["passes"] for r in cached_results] == [2]
+    with open(output_dir / "cached.txt.results") as rf:
+        reported = [line.split("\t")[1:] for line in rf if line.count("\t") == 6]
+    assert reported == scanned
+    assert reported[0][-1] == "byte_offset\n"
+    assert [(row[2], row[-1]) for row in reported[1:]] == [
+        ("1", "5\n"),
+        ("3", "30\n"),
+    ]
+
+
+def test_log_headers():
+    config = {"settings": {"scan_mode": "window"}, "cli_kwargs": {}}
+    assert log_headers(config).split("\t")[3:] == [
+        "line_num",
+        "column_num",
+        "string_matched",
+        "byte_offset",
+    ]
+    config["cli_kwargs"]["scan_mode"] = "block"
+    assert log_headers(config).split("\t")[-1] == "string_matched"
+
+
+def test_combined_results_file(tmp_path):
+    whole = tmp_path / "whole.txt"
+    whole.write_bytes(b"visa 4111111111111111\nnothing\namex 378282246310005\n")
+    split = tmp_path / "split.txt"
+    split.write_bytes(b"".join(b"line %d 4111111111111111\n" % i for i in range(50)))
+    results_file = tmp_path / "all.tsv"
+
+    config = load_config()
+    config["cli_kwargs"] = {
+        "file_name": str(tmp_path),
+        "output_file": str(tmp_path / "output.log"),
+        "results_file": str(results_file),
+    }
+
+    writer = open_results_writer(config)
+    init_worker(config, collect=True)
+    ranges = file_ranges(str(split), 2)
+    task_results = [scan_worker_task([(str(whole), None, None)])] + [
+        scan_worker_task([(str(split), start, end)]) for start, end in ranges
+    ][::-1]
+    results, _ = collect_results(config, task_results, {str(split): 2}, writer=writer)
+    writer.close()
+    writer.file_handler.close()
+
+    assert sorted((r["file_name"], r["passes"]) for r in results) == [
+        (str(split), 50),
+        (str(whole), 2),
+    ]
+    # Workers write nothing, the main process writes one file.
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "all.tsv",
+        "split.txt",
+        "whole.txt",
+    ]
+
+    with open(results_file) as rf:
+        rows = [line.rstrip("\n").split("\t") for line in rf]
+    assert rows[0][1:] == [
+        "file_path",
+        "filter_label",
+        "line_num",
+        "column_num",
+        "string_matched",
+    ]
+    assert [row[1:4] for row in rows[1:3]] == [
+        [str(whole), "visa_16_ccn", "1"],
+        [str(whole), "american_express_15_ccn", "3"],
+    ]
+    assert [row[3] for row in rows[3:]] == [str(i + 1) for i in range(50)]
+
+
+def test_collect_results_dedup_run(tmp_path):
+    first = tmp_path / "first.txt"
+    first.write_bytes(b"visa 4111111111111111\nvisa 4111111111111111\n")
+    second = tmp_path / "second.txt"
+    second.write_bytes(
+        b"".join(b"%d 4111111111111111 5500000000000004\n" % i for i in range(40))
+    )
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+
+    config = load_config()
+    config["cli_kwargs"] = {
+        "file_name": str(tmp_path),
+        "output_file": str(output_dir / "output.log"),
+        "dedup": "run",
+    }
+
+    init_worker(config, collect=True)
+    ranges = file_ranges(str(second), 2)
+    task_results = [scan_worker_task([(str(first), None, None)])] + [
+        scan_worker_task([(str(second), start, end)]) for start, end in ranges
+    ]
+    results, _ = collect_results(config, task_results, {str(second): 2})
+
+    assert [(r["passes"], r["unique"]) for r in results] == [
+        (2, {"visa_16_ccn": 1}),
+        (80, {"master_card_16_ccn": 1}),
+    ]
+    rows = []
+    for name in ("first.txt", "second.txt"):
+        with open(output_dir / f"{name}.results") as rf:
+            rows += [line.split("\t")[2:4] for line in rf if line.count("\t") == 5][1:]
+    assert rows == [["visa_16_ccn", "1"], ["master_card_16_ccn", "1"]]
+
+
+def test_collect_results_dedup_run_window_mode(tmp_path):
+    for name in ("first.txt", "second.txt"):
+        (tmp_path / name).write_bytes(
+            b"visa 4111111111111111\n5500000000000004 4111111111111111\n"
+        )
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+
+    config = load_config()
+    config["cli_kwargs"] = {
+        "file_name": str(tmp_path),
+        "output_file": str(output_dir / "output.log"),
+        "dedup": "run",
+        "scan_mode": "window",
+    }
+
+    init_worker(config, collect=True)
+    task_results = [
+        scan_worker_task([(str(tmp_path / name), None, None)])
+        for name in ("first.txt", "second.txt")
+    ]
+    results, _ = collect_results(config, task_results)
+
+    assert [r["unique"] for r in results] == [
+        {"visa_16_ccn": 1, "master_card_16_ccn": 1},
+        {},
+    ]
+    with open(output_dir / "first.txt.results") as rf:
+        rows = [line.split("\t") for line in rf if line.count("\t") == 6][1:]
+    assert [(row[2], row[3], row[-1]) for row in rows] == [
+        ("visa_16_ccn", "1", "5\n"),
+        ("master_card_16_ccn", "2", "22\n"),
+    ]
+    with open(output_dir / "second.txt.results") as rf:
+        assert [line for line in rf if line.count("\t") == 6][1:] == []
+
+
+@pytest.mark.parametrize("combined", [False, True])
+def test_report_cached_dedup_run(tmp_path, combined):
+    first = tmp_path / "first.txt"
+    first.write_bytes(b"visa 4111111111111111\nagain 4111111111111111\n")
+    second = tmp_path / "second.txt"
+    second.write_bytes(b"visa 4111111111111111\nmc 5500000000000004\n")
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+
+    config = load_config()
+    config["cli_kwargs"] = {
+        "file_name": str(tmp_path),
+        "output_file": str(output_dir / "output.log"),
+        "dedup": "run",
+    }
+    if combined:
+        config["cli_kwargs"]["results_file"] = str(tmp_path / "all.tsv")
+    names = [str(first), str(second)]
+
+    def reported_rows():
+        if combined:
+            with open(tmp_path / "all.tsv") as rf:
+                return [line.split("\t")[2:4] for line in rf][1:]
+        rows = []
+        for name in ("first.txt", "second.txt"):
+            with open(output_dir / f"{name}.results") as rf:
+                lines = [line for line in rf if line.count("\t") == 5][1:]
+                rows += [line.split("\t")[2:4] for line in lines]
+        return rows
+
+    with ScanCache(str(tmp_path / "cache.db"), config_hash(config)) as cache:
+        for name in names:
+            assert not cache.fresh(name)
+        writer = open_results_writer(config)
+        init_worker(config, record=True, collect=True)
+        task_results = [scan_worker_task([(name, None, None)]) for name in names]
+        scanned, _ = collect_results(config, task_results, cache=cache, writer=writer)
+        if writer is not None:
+            writer.close()
+            writer.file_handler.close()
+        scanned_rows = reported_rows()
+
+        # Every file is reported from the cache in the next run.
+        writer = open_results_writer(config)
+        cached = report_cached(
+            config, names, cache, writer=writer, run_deduper=Deduper(1024 * 1024)
+        )
+        if writer is not None:
+            writer.close()
+            writer.file_handler.close()
+
+    expected = {"visa_16_ccn": 1, "master_card_16_ccn": 1}
+    assert get_unique(scanned) == get_unique(cached) == expected
+    assert (
+        reported_rows()
+        == scanned_rows
+        == [
+            ["visa_16_ccn", "1"],
+            ["master_card_16_ccn", "2"],
+        ]
+    )
+
+
+def test_run_benchmarks(tmp_path):
+    results = run_benchmarks(
+        load_config(), str(tmp_path), size=20000, workers=2, files=2, repeat=1
+    )
+    assert [result["name"] for result in results] == [
+        "scan_file",
+        "scan_file_gzip",
+        "scan_file_delimited",
+        "get_column_map",
+        "sanity_test",
+        "luhn",
+        "bulk_1",
+        "bulk_2",
+    ]
+    for result in results:
+        assert result["bytes"] >= 20000 or result["name"] in ("sanity_test", "luhn")
+        assert result["mb_per_second"] > 0
+    assert results[-1]["workers"] == 2
+
+
+def test_save_stats(tmp_path):
+    results = [
+        {
+            "file_name": "a.txt",
+            "stats": {"bytes": 10, "lines": 1, "search_seconds": 0.5, "filters": {}},
+        },
+        {"file_name": "b.txt"},
+        {
+            "file_name": "c.txt",
+            "stats": {"bytes": 5, "lines": 2, "search_seconds": 0.5, "filters": {}},
+        },
+    ]
+    assert get_stats(results[1:2]) is None
+    assert get_stats(results)["bytes"] == 15
+
+    stats_file = tmp_path / "stats.json"
+    config = {"settings": {}, "cli_kwargs": {"stats_file": str(stats_file)}}
+    save_stats(config, results)
+    report = json.loads(stats_file.read_text())
+    assert report["total"]["lines"] == 3
+    assert list(report["files"]) == ["a.txt", "c.txt"]
+
+
+def test_follow_files_stats(tmp_path):
+    file_name = tmp_path / "app.log"
+    file_name.write_bytes(b"card 4111111111111111\n" * 3)
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    stats_file = tmp_path / "stats.json"
+
+    config = load_config()
+    config["cli_kwargs"] = {
+        "file_name": str(file_name),
+        "output_file": str(output_dir / "output.log"),
+        "follow": True,
+        "follow_interval": 0,
+        "stats_file": str(stats_file),
+    }
+    polls = []
+
+    def stop():
+        polls.append(None)
+        return len(polls) > 1
+
+    results, file_count = follow_files(config, stop=stop)
+
+    assert file_count == 1
+    assert results[0]["passes"] == 3
+    assert results[0]["stats"]["bytes"] == file_name.stat().st_size
+
+    save_stats(config, results)
+    report = json.loads(stats_file.read_text())
+    assert list(report["files"]) == [str(file_name)]
+    assert report["total"]["lines"] == 3
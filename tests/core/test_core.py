@@ -1,13 +1,21 @@
 from contextlib import contextmanager
+import gzip
+import os
 
 import pytest
 
+from txtferret._config import load_config
+from txtferret._dedup import BloomFilter
+from txtferret._default import DEFAULT_WINDOW_OVERLAP
+from txtferret._gzindex import build_index, save_index
 from txtferret.core import (
+    TxtFerret,
     gzipped_file_check,
     mask,
     _get_masked_string,
     _byte_code_to_string,
     sanity_test,
+    sanity_test_batch,
 )
 
 
@@ -111,3 +119,663 @@ def test_sanity_for_passed_sanity_checks():
         empty = ""
 
     assert sanity_test(StubFilter, "some_text", sanity_func=stub_func)
+
+
+def test_sanity_test_batch_runs_each_check_on_survivors():
+    calls = []
+
+    def stub_func(name, texts, encoding):
+        calls.append((name, texts))
+        return [text != b"bad" + name.encode() for text in texts]
+
+    class StubFilter:
+        sanity = ["one", "two"]
+        substitute = b"-"
+        empty = b""
+
+    texts = [b"b-adone", b"good", b"badtwo"]
+    rv = sanity_test_batch(StubFilter, texts, sanity_func=stub_func)
+    assert rv == [False, True, False]
+    assert calls == [
+        ("one", [b"badone", b"good", b"badtwo"]),
+        ("two", [b"good", b"badtwo"]),
+    ]
+
+
+# End to end scans of small files.
+
+
+CARD_LINES = [
+    b"nothing to see here\n",
+    b"visa 4111111111111111 and amex 378282246310005\n",
+    b"4111-1111-1111-1111,5500 0000 0000 0004,6011000000000004\n",
+    b"bad luhn 4111111111111112\n",
+    b"\n",
+    b"last line without a newline 5500000000000004",
+]
+
+
+def make_ferret(tmp_path, data, config=None, **cli_kwargs):
+    """Return a TxtFerret set up to scan data with the default config."""
+    file_name = tmp_path / "scan_me.txt"
+    file_name.write_bytes(data)
+
+    config = config or load_config()
+    config["cli_kwargs"] = {
+        "file_name": str(file_name),
+        "output_file": str(tmp_path / "output.log"),
+        **cli_kwargs,
+    }
+    return TxtFerret(config)
+
+
+def read_findings(ferret):
+    """Return result rows written by a finished scan."""
+    with open(f"{ferret.file_name}.results") as rf:
+        rows = [line.rstrip("\n").split("\t") for line in rf]
+    # Drop the date_time column so results can be compared.
+    return [row[1:] for row in rows if len(row) >= 6][1:]
+
+
+def scan_results(tmp_path, data, block_size=None, config=None, **cli_kwargs):
+    """Scan data with the default config and return the result rows."""
+    ferret = make_ferret(tmp_path, data, config, **cli_kwargs)
+    if block_size is not None:
+        ferret.block_size = block_size
+    ferret.scan_file()
+    return read_findings(ferret), ferret.summary()
+
+
+def test_scan_file_engines_match(tmp_path):
+    data = b"".join(CARD_LINES)
+    combined, combined_summary = scan_results(tmp_path, data, scan_engine="combined")
+    per_filter, per_filter_summary = scan_results(
+        tmp_path, data, scan_engine="per_filter"
+    )
+    assert combined == per_filter
+    assert len(combined) == 6
+    assert combined[0][1:] == ["american_express_15_ccn", "2", "N/A", "378282246310005"]
+    assert combined_summary["passes"] == per_filter_summary["passes"] == 6
+    assert combined_summary["failures"] == per_filter_summary["failures"] == 1
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 64, 1024 * 1024])
+@pytest.mark.parametrize("scan_engine", ["combined", "per_filter"])
+def test_scan_file_block_mode_matches_line_mode(tmp_path, block_size, scan_engine):
+    data = b"".join(CARD_LINES * 3)
+    line_mode = scan_results(tmp_path, data, scan_mode="line", scan_engine=scan_engine)
+    block_mode = scan_results(
+        tmp_path,
+        data,
+        block_size=block_size,
+        scan_mode="block",
+        scan_engine=scan_engine,
+    )
+    assert block_mode[0] == line_mode[0]
+    assert block_mode[1]["passes"] == line_mode[1]["passes"] == 18
+
+
+def test_scan_file_block_mode_match_across_lines(tmp_path):
+    # '[\W_]' separators also match newlines, make sure a number split
+    # over two lines is not reported in block mode.
+    data = b"4111\n1111 1111 1111\nvisa 4111111111111111\n"
+    findings, summary = scan_results(tmp_path, data, scan_mode="block")
+    assert [row[2:] for row in findings] == [["3", "N/A", "4111111111111111"]]
+
+
+def test_block_mode_reverts_to_line_mode_for_anchors(tmp_path):
+    ferret = make_ferret(tmp_path, b"", scan_mode="block")
+    assert ferret.scan_mode == "block"
+
+    config = load_config()
+    config["filters"][0]["pattern"] = "^(4[0-9]{15})$"
+    config["cli_kwargs"] = {"file_name": ferret.file_name, "scan_mode": "block"}
+    assert TxtFerret(config).scan_mode == "line"
+
+
+@pytest.mark.parametrize("scan_mode", ["block", "line"])
+@pytest.mark.parametrize("workers", [2, 5])
+def test_scan_file_workers_match_serial(tmp_path, scan_mode, workers):
+    data = b"".join(CARD_LINES * 4)
+    serial = scan_results(tmp_path, data, scan_mode=scan_mode)
+    parallel = scan_results(tmp_path, data, scan_mode=scan_mode, workers=workers)
+    assert parallel[0] == serial[0]
+    assert parallel[1]["passes"] == serial[1]["passes"]
+    assert parallel[1]["failures"] == serial[1]["failures"]
+    assert sorted(parallel[1]["counts"]) == sorted(serial[1]["counts"])
+
+
+def test_summarize_counts_without_masking(tmp_path, monkeypatch):
+    def mask_stub(*args, **kwargs):
+        raise AssertionError("Matches should not be masked when summarizing.")
+
+    monkeypatch.setattr("txtferret.core.mask", mask_stub)
+    findings, summary = scan_results(tmp_path, b"".join(CARD_LINES), summarize=True)
+
+    assert findings == []
+    assert sorted(summary["counts"]) == [
+        ["american_express_15_ccn", None, 0, 1],
+        ["discover_16_ccn", None, 0, 1],
+        ["master_card_16_ccn", None, 0, 2],
+        ["visa_16_ccn", None, 1, 2],
+    ]
+
+
+def test_counts_per_column(tmp_path):
+    data = b"a,4111111111111111,4111111111111112\nb,c,4111111111111111\n"
+    findings, summary = scan_results(tmp_path, data, delimiter=",")
+    assert len(findings) == 2
+    assert sorted(summary["counts"]) == [
+        ["visa_16_ccn", 2, 0, 1],
+        ["visa_16_ccn", 3, 1, 1],
+    ]
+
+
+def test_delimited_findings_in_filter_order(tmp_path):
+    data = b"5500000000000004,4111111111111111\n"
+    findings, _ = scan_results(tmp_path, data, delimiter=",")
+    assert [row[1:] for row in findings] == [
+        ["visa_16_ccn", "1", "2", "4111111111111111"],
+        ["master_card_16_ccn", "1", "1", "5500000000000004"],
+    ]
+
+
+@pytest.mark.parametrize("scan_mode", ["block", "line"])
+def test_include_columns(tmp_path, scan_mode):
+    data = b"4111111111111111,a,4111111111111111,5500000000000004,4111111111111111\n"
+    findings, summary = scan_results(
+        tmp_path, data, delimiter=",", include_columns=[4, 1], scan_mode=scan_mode
+    )
+    assert [row[1:] for row in findings] == [
+        ["visa_16_ccn", "1", "1", "4111111111111111"],
+        ["master_card_16_ccn", "1", "4", "5500000000000004"],
+    ]
+    assert summary["passes"] == 2
+
+
+CSV_DATA = (
+    b"name,notes,card\n"
+    b'alice,"4111111111111111, spare",5500000000000004\n'
+    b'bob,"line one\nline two",4111111111111111\n'
+    b"carol,none,378282246310005\n"
+)
+
+
+def test_csv_format(tmp_path):
+    findings, summary = scan_results(tmp_path, CSV_DATA, file_format="csv")
+    assert [row[1:] for row in findings] == [
+        ["visa_16_ccn", "2", "2", "4111111111111111"],
+        ["master_card_16_ccn", "2", "3", "5500000000000004"],
+        ["visa_16_ccn", "3", "3", "4111111111111111"],
+        ["american_express_15_ccn", "5", "3", "378282246310005"],
+    ]
+    assert "column_names" not in summary
+
+
+def test_csv_header(tmp_path):
+    findings, summary = scan_results(
+        tmp_path, CSV_DATA, file_format="csv", csv_header=True
+    )
+    assert [row[3] for row in findings] == [
+        "2 (notes)",
+        "3 (card)",
+        "3 (card)",
+        "3 (card)",
+    ]
+    assert summary["column_names"] == ["name", "notes", "card"]
+
+
+def test_csv_format_unfinished_record(tmp_path):
+    data = b'a,"4111111111111111\nb,5500000000000004\n'
+    findings, _ = scan_results(tmp_path, data, file_format="csv")
+    assert [row[2:4] for row in findings] == [["1", "2"], ["2", "2"]]
+
+
+FIXED_COLUMNS = [[0, 5], [5, 16], [29, 16]]
+FIXED_RECORDS = [
+    b"alice4111111111111111FILLER!!5500000000000004",
+    b"bob  00000000000000004111111111111111xxxxxxxxxx",
+    b"carol5500000000000004        4111111111111111",
+]
+
+
+@pytest.mark.parametrize("scan_engine", ["combined", "per_filter"])
+@pytest.mark.parametrize("scan_mode", ["block", "line"])
+def test_fixed_columns(tmp_path, scan_engine, scan_mode):
+    config = load_config()
+    config["settings"]["fixed_columns"] = FIXED_COLUMNS
+    findings, _ = scan_results(
+        tmp_path,
+        b"\n".join(FIXED_RECORDS) + b"\n",
+        scan_engine=scan_engine,
+        scan_mode=scan_mode,
+        config=config,
+    )
+    assert [row[1:] for row in findings] == [
+        ["visa_16_ccn", "1", "2", "4111111111111111"],
+        ["master_card_16_ccn", "1", "3", "5500000000000004"],
+        ["visa_16_ccn", "3", "3", "4111111111111111"],
+        ["master_card_16_ccn", "3", "2", "5500000000000004"],
+    ]
+
+
+@pytest.mark.parametrize("scan_engine", ["combined", "per_filter"])
+@pytest.mark.parametrize("block_size", [None, 1])
+def test_record_length(tmp_path, scan_engine, block_size):
+    config = load_config()
+    config["settings"]["fixed_columns"] = FIXED_COLUMNS
+    data = b"".join(record.ljust(48) for record in FIXED_RECORDS)
+    findings, summary = scan_results(
+        tmp_path,
+        data,
+        block_size=block_size,
+        scan_engine=scan_engine,
+        record_length=48,
+        config=config,
+    )
+    assert [row[2:4] for row in findings] == [
+        ["1", "2"],
+        ["1", "3"],
+        ["3", "3"],
+        ["3", "2"],
+    ]
+    assert summary["passes"] == 4
+
+
+def test_record_length_whole_records(tmp_path):
+    data = b"x" * 10 + b"4111111111111111" + b"y" * 6 + b"5500000000000004"
+    findings, _ = scan_results(tmp_path, data, record_length=16)
+    assert [row[1:] for row in findings] == [
+        ["master_card_16_ccn", "3", "N/A", "5500000000000004"],
+    ]
+
+
+def window_results(tmp_path, data, window_size, **cli_kwargs):
+    """Scan data in window mode, returning rows and their offsets."""
+    ferret = make_ferret(tmp_path, data, scan_mode="window", **cli_kwargs)
+    ferret.window_size = window_size
+    ferret.scan_file()
+    rows, offsets = [], []
+    for row in read_findings(ferret):
+        rows.append(row[:-1])
+        offsets.append(int(row[-1]))
+    return rows, offsets, ferret.summary()
+
+
+@pytest.mark.parametrize("window_size", [20, 21, 33, 64, 1024 * 1024])
+@pytest.mark.parametrize("scan_engine", ["combined", "per_filter"])
+def test_window_mode_matches_line_mode(tmp_path, window_size, scan_engine):
+    data = b"".join(CARD_LINES * 3)
+    line_mode, line_summary = scan_results(tmp_path, data, scan_mode="line")
+    rows, offsets, summary = window_results(
+        tmp_path, data, window_size, scan_engine=scan_engine
+    )
+    # Window mode reports matches in file order, line mode filter by
+    # filter in each line.
+    assert sorted(rows) == sorted(line_mode)
+    assert offsets == sorted(offsets)
+    assert summary["passes"] == line_summary["passes"] == 18
+    for row, offset in zip(rows, offsets):
+        assert data.startswith(row[-1][:4].encode(), offset)
+
+
+@pytest.mark.parametrize("window_size", [16, 20, 33, 1024 * 1024])
+def test_window_mode_matches_stop_at_newlines(tmp_path, window_size):
+    # Separators ('[\\W_]') could join the digits ending a line with the
+    # digits starting the next one.
+    data = (
+        b"order 5105\n4111 1111 1111 1111 paid\n"
+        b"id 6011\n0000 0000 0004 ok\n"
+        b"ref 3782-\n822463-10005 5500_0000_0000_0004\n"
+    ) * 3
+    line_mode, line_summary = scan_results(tmp_path, data, scan_mode="line")
+    rows, offsets, summary = window_results(tmp_path, data, window_size)
+    assert rows == line_mode
+    assert [row[-1] for row in rows[:2]] == [
+        "4111 1111 1111 1111",
+        "5500_0000_0000_0004",
+    ]
+    assert summary["passes"] == line_summary["passes"] == 6
+    assert summary["failures"] == line_summary["failures"] == 0
+
+
+@pytest.mark.parametrize("window_size", [20, 37, 1024])
+def test_window_mode_without_newlines(tmp_path, window_size):
+    cards = [b"4111111111111111", b"5500000000000004", b"378282246310005"]
+    data = b" ".join(card + b" " + b"z" * n for n in range(30) for card in cards)
+    rows, offsets, summary = window_results(tmp_path, data, window_size)
+    assert summary["passes"] == 90
+    assert offsets == [
+        offset
+        for offset in range(len(data))
+        if any(data.startswith(card, offset) for card in cards)
+    ]
+    assert {row[2] for row in rows} == {"1"}
+
+
+def test_window_mode_overlap(tmp_path):
+    ferret = make_ferret(tmp_path, b"", scan_mode="window", window_overlap=4)
+    assert ferret.window_overlap == 19
+
+    config = load_config()
+    config["filters"][0]["pattern"] = r"\d+"
+    ferret = make_ferret(tmp_path, b"", config, scan_mode="window")
+    assert ferret.window_overlap == DEFAULT_WINDOW_OVERLAP
+
+    with pytest.raises(ValueError):
+        make_ferret(tmp_path, b"", scan_mode="window", delimiter=",")
+
+
+def test_scan_range_relative_line_numbers(tmp_path):
+    data = b"skip 4111111111111111\nnope\nvisa 4111111111111111\n"
+    ferret = make_ferret(tmp_path, data)
+    result = ferret.scan_range(22, len(data))
+    assert result["lines"] == 2
+    assert result["passes"] == 1
+    assert result["findings"] == [(1, None, 1, "4111111111111111")]
+
+
+DEDUP_LINES = [
+    b"visa 4111111111111111 and 4111-1111-1111-1111\n",
+    b"amex 378282246310005\n",
+    b"visa again 4111 1111 1111 1111, mc 5500000000000004\n",
+]
+
+
+@pytest.mark.parametrize("scan_mode", ["block", "line"])
+def test_dedup_reports_first_occurrence(tmp_path, scan_mode):
+    data = b"".join(DEDUP_LINES * 3) + b"bad luhn 4111111111111112\n" * 2
+    findings, summary = scan_results(tmp_path, data, scan_mode=scan_mode, dedup="file")
+    assert [row[1:3] for row in findings] == [
+        ["visa_16_ccn", "1"],
+        ["american_express_15_ccn", "2"],
+        ["master_card_16_ccn", "3"],
+    ]
+    # Every occurrence is counted, values failing sanity checks too.
+    assert summary["passes"] == 15
+    assert summary["failures"] == 2
+    assert summary["unique"] == {
+        "visa_16_ccn": 1,
+        "american_express_15_ccn": 1,
+        "master_card_16_ccn": 1,
+    }
+
+
+def test_dedup_bloom_false_positives_keep_counts(tmp_path):
+    data = b"".join(DEDUP_LINES * 2) + b"bad luhn 4111111111111112\n"
+    expected = scan_results(tmp_path, data)[1]
+
+    ferret = make_ferret(tmp_path, data, dedup="file")
+    # A full Bloom filter takes every value for a repeat.
+    ferret.deduper.bloom = BloomFilter(64)
+    ferret.deduper.bloom.bits[:] = b"\xff" * 64
+    ferret.scan_file()
+
+    assert read_findings(ferret) == []
+    assert ferret.summary()["passes"] == expected["passes"] == 10
+    assert ferret.summary()["failures"] == expected["failures"] == 1
+
+
+@pytest.mark.parametrize("dedup,unique", [("file", {"visa_16_ccn": 1}), ("run", {})])
+def test_dedup_across_files(tmp_path, dedup, unique):
+    ferret = make_ferret(tmp_path, DEDUP_LINES[0], dedup=dedup)
+    ferret.scan_file()
+    # Scan the same file again, like the next file of a bulk scan.
+    ferret.set_file(ferret.file_name)
+    ferret.scan_file()
+    assert len(read_findings(ferret)) == len(unique)
+    assert ferret.summary()["unique"] == unique
+
+
+def test_dedup_across_ranges(tmp_path):
+    data = b"".join(DEDUP_LINES * 2)
+    ferret = make_ferret(tmp_path, data, dedup="file")
+    cut = len(DEDUP_LINES[0])
+    range_results = [ferret.scan_range(0, cut)]
+    ferret.set_file(ferret.file_name)
+    range_results.append(ferret.scan_range(cut, len(data)))
+    # Each range reports the first occurrences it found.
+    assert [len(result["findings"]) for result in range_results] == [1, 3]
+
+    ferret.set_file(ferret.file_name)
+    ferret.scan_file(range_results=range_results)
+    assert [row[1:3] for row in read_findings(ferret)] == [
+        ["visa_16_ccn", "1"],
+        ["american_express_15_ccn", "2"],
+        ["master_card_16_ccn", "3"],
+    ]
+
+
+def _allowlist_config(tmp_path, values):
+    allowlist = tmp_path / "allowlist.txt"
+    allowlist.write_bytes(values)
+    config = load_config()
+    for filter_dict in config["filters"]:
+        filter_dict["allowlist_file"] = str(allowlist)
+    return config
+
+
+@pytest.mark.parametrize("scan_mode", ["block", "line", "window"])
+def test_allowlist_excludes_normalized_values(tmp_path, scan_mode):
+    config = _allowlist_config(
+        tmp_path, b"# test cards\n\n4111-1111-1111-1111\n378282246310005\n"
+    )
+    findings, _ = scan_results(
+        tmp_path, b"".join(DEDUP_LINES), config=config, scan_mode=scan_mode
+    )
+    assert [(row[1], row[4]) for row in findings] == [
+        ("master_card_16_ccn", "5500000000000004")
+    ]
+
+
+def test_allowlist_missing_file(tmp_path):
+    config = load_config()
+    config["filters"][0]["allowlist_file"] = str(tmp_path / "missing.txt")
+    with pytest.raises(ValueError):
+        make_ferret(tmp_path, b"", config)
+
+
+def test_exclude_patterns_combined(tmp_path):
+    config = load_config()
+    for filter_dict in config["filters"]:
+        filter_dict["exclude_patterns"] = ["^5500", "(1)\\1{15}", "0005$"]
+    findings, _ = scan_results(tmp_path, b"".join(DEDUP_LINES), config=config)
+    assert [row[1] for row in findings] == ["visa_16_ccn"] * 3
+
+
+@pytest.mark.parametrize(
+    "cli_kwargs",
+    [
+        {"scan_mode": "block"},
+        {"scan_mode": "line"},
+        {"scan_mode": "window"},
+        {"scan_mode": "line", "workers": 2},
+        {"scan_mode": "line", "delimiter": ","},
+    ],
+)
+def test_stats_match_findings(tmp_path, cli_kwargs):
+    data = b"".join(CARD_LINES * 4) + b"\n"
+    plain = scan_results(tmp_path, data, **cli_kwargs)
+    findings, summary = scan_results(
+        tmp_path, data, stats_file="stats.json", **cli_kwargs
+    )
+    assert findings == plain[0]
+    assert "stats" not in plain[1]
+
+    stats = summary["stats"]
+    assert stats["bytes"] == len(data)
+    assert stats["lines"] == data.count(b"\n")
+    filters = stats["filters"].values()
+    assert sum(entry["reported"] for entry in filters) == len(findings)
+    assert sum(entry["checked"] for entry in filters) == (
+        summary["passes"] + summary["failures"]
+    )
+    assert all(entry["candidates"] >= entry["checked"] for entry in filters)
+
+
+def test_stats_count_exclusions(tmp_path):
+    config = _allowlist_config(tmp_path, b"4111111111111111\n378282246310005\n")
+    _, summary = scan_results(
+        tmp_path, b"".join(DEDUP_LINES), config=config, stats_file="stats.json"
+    )
+    filters = summary["stats"]["filters"]
+    assert filters["visa_16_ccn"]["excluded"] == 3
+    assert filters["american_express_15_ccn"]["excluded"] == 1
+    assert filters["master_card_16_ccn"]["reported"] == 1
+
+
+@pytest.mark.parametrize("scan_mode", ["block", "line"])
+def test_scan_file_gzip_multi_member(tmp_path, scan_mode):
+    data = b"".join(CARD_LINES * 2)
+    plain = scan_results(tmp_path, data, scan_mode="line")
+
+    half = len(data) // 2
+    compressed = gzip.compress(data[:half]) + gzip.compress(data[half:])
+    findings, summary = scan_results(tmp_path, compressed, scan_mode=scan_mode)
+    assert findings == plain[0]
+    assert summary["passes"] == plain[1]["passes"]
+
+
+@pytest.mark.parametrize("scan_mode", ["block", "line", "window"])
+def test_scan_file_gzip_zero_padding(tmp_path, scan_mode):
+    data = b"".join(CARD_LINES * 2)
+    plain = scan_results(tmp_path, data, scan_mode=scan_mode)
+
+    padded = gzip.compress(data) + b"\0" * 1024
+    findings, summary = scan_results(tmp_path, padded, scan_mode=scan_mode)
+    assert findings == plain[0]
+    assert summary["passes"] == plain[1]["passes"]
+
+
+@pytest.mark.parametrize("scan_mode", ["block", "line"])
+def test_scan_file_gzip_index_workers(tmp_path, scan_mode):
+    data = b"".join(CARD_LINES[:-1] * 10)
+    serial = scan_results(tmp_path, data, scan_mode="line")
+
+    lines = data.splitlines(keepends=True)
+    compressed = b"".join(
+        gzip.compress(b"".join(lines[i : i + 7])) for i in range(0, len(lines), 7)
+    )
+
+    # Scanning with gzip_index writes an index next to the file.
+    first = scan_results(tmp_path, compressed, scan_mode=scan_mode, gzip_index=True)
+    assert os.path.exists(tmp_path / "scan_me.txt.txfidx")
+
+    # Rewriting the file makes that index stale. The default span is
+    # much larger than the file, so rebuild it with a checkpoint at
+    # every member.
+    ferret = make_ferret(tmp_path, compressed, scan_mode=scan_mode, workers=3)
+    assert len(ferret._parallel_ranges(ferret.file_name)) == 0
+
+    save_index(ferret.file_name, build_index(ferret.file_name, span=1))
+    assert len(ferret._parallel_ranges(ferret.file_name)) == 3
+    ferret.scan_file()
+
+    assert first[0] == serial[0]
+    assert read_findings(ferret) == serial[0]
+    assert ferret.passed_sanity == serial[1]["passes"]
+
+
+def test_set_file_reuses_filters(tmp_path):
+    ferret = make_ferret(tmp_path, b"".join(CARD_LINES))
+    ferret.scan_file()
+    first = read_findings(ferret)
+    filters = ferret.filters
+
+    other = tmp_path / "other.txt"
+    other.write_bytes(b"".join(CARD_LINES))
+    ferret.set_file(str(other))
+
+    assert ferret.passed_sanity == 0
+    ferret.scan_file()
+
+    assert ferret.filters is filters
+    assert ferret.file_name == str(other)
+    assert read_findings(ferret) == [[str(other)] + row[1:] for row in first]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+@pytest.mark.parametrize("scan_mode", ["block", "line"])
+def test_resume_interrupted_scan(tmp_path, scan_mode, compress):
+    data = b"".join(CARD_LINES * 20)
+    if compress:
+        data = gzip.compress(data)
+    expected, expected_summary = scan_results(tmp_path, data, scan_mode=scan_mode)
+
+    config = load_config()
+    config["cli_kwargs"] = {
+        "file_name": str(tmp_path / "scan_me.txt"),
+        "output_file": str(tmp_path / "output.log"),
+        "scan_mode": scan_mode,
+        "resume": True,
+    }
+
+    ferret = TxtFerret(config)
+    ferret.block_size = 64
+    ferret.checkpoint_bytes = 100
+
+    saves = []
+    save_progress = ferret._save_progress
+
+    def interrupt(offset, lines):
+        save_progress(offset, lines)
+        saves.append(offset)
+        if len(saves) == 3:
+            raise KeyboardInterrupt
+
+    ferret._save_progress = interrupt
+    with pytest.raises(KeyboardInterrupt):
+        ferret.scan_file()
+    ferret.fh.close()
+
+    ferret = TxtFerret(config)
+    ferret.block_size = 64
+    assert ferret.checkpoint["offset"] == saves[-1]
+    ferret.scan_file()
+
+    assert read_findings(ferret) == expected
+    assert ferret.summary()["passes"] == expected_summary["passes"]
+    assert ferret.summary()["failures"] == expected_summary["failures"]
+    assert sorted(ferret.summary()["counts"]) == sorted(expected_summary["counts"])
+    assert not os.path.exists(ferret.checkpoint_name())
+
+
+@pytest.mark.parametrize("scan_mode", ["block", "window"])
+@pytest.mark.parametrize("gzipped", [False, True])
+def test_checkpoint_bytes_smaller_than_blocks(tmp_path, scan_mode, gzipped):
+    data = b"".join(CARD_LINES * 40) + b"\n"
+    expected = scan_results(tmp_path, data, scan_mode=scan_mode)[0]
+    if gzipped:
+        data = gzip.compress(data)
+
+    ferret = make_ferret(tmp_path, data, scan_mode=scan_mode, checkpoint_bytes=1)
+    ferret.checkpoint_bytes = 500
+
+    saves = []
+    save_progress = ferret._save_progress
+
+    def record(offset, lines, **state):
+        save_progress(offset, lines, **state)
+        saves.append(offset)
+
+    ferret._save_progress = record
+    ferret.scan_file()
+
+    assert read_findings(ferret) == expected
+    assert len(saves) >= 5
+    # A checkpoint is due once 500 bytes are scanned, after the block
+    # (of up to 500 bytes) holding them.
+    assert all(b - a < 1500 for a, b in zip([0] + saves, saves))
+
+
+def test_resume_ignores_changed_file(tmp_path):
+    ferret = make_ferret(tmp_path, b"".join(CARD_LINES), resume=True)
+    ferret.save_checkpoint(20, 1, os.stat(ferret.file_name))
+
+    with open(ferret.file_name, "ab") as wf:
+        wf.write(b"\nmore")
+
+    config = {**ferret._config}
+    ferret.fh.close()
+    ferret = TxtFerret(config)
+    assert ferret.checkpoint is None